@@ -0,0 +1,384 @@
+# backtester.py
+"""
+Backtester offline y determinista para TradingEngine.
+
+Reproduce eventos de Flintr grabados + ticks de precio a través del
+TradingEngine REAL (handle_flintr_mint / update_price /
+handle_flintr_graduation) con un reloj simulado en vez de time.time().
+
+Formatos de entrada:
+  - eventos: JSONL, una línea por frame → {"ts": <epoch s>, "frame": {...}}
+    (también acepta el frame crudo de Flintr con un campo numérico "ts"/"time")
+  - ticks:   CSV sin cabecera → ts,mint,price_sol
+
+Ambos ficheros se asumen ordenados por ts (así los graba el recorder);
+se mezclan en streaming con heapq.merge, sin cargar todo en memoria.
+
+Uso:
+    python backtester.py --events events.jsonl --ticks ticks.csv \\
+        --stop-loss 15 --trailing-stop 20 --trades-out trades.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import dataclasses
+import heapq
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import BotConfig, load_config
+from trading_engine import TradingEngine
+
+# Orden de prioridad cuando coinciden timestamps: primero eventos, luego ticks
+_KIND_EVENT = 0
+_KIND_TICK = 1
+
+# (ts, kind, seq, payload)
+TimelineItem = Tuple[float, int, int, Any]
+RecordedEvent = Tuple[float, Dict[str, Any]]
+PriceTick = Tuple[float, str, float]
+
+
+class SimClock:
+    """Reloj simulado: el backtester avanza `now` a cada item del timeline."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ----------------- Lectura de datos grabados -----------------
+
+def _frame_ts(obj: Dict[str, Any]) -> Optional[float]:
+    for key in ("ts", "time"):
+        value = obj.get(key)
+        if isinstance(value, (int, float)):
+            return float(value)
+    return None
+
+
+def iter_recorded_events(path: str) -> Iterator[RecordedEvent]:
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            frame = obj.get("frame", obj)
+            ts = _frame_ts(obj)
+            if ts is None or not isinstance(frame, dict):
+                continue
+            yield ts, frame
+
+
+def iter_price_ticks(path: str) -> Iterator[PriceTick]:
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        for row in csv.reader(fh):
+            if len(row) < 3:
+                continue
+            try:
+                yield float(row[0]), row[1], float(row[2])
+            except ValueError:
+                # cabecera o línea corrupta
+                continue
+
+
+def _timeline(
+    events: Iterable[RecordedEvent],
+    ticks: Iterable[PriceTick],
+) -> Iterator[TimelineItem]:
+    ev_items = (
+        (ts, _KIND_EVENT, i, frame) for i, (ts, frame) in enumerate(events)
+    )
+    tick_items = (
+        (ts, _KIND_TICK, i, (mint, price))
+        for i, (ts, mint, price) in enumerate(ticks)
+    )
+    return heapq.merge(ev_items, tick_items)
+
+
+# ----------------- Backtest -----------------
+
+def backtest_config(config: BotConfig, **overrides: Any) -> BotConfig:
+    """
+    Config para backtest: siempre simulación y sin scoring por ventana
+    (el scorer usa timers reales y rompería el determinismo).
+    """
+    return dataclasses.replace(
+        config,
+        mode="simulation",
+        scoring_window_ms=0.0,
+        **overrides,
+    )
+
+
+def run_backtest(
+    config: BotConfig,
+    events: Iterable[RecordedEvent],
+    ticks: Iterable[PriceTick],
+    *,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Ejecuta el backtest y devuelve {"trades": [...], "stats": {...}}.
+    Con verbose=False se descartan los print() del engine (mucho más rápido).
+    """
+    clock = SimClock()
+    engine = TradingEngine(config=backtest_config(config), clock=clock)
+
+    n_events = 0
+    n_ticks = 0
+    last_tick: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink as buf:
+        for ts, kind, _, payload in _timeline(events, ticks):
+            clock.now = ts
+
+            if kind == _KIND_TICK:
+                mint, price = payload
+                engine.update_price(mint, price)
+                last_tick[mint] = ts
+                n_ticks += 1
+            else:
+                event = payload.get("event") or {}
+                if event.get("class") != "token":
+                    continue
+                event_type = event.get("type")
+                if event_type == "mint":
+                    engine.handle_flintr_mint(payload)
+                elif event_type == "graduation":
+                    engine.handle_flintr_graduation(payload)
+                n_events += 1
+
+            # Vaciar el buffer de logs para no acumular días de prints
+            if buf is not None and buf.tell() > 1 << 20:
+                buf.seek(0)
+                buf.truncate()
+
+        # Posiciones que siguen abiertas al acabar los datos: su resultado es
+        # el último precio conocido, no una salida por SL/TS
+        end_ts = clock.now
+        out_of_data = [
+            {
+                "mint": p["mint"],
+                "symbol": p["symbol"],
+                "last_tick_age_sec": end_ts - last_tick.get(p["mint"], p["opened_at"] or end_ts),
+                "ticks": p["mint"] in last_tick,
+            }
+            for p in engine.get_positions_snapshot()
+            if p["status"] == "OPEN"
+        ]
+
+        engine.close_all_positions(reason="END OF DATA")
+
+    elapsed = time.perf_counter() - started
+    trades = engine.get_trades_snapshot()
+    stats = summarize_trades(trades)
+    stats.update(
+        {
+            "events": n_events,
+            "ticks": n_ticks,
+            "elapsed_sec": elapsed,
+            "filters": engine.mint_filters.get_stats_snapshot(),
+            "out_of_data": len(out_of_data),
+            "out_of_data_positions": out_of_data,
+        }
+    )
+    return {"trades": trades, "stats": stats}
+
+
+def summarize_trades(trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total = len(trades)
+    wins = sum(1 for t in trades if t["pnl_sol"] >= 0)
+    total_pnl = sum(t["pnl_sol"] for t in trades)
+
+    # max drawdown de la curva de P&L acumulado (en SOL)
+    equity = 0.0
+    peak = 0.0
+    max_dd = 0.0
+    for t in trades:
+        equity += t["pnl_sol"]
+        peak = max(peak, equity)
+        max_dd = max(max_dd, peak - equity)
+
+    by_reason: Dict[str, int] = {}
+    for t in trades:
+        by_reason[t["reason"]] = by_reason.get(t["reason"], 0) + 1
+
+    holds = [
+        (t["closed_at"] or 0.0) - (t["opened_at"] or 0.0) for t in trades
+    ]
+
+    return {
+        "total_trades": total,
+        "wins": wins,
+        "losses": total - wins,
+        "win_rate": (wins / total * 100.0) if total else 0.0,
+        "total_pnl_sol": total_pnl,
+        "avg_pnl_percent": (
+            sum(t["pnl_percent"] for t in trades) / total if total else 0.0
+        ),
+        "max_drawdown_sol": max_dd,
+        "avg_hold_sec": (sum(holds) / total) if total else 0.0,
+        "by_reason": by_reason,
+    }
+
+
+def write_trades_csv(path: str, trades: List[Dict[str, Any]]) -> None:
+    if not trades:
+        open(path, "w").close()
+        return
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(trades[0].keys()))
+        writer.writeheader()
+        writer.writerows(trades)
+
+
+# ----------------- Grabación (para alimentar el backtester) -----------------
+
+class EventRecorder:
+    """
+    Handler de FlintrClient que graba cada frame token en JSONL con su ts.
+    Registrar con flintr.register("*", "mint", rec) / ("*", "graduation", rec).
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def __call__(self, frame: Dict[str, Any]) -> None:
+        line = json.dumps({"ts": time.time(), "frame": frame}, separators=(",", ":"))
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+class TickRecorder:
+    """Graba ticks de precio (ts,mint,price_sol) en CSV."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8", newline="")
+
+    def __call__(self, mint: str, price_sol: float) -> None:
+        with self._lock:
+            self._fh.write(f"{time.time():.6f},{mint},{price_sol!r}\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+class MintWatchlist:
+    """
+    Mints a grabar aunque ninguna estrategia los tenga abiertos.
+
+    Sin esto sólo habría ticks de las posiciones OPEN del bot en vivo: un
+    backtest con SL/TS más anchos se quedaría sin datos tras la salida real,
+    y los mints que el bot no compró no tendrían ningún tick.
+
+    - `observe(frame)` (handler de FlintrClient para "mint") añade el mint.
+    - `touch(mint)` renueva la ventana (watchlist_tick_loop lo llama para los
+      mints con posición abierta: se siguen grabando `window_sec` tras el cierre).
+    - `mints()` devuelve los vistos en los últimos `window_sec`, como mucho
+      `max_mints` (los más recientes), para acotar el rate limit del feed.
+    """
+
+    def __init__(self, window_sec: float, max_mints: int) -> None:
+        self.window_sec = window_sec
+        self.max_mints = max_mints
+        self._lock = threading.Lock()
+        self._last_seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def observe(self, frame: Dict[str, Any]) -> None:
+        mint = (frame.get("data") or {}).get("mint")
+        if mint:
+            self.touch(mint)
+
+    def touch(self, mint: str, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._last_seen[mint] = time.time() if now is None else now
+            self._last_seen.move_to_end(mint)
+
+    def mints(self, now: Optional[float] = None) -> List[str]:
+        cutoff = (time.time() if now is None else now) - self.window_sec
+        with self._lock:
+            # orden de inserción = orden de last_seen: los caducados van delante
+            while self._last_seen:
+                mint, seen = next(iter(self._last_seen.items()))
+                if seen >= cutoff:
+                    break
+                del self._last_seen[mint]
+            recent = list(self._last_seen)
+        return recent[-self.max_mints:] if self.max_mints > 0 else []
+
+
+def recorder_paths(record_dir: str) -> Tuple[str, str]:
+    os.makedirs(record_dir, exist_ok=True)
+    return (
+        os.path.join(record_dir, "events.jsonl"),
+        os.path.join(record_dir, "ticks.csv"),
+    )
+
+
+# ----------------- CLI -----------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest offline de TradingEngine")
+    parser.add_argument("--events", required=True, help="JSONL de frames Flintr grabados")
+    parser.add_argument("--ticks", required=True, help="CSV ts,mint,price_sol")
+    parser.add_argument("--stop-loss", type=float, default=None)
+    parser.add_argument("--trailing-stop", type=float, default=None)
+    parser.add_argument("--invest", type=float, default=None)
+    parser.add_argument("--max-active-trades", type=int, default=None)
+    parser.add_argument("--trades-out", default=None, help="CSV de resultados por trade")
+    parser.add_argument("--verbose", action="store_true", help="mostrar logs del engine")
+    args = parser.parse_args()
+
+    overrides: Dict[str, Any] = {}
+    if args.stop_loss is not None:
+        overrides["stop_loss_percent"] = args.stop_loss
+    if args.trailing_stop is not None:
+        overrides["trailing_stop_percent"] = args.trailing_stop
+    if args.invest is not None:
+        overrides["invest_amount_sol"] = args.invest
+    if args.max_active_trades is not None:
+        overrides["max_active_trades"] = args.max_active_trades
+
+    config = dataclasses.replace(load_config(), **overrides)
+
+    result = run_backtest(
+        config,
+        iter_recorded_events(args.events),
+        iter_price_ticks(args.ticks),
+        verbose=args.verbose,
+    )
+
+    if args.trades_out:
+        write_trades_csv(args.trades_out, result["trades"])
+
+    print(json.dumps(result["stats"], indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+# benchmarks.py
+"""
+Microbenchmarks offline (sin red externa) de las piezas del camino crítico.
+
+Uso:
+    python benchmarks.py            # todos
+    python benchmarks.py pump_tx    # uno concreto
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import Callable, Dict, List
+
+
+def _timeit(fn: Callable[[], object], iterations: int) -> float:
+    """Devuelve microsegundos por iteración."""
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def _report(rows: List[tuple]) -> None:
+    width = max(len(name) for name, _ in rows)
+    for name, us in rows:
+        print(f"  {name.ljust(width)}  {us:10.2f} µs/op")
+
+
+# ----------------- pump_tx -----------------
+
+def bench_pump_tx(iterations: int = 5000) -> None:
+    """Builder con template + caches vs reconstruir cuentas/PDAs en cada compra."""
+    from solders.hash import Hash
+    from solders.instruction import AccountMeta, Instruction
+    from solders.keypair import Keypair
+    from solders.pubkey import Pubkey
+    from solders.transaction import Transaction
+
+    import pump_tx_builder as ptb
+
+    owner = Keypair()
+    mint = Pubkey.new_unique()
+    blockhash = Hash.new_unique()
+    builder = ptb.PumpBuyTxBuilder(owner)
+
+    def naive() -> Transaction:
+        # Lo que hacía cada compra antes: derivar PDAs/ATA y crear 12 metas
+        owner_pk = owner.pubkey()
+        bonding_curve = ptb.derive_bonding_curve(mint)
+        abc = ptb.derive_ata(bonding_curve, mint)
+        user_ata = ptb.derive_ata(owner_pk, mint)
+        metas = [
+            AccountMeta(ptb.PUMP_GLOBAL, False, False),
+            AccountMeta(ptb.PUMP_FEE_RECIPIENT, False, True),
+            AccountMeta(mint, False, False),
+            AccountMeta(bonding_curve, False, True),
+            AccountMeta(abc, False, True),
+            AccountMeta(user_ata, False, True),
+            AccountMeta(owner_pk, True, True),
+            AccountMeta(ptb.SYS_PROGRAM_ID, False, False),
+            AccountMeta(ptb.TOKEN_PROGRAM, False, False),
+            AccountMeta(ptb.SYSVAR_RENT_PUBKEY, False, False),
+            AccountMeta(ptb.PUMP_EVENT_AUTHORITY, False, False),
+            AccountMeta(ptb.PUMP_FUN_PROGRAM, False, False),
+        ]
+        data = ptb._SWAP_ARGS.pack(ptb.PUMP_BUY_METHOD, 1_000_000, 50_000_000)
+        ix = Instruction(ptb.PUMP_FUN_PROGRAM, data, metas)
+        return Transaction.new_signed_with_payer([ix], owner_pk, [owner], blockhash)
+
+    def cached() -> Transaction:
+        accounts = builder.mint_accounts(mint)
+        return builder.build_buy_tx(accounts, 1_000_000, 50_000_000, blockhash)
+
+    def accounts_only() -> object:
+        return builder.mint_accounts(mint)
+
+    assert bytes(naive()) == bytes(cached()), "builder produce una TX distinta"
+
+    print(f"pump_tx ({iterations} iteraciones)")
+    _report(
+        [
+            ("naive (PDAs + metas por compra)", _timeit(naive, iterations)),
+            ("builder (template + LRU)", _timeit(cached, iterations)),
+            ("builder.mint_accounts (hit)", _timeit(accounts_only, iterations)),
+        ]
+    )
+
+
+# ----------------- tx_versions -----------------
+
+def bench_tx_versions(iterations: int = 5000) -> None:
+    """Transaction legacy vs VersionedTransaction v0 (+ compute budget, + ALT)."""
+    from solders.address_lookup_table_account import AddressLookupTableAccount
+    from solders.hash import Hash
+    from solders.keypair import Keypair
+    from solders.pubkey import Pubkey
+
+    import pump_tx_builder as ptb
+
+    owner = Keypair()
+    mint = Pubkey.new_unique()
+    blockhash = Hash.new_unique()
+    builder = ptb.PumpBuyTxBuilder(owner)
+    accounts = builder.mint_accounts(mint)
+
+    # ALT con las cuentas estáticas de Pump.fun (lo que tendría una ALT propia)
+    alt = AddressLookupTableAccount(
+        key=Pubkey.new_unique(),
+        addresses=[
+            ptb.PUMP_GLOBAL,
+            ptb.PUMP_FEE_RECIPIENT,
+            ptb.SYS_PROGRAM_ID,
+            ptb.TOKEN_PROGRAM,
+            ptb.SYSVAR_RENT_PUBKEY,
+            ptb.PUMP_EVENT_AUTHORITY,
+        ],
+    )
+
+    variants = {
+        "legacy": lambda: builder.build_buy_tx(accounts, 1_000_000, 50_000_000, blockhash),
+        "v0": lambda: builder.build_buy_tx_v0(accounts, 1_000_000, 50_000_000, blockhash),
+        "v0 + compute budget": lambda: builder.build_buy_tx_v0(
+            accounts, 1_000_000, 50_000_000, blockhash,
+            compute_unit_limit=120_000, compute_unit_price=10_000,
+        ),
+        "v0 + compute budget + ALT": lambda: builder.build_buy_tx_v0(
+            accounts, 1_000_000, 50_000_000, blockhash,
+            compute_unit_limit=120_000, compute_unit_price=10_000,
+            lookup_tables=[alt],
+        ),
+    }
+
+    print(f"tx_versions ({iterations} iteraciones)")
+    width = max(len(name) for name in variants)
+    for name, fn in variants.items():
+        us = _timeit(fn, iterations)
+        size = len(bytes(fn()))
+        print(f"  {name.ljust(width)}  {us:10.2f} µs/op  {size:5d} bytes")
+
+
+# ----------------- curve_quotes -----------------
+
+def bench_curve_quotes(sizes_per_table: int = 10_000, iterations: int = 20) -> None:
+    """Tablas de cotización en bloque vs get_token_amount / get_sol_amount por tamaño."""
+    import random
+
+    import curve_quotes as cq
+    from pumpfun_executor import (
+        BondingCurveLayout,
+        get_sol_amount,
+        get_token_amount,
+        initial_curve_layout,
+    )
+
+    rng = random.Random(7)
+    layouts = [initial_curve_layout()] + [
+        BondingCurveLayout(
+            blob1=0,
+            virtual_token_reserves=rng.randint(280_000_000_000_000, 1_073_000_000_000_000),
+            virtual_sol_reserves=rng.randint(30_000_000_000, 115_000_000_000),
+            real_token_reserves=rng.randint(1_000_000, 793_100_000_000_000),
+            real_sol_reserves=0,
+            blob4=0,
+            complete=False,
+        )
+        for _ in range(20)
+    ]
+    lamports = cq.size_grid(0, 100_000_000_000, sizes_per_table)  # 0–100 SOL
+    tokens = cq.size_grid(0, 800_000_000_000_000, sizes_per_table)
+
+    # Corrección: idéntico al escalar, tamaño a tamaño, en todas las curvas
+    for layout in layouts:
+        buy = cq.buy_quote_table(layout, lamports)
+        sell = cq.sell_quote_table(layout, tokens)
+        vs, vt, rt = (
+            layout.virtual_sol_reserves,
+            layout.virtual_token_reserves,
+            layout.real_token_reserves,
+        )
+        assert list(buy.amounts_out) == [get_token_amount(vs, vt, rt, x) for x in lamports], \
+            "buy_quote_table difiere de get_token_amount"
+        assert list(sell.amounts_out) == [get_sol_amount(vs, vt, x) for x in tokens], \
+            "sell_quote_table difiere de get_sol_amount"
+
+    layout = layouts[0]
+    vs, vt, rt = (
+        layout.virtual_sol_reserves,
+        layout.virtual_token_reserves,
+        layout.real_token_reserves,
+    )
+
+    def scalar_buy() -> object:
+        return [get_token_amount(vs, vt, rt, x) for x in lamports]
+
+    def scalar_sell() -> object:
+        return [get_sol_amount(vs, vt, x) for x in tokens]
+
+    print(f"curve_quotes ({sizes_per_table} tamaños/tabla, {iterations} iteraciones)")
+    rows = [
+        ("escalar get_token_amount", _timeit(scalar_buy, iterations)),
+        ("buy_quote_table (+ impacto)", _timeit(lambda: cq.buy_quote_table(layout, lamports), iterations)),
+        ("escalar get_sol_amount", _timeit(scalar_sell, iterations)),
+        ("sell_quote_table (+ impacto)", _timeit(lambda: cq.sell_quote_table(layout, tokens), iterations)),
+    ]
+    width = max(len(name) for name, _ in rows)
+    for name, us in rows:
+        print(f"  {name.ljust(width)}  {us / 1000:8.2f} ms/tabla  {sizes_per_table / us:8.2f} M quotes/s")
+
+    table = cq.buy_quote_table(layout, lamports)
+    for limit in (100, 500, 1000):
+        size = table.max_size_for_impact(limit)
+        print(f"  max BUY con impacto <= {limit} bps: {size / 1e9:.3f} SOL")
+
+
+# ----------------- import_time -----------------
+
+# módulos que MODE=simulation no debe cargar al arrancar
+_REAL_ONLY_MODULES = (
+    "pumpfun_executor",
+    "jupiter_executor",
+    "wallet_reconciler",
+    "solana",
+    "jup_python_sdk",
+)
+
+
+def bench_import_time(runs: int = 5) -> None:
+    """Arranque en frío: tiempo de import en un intérprete nuevo (mejor de `runs`)."""
+    import json
+    import os
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    child = (
+        "import importlib, json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "for name in sys.argv[1].split(','):\n"
+        "    importlib.import_module(name)\n"
+        "ms = (time.perf_counter() - started) * 1000.0\n"
+        f"heavy = [m for m in {_REAL_ONLY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'ms': ms, 'heavy': heavy}))\n"
+    )
+
+    def measure(modules: str) -> tuple:
+        best = float("inf")
+        heavy: List[str] = []
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, "-c", child, modules],
+                cwd=here,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            best = min(best, result["ms"])
+            heavy = result["heavy"]
+        return best, heavy
+
+    variants = {
+        "main (MODE=simulation)": "main",
+        "pumpfun_executor": "pumpfun_executor",
+        "jupiter_executor": "jupiter_executor",
+        "main + executors (MODE=real)": "main,pumpfun_executor,jupiter_executor,mint_info,wallet_reconciler",
+    }
+
+    print(f"import_time (mejor de {runs} arranques)")
+    width = max(len(name) for name in variants)
+    for name, modules in variants.items():
+        ms, heavy = measure(modules)
+        if modules == "main":
+            assert not heavy, f"MODE=simulation carga módulos de MODE=real: {heavy}"
+        print(f"  {name.ljust(width)}  {ms:8.1f} ms")
+
+
+# ----------------- tx_sender -----------------
+
+class _MockRpc:
+    """
+    Servidor JSON-RPC local (thread propio) que imita lo que usa TxFanoutSender:
+    sendTransaction (con retardo configurable), getSignatureStatuses y
+    getBlockHeight. Guarda cada llamada para poder comprobarlas.
+    """
+
+    def __init__(self, ack_delay_sec: float = 0.0, fail_send: bool = False) -> None:
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.ack_delay_sec = ack_delay_sec
+        self.fail_send = fail_send
+        self.calls: List[tuple] = []
+        self.statuses: Dict[str, Dict[str, object]] = {}
+        self.block_height = 1_000
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                method, params = body["method"], body["params"]
+                mock.calls.append((method, params))
+                reply: Dict[str, object] = {"jsonrpc": "2.0", "id": body["id"]}
+                if method == "sendTransaction":
+                    time.sleep(mock.ack_delay_sec)
+                    if mock.fail_send:
+                        reply["error"] = {"code": -32002, "message": "rechazada"}
+                    else:
+                        reply["result"] = "ok"
+                elif method == "getSignatureStatuses":
+                    reply["result"] = {
+                        "context": {"slot": 1},
+                        "value": [mock.statuses.get(sig) for sig in params[0]],
+                    }
+                elif method == "getBlockHeight":
+                    reply["result"] = mock.block_height
+                data = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def method_calls(self, method: str) -> List[list]:
+        return [params for name, params in self.calls if name == method]
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def bench_tx_sender(n_txs: int = 300) -> None:
+    """TxFanoutSender contra RPC mock locales: abanico, primer ack, lotes, expiración, cancelación."""
+    import asyncio
+    import base64
+
+    from tx_sender import MAX_SIGNATURES_PER_STATUS_CALL, TxFanoutSender
+
+    async def run() -> None:
+        slow, fast, broken = _MockRpc(0.3), _MockRpc(0.0), _MockRpc(fail_send=True)
+        mocks = (slow, fast, broken)
+        results: List[Dict[str, object]] = []
+        sender = TxFanoutSender(
+            [m.url for m in mocks],
+            on_result=results.append,
+            poll_interval_sec=3600.0,  # las rondas se lanzan a mano con poll_once
+            confirm_timeout_sec=0.0,
+        )
+        try:
+            sender._get_http()  # pool creado antes, como en PumpFunExecutor.warmup
+            # 1) abanico + primer ack: vuelve con el rápido, sin esperar al lento
+            started = time.perf_counter()
+            await sender.send(b"tx-0", "sig-0", {"kind": "BUY"}, last_valid_block_height=1_010)
+            first_ack_ms = (time.perf_counter() - started) * 1000.0
+            assert first_ack_ms < 250, f"send esperó al RPC lento ({first_ack_ms:.0f} ms)"
+            await asyncio.sleep(0.4)
+            encoded = base64.b64encode(b"tx-0").decode("ascii")
+            for mock in mocks:
+                sent = mock.method_calls("sendTransaction")
+                assert len(sent) == 1 and sent[0][0] == encoded, f"{mock.url} no recibió la TX"
+            endpoints = {e["url"]: e for e in sender.get_stats_snapshot()["endpoints"]}
+            assert endpoints[fast.url]["first_acks"] == 1, "el primer ack no fue el del RPC rápido"
+            assert endpoints[broken.url]["errors"] == 1
+            slow.ack_delay_sec = 0.0
+
+            # 2) getSignatureStatuses en lotes de MAX_SIGNATURES_PER_STATUS_CALL
+            for i in range(1, n_txs):
+                await sender.send(b"tx-%d" % i, f"sig-{i}", last_valid_block_height=1_010)
+            for mock in mocks:
+                mock.calls.clear()
+            await sender.poll_once()
+            batches = slow.method_calls("getSignatureStatuses")
+            expected = -(-n_txs // MAX_SIGNATURES_PER_STATUS_CALL)
+            assert len(batches) == expected, f"{len(batches)} llamadas, esperadas {expected}"
+            assert sum(len(b[0]) for b in batches) == n_txs
+            assert not results, "confirm_timeout_sec no debe expirar TX con altura conocida"
+
+            # 3) LANDED / FAILED según el estado devuelto
+            slow.statuses["sig-0"] = {"slot": 5, "err": None, "confirmationStatus": "confirmed"}
+            slow.statuses["sig-1"] = {"slot": 5, "err": {"InstructionError": [0, "Custom"]}}
+            await sender.poll_once()
+            by_sig = {r["signature"]: r for r in results}
+            assert by_sig["sig-0"]["status"] == "LANDED" and by_sig["sig-0"]["kind"] == "BUY"
+            assert by_sig["sig-1"]["status"] == "FAILED"
+
+            # 4) expiración por last_valid_block_height, no por reloj
+            slow.block_height = 1_011
+            await sender.poll_once()
+            expired = [r for r in results if r["status"] == "EXPIRED"]
+            assert len(expired) == n_txs - 2, f"{len(expired)} expiradas"
+            assert sender.get_stats_snapshot()["pending"] == 0
+
+            # 5) send cancelado (timeout del runtime) con la TX ya en vuelo:
+            # sigue pendiente y el único estado final es el del confirm loop
+            results.clear()
+            fast.ack_delay_sec = slow.ack_delay_sec = 0.2
+            try:
+                await asyncio.wait_for(sender.send(b"tx-c", "sig-c"), 0.05)
+            except asyncio.TimeoutError:
+                pass
+            assert sender.is_pending("sig-c"), "el send cancelado dejó de seguir la TX"
+            await asyncio.sleep(0.4)
+            slow.statuses["sig-c"] = {"slot": 6, "err": None, "confirmationStatus": "confirmed"}
+            await sender.poll_once()
+            assert [r["status"] for r in results] == ["LANDED"], results
+            # ... y si todos los RPC la rechazan, REJECTED una sola vez
+            results.clear()
+            for mock in (slow, fast):
+                mock.fail_send = True
+            try:
+                await asyncio.wait_for(sender.send(b"tx-r", "sig-r"), 0.05)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(0.4)
+            assert [r["status"] for r in results] == ["REJECTED"], results
+            assert not sender.is_pending("sig-r")
+
+            print(f"tx_sender ({len(mocks)} RPC mock, {n_txs} TX)")
+            print(f"  primer ack (RPC rápido, lento a 300 ms)  {first_ack_ms:8.1f} ms")
+            print(f"  getSignatureStatuses por ronda          {len(batches):8d} llamadas")
+        finally:
+            await sender.close()
+            for mock in mocks:
+                mock.close()
+
+    asyncio.run(run())
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "pump_tx": bench_pump_tx,
+    "tx_versions": bench_tx_versions,
+    "curve_quotes": bench_curve_quotes,
+    "import_time": bench_import_time,
+    "tx_sender": bench_tx_sender,
+}
+
+
+def main(argv: List[str]) -> None:
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        bench = BENCHMARKS.get(name)
+        if bench is None:
+            print(f"Benchmark desconocido: {name} (disponibles: {', '.join(BENCHMARKS)})")
+            continue
+        bench()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
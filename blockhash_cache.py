@@ -0,0 +1,127 @@
+# blockhash_cache.py
+"""
+Prefetch de blockhash en background.
+
+Un task asyncio refresca get_latest_blockhash cada `refresh_interval_sec` y
+guarda (blockhash, last_valid_block_height) en memoria. La construcción de
+TX lee el valor cacheado sin ningún round trip; sólo si el valor está
+stale (más viejo que `max_age_sec`, o el task no arrancó / falló) se hace
+un fetch síncrono como antes.
+
+`last_valid_for(blockhash)` recuerda el last_valid_block_height de los
+blockhashes recientes: el sender lo usa para expirar cada TX por altura de
+bloque y no por reloj.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# ~60s de validez / 0.4s de refresco ≈ 150 blockhashes vivos a la vez
+_VALID_HEIGHTS_MAX = 256
+
+
+@dataclass(frozen=True)
+class CachedBlockhash:
+    blockhash: Any                 # solders Hash
+    last_valid_block_height: int
+    fetched_at: float              # time.monotonic()
+
+
+class BlockhashCache:
+    def __init__(
+        self,
+        *,
+        refresh_interval_sec: float = 0.4,
+        max_age_sec: float = 20.0,
+    ) -> None:
+        self.refresh_interval_sec = refresh_interval_sec
+        # Un blockhash vale ~150 slots (~60s); nos quedamos muy por debajo
+        self.max_age_sec = max_age_sec
+
+        self._current: Optional[CachedBlockhash] = None
+        # str(blockhash) -> last_valid_block_height (los más recientes)
+        self._valid_heights: "OrderedDict[str, int]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+        # estadísticas
+        self.hits: int = 0
+        self.misses: int = 0
+        self.refresh_errors: int = 0
+
+    # ------------- background -------------
+
+    def start(self, client: Any) -> None:
+        """Arranca el task de refresco en el loop actual (idempotente)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop(client))
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _refresh_loop(self, client: Any) -> None:
+        logger.info("[Blockhash] Prefetcher iniciado (cada %.2fs)", self.refresh_interval_sec)
+        while True:
+            try:
+                await self.refresh(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.refresh_errors += 1
+                logger.debug("[Blockhash] Error refrescando: %r", exc)
+            await asyncio.sleep(self.refresh_interval_sec)
+
+    async def refresh(self, client: Any) -> CachedBlockhash:
+        resp = await client.get_latest_blockhash()
+        value = resp.value
+        cached = CachedBlockhash(
+            blockhash=value.blockhash,
+            last_valid_block_height=int(value.last_valid_block_height),
+            fetched_at=time.monotonic(),
+        )
+        self._current = cached
+        key = str(cached.blockhash)
+        self._valid_heights[key] = cached.last_valid_block_height
+        self._valid_heights.move_to_end(key)
+        while len(self._valid_heights) > _VALID_HEIGHTS_MAX:
+            self._valid_heights.popitem(last=False)
+        return cached
+
+    # ------------- lectura -------------
+
+    def peek(self) -> Optional[CachedBlockhash]:
+        """Valor cacheado si no está stale; None si hay que ir a la red."""
+        current = self._current
+        if current is None:
+            return None
+        if time.monotonic() - current.fetched_at > self.max_age_sec:
+            return None
+        return current
+
+    async def get(self, client: Any) -> CachedBlockhash:
+        """Cacheado (0 round trips) o fetch síncrono si está stale."""
+        current = self.peek()
+        if current is not None:
+            self.hits += 1
+            return current
+        self.misses += 1
+        return await self.refresh(client)
+
+    def last_valid_for(self, blockhash: Any) -> Optional[int]:
+        """last_valid_block_height de un blockhash servido por esta caché."""
+        return self._valid_heights.get(str(blockhash))
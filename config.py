@@ -1,6 +1,9 @@
 # config.py
+import dataclasses
 import os
+import typing
 from dataclasses import dataclass
+from typing import Dict, List
 
 
 def _get_env(name: str, default: str | None = None) -> str | None:
@@ -37,8 +40,21 @@ def _get_env_bool(name: str, default: bool = False) -> bool:
     return v.strip().lower() in ("1", "true", "yes", "y", "on")
 
 
-@dataclass
+def _get_env_list(name: str) -> tuple[str, ...]:
+    """Lista separada por comas → tupla sin vacíos ni espacios."""
+    v = _get_env(name)
+    if v is None:
+        return ()
+    return tuple(item.strip() for item in v.split(",") if item.strip())
+
+
+@dataclass(frozen=True)
 class BotConfig:
+    """
+    Inmutable: un cambio en caliente crea una versión nueva
+    (apply_overrides) que TradingEngine.apply_config publica de golpe.
+    """
+
     mode: str
     flintr_api_key: str
     helius_rpc_url: str | None
@@ -47,6 +63,17 @@ class BotConfig:
     telegram_bot_token: str
     telegram_chat_id: int | None
 
+    # notificaciones push al chat (outbox con coalescing + rate limit)
+    telegram_notify: bool
+    telegram_notify_coalesce_sec: float
+    telegram_notify_per_min: int
+    telegram_notify_burst: int
+    telegram_notify_max_pending: int
+
+    # /positions paginado y dashboard fijado con edición en vivo
+    positions_page_size: int
+    positions_live_sec: float
+
     stop_loss_percent: float
     trailing_stop_percent: float
     invest_amount_sol: float
@@ -58,6 +85,91 @@ class BotConfig:
     jupiter_api_url: str
     slippage_bps: int
 
+    # filtros pre-trade (antes de tomar el lock y de cualquier RPC)
+    filter_require_metadata: bool
+    filter_creator_blacklist: tuple[str, ...]
+    filter_min_latest_price: float
+    filter_symbol_blocklist: tuple[str, ...]
+    filter_name_blocklist: tuple[str, ...]
+
+    # scoring micro-batch de mints (0 = desactivado, decisión por evento)
+    scoring_window_ms: float
+    scoring_min_score: float
+
+    # prefetch de blockhash para PumpFunExecutor
+    blockhash_refresh_ms: float
+    blockhash_max_age_sec: float
+
+    # sizing optimista de BUY sin leer la bonding curve (0 RPC)
+    optimistic_sizing: bool
+    optimistic_margin_bps: int
+
+    # construcción de TX: v0 + compute budget + lookup tables opcionales
+    use_versioned_tx: bool
+    compute_unit_limit: int
+    compute_unit_price_micro_lamports: int
+    lookup_tables: tuple[str, ...]
+
+    # priority fee dinámico (percentiles de getRecentPrioritizationFees)
+    priority_fee_enabled: bool
+    priority_fee_refresh_sec: float
+    priority_fee_percentile_buy: float
+    priority_fee_percentile_sell: float
+    priority_fee_percentile_stop: float
+    priority_fee_max_micro_lamports: int
+
+    # envío en abanico de TX + confirmación por getSignatureStatuses
+    send_rpc_urls: tuple[str, ...]
+    confirm_poll_ms: float
+    # las TX expiran por last_valid_block_height; esto sólo si no se conoce
+    confirm_timeout_sec: float
+
+    # runtime asyncio de los executors (thread dedicado)
+    executor_max_in_flight: int
+    executor_timeout_sec: float
+    executor_build_timeout_sec: float
+
+    # órdenes de salida de Jupiter precalentadas por posición abierta
+    jupiter_quote_refresh_sec: float
+    jupiter_quote_max_age_sec: float
+
+    # ventas en lote (sell_many): paralelismo, timeout por orden, reintentos
+    jupiter_sell_concurrency: int
+    jupiter_sell_timeout_sec: float
+    jupiter_sell_retries: int
+
+    # caché LRU de decimals / supply / token program por mint
+    mint_info_cache_size: int
+
+    # reconciliación de balances de la wallet (0 = desactivada)
+    wallet_reconcile_sec: float
+
+    # directorio donde grabar eventos Flintr + ticks para el backtester
+    record_dir: str | None
+    # además de las posiciones abiertas, ticks de todo mint visto en Flintr
+    # durante esta ventana (tras verlo o tras cerrar su posición)
+    record_tick_window_sec: float
+    record_tick_max_mints: int
+
+    # mercado Pump.fun simulado (MODE=simulation con fills sobre la curva)
+    sim_market: bool
+    sim_latency_ms: float
+    sim_flow_trades_per_sec: float
+    sim_flow_mean_sol: float
+    sim_flow_buy_prob: float
+    # flujo neto determinista (SOL/s, >0 compras, <0 ventas); 0 = sin tendencia
+    sim_flow_drift_sol_per_sec: float
+    # compras previas a la nuestra (creador + snipers del primer bloque): los
+    # "otros" tienen tokens que vender y nuestra entrada no está en el suelo
+    sim_dev_buy_sol: float
+    sim_seed: int | None
+
+    # recarga en caliente de parámetros de estrategia (HOT_RELOAD_FIELDS);
+    # compartido entre estrategias, STRATEGY_<NOMBRE>_<CAMPO> separa las claves
+    config_reload_file: str | None
+    config_reload_sec: float
+    config_apply_to_open: bool
+
     log_level: str
 
 
@@ -69,6 +181,9 @@ def load_config() -> BotConfig:
     telegram_chat_id_str = _get_env("TELEGRAM_CHAT_ID")
     telegram_chat_id = int(telegram_chat_id_str) if telegram_chat_id_str else None
 
+    sim_seed_str = _get_env("SIM_SEED")
+    sim_seed = int(sim_seed_str) if sim_seed_str else None
+
     return BotConfig(
         mode=mode,
         flintr_api_key=_get_env("FLINTR_API_KEY", "") or "",
@@ -78,6 +193,16 @@ def load_config() -> BotConfig:
         telegram_bot_token=_get_env("TELEGRAM_BOT_TOKEN", "") or "",
         telegram_chat_id=telegram_chat_id,
 
+        telegram_notify=_get_env_bool("TELEGRAM_NOTIFY", True),
+        telegram_notify_coalesce_sec=_get_env_float("TELEGRAM_NOTIFY_COALESCE_SEC", 2.0),
+        # Telegram: ~1 msg/s por chat y 20 msg/min en grupos
+        telegram_notify_per_min=_get_env_int("TELEGRAM_NOTIFY_PER_MIN", 20),
+        telegram_notify_burst=_get_env_int("TELEGRAM_NOTIFY_BURST", 3),
+        telegram_notify_max_pending=_get_env_int("TELEGRAM_NOTIFY_MAX_PENDING", 500),
+
+        positions_page_size=_get_env_int("POSITIONS_PAGE_SIZE", 8),
+        positions_live_sec=_get_env_float("POSITIONS_LIVE_SEC", 5.0),
+
         stop_loss_percent=_get_env_float("STOP_LOSS_PERCENT", 15.0),
         trailing_stop_percent=_get_env_float("TRAILING_STOP_PERCENT", 20.0),
         invest_amount_sol=_get_env_float("INVEST_AMOUNT_SOL", 0.05),
@@ -89,5 +214,235 @@ def load_config() -> BotConfig:
         jupiter_api_url=_get_env("JUPITER_API_URL", "https://lite-api.jup.ag"),
         slippage_bps=_get_env_int("SLIPPAGE_BPS", 300),
 
+        filter_require_metadata=_get_env_bool("FILTER_REQUIRE_METADATA", False),
+        filter_creator_blacklist=_get_env_list("FILTER_CREATOR_BLACKLIST"),
+        filter_min_latest_price=_get_env_float("FILTER_MIN_LATEST_PRICE", 0.0),
+        filter_symbol_blocklist=_get_env_list("FILTER_SYMBOL_BLOCKLIST"),
+        filter_name_blocklist=_get_env_list("FILTER_NAME_BLOCKLIST"),
+
+        scoring_window_ms=_get_env_float("SCORING_WINDOW_MS", 0.0),
+        scoring_min_score=_get_env_float("SCORING_MIN_SCORE", 0.0),
+
+        blockhash_refresh_ms=_get_env_float("BLOCKHASH_REFRESH_MS", 400.0),
+        blockhash_max_age_sec=_get_env_float("BLOCKHASH_MAX_AGE_SEC", 20.0),
+
+        optimistic_sizing=_get_env_bool("OPTIMISTIC_SIZING", True),
+        optimistic_margin_bps=_get_env_int("OPTIMISTIC_MARGIN_BPS", 1500),
+
+        use_versioned_tx=_get_env_bool("USE_VERSIONED_TX", True),
+        compute_unit_limit=_get_env_int("COMPUTE_UNIT_LIMIT", 120_000),
+        compute_unit_price_micro_lamports=_get_env_int("COMPUTE_UNIT_PRICE_MICRO_LAMPORTS", 0),
+        lookup_tables=_get_env_list("LOOKUP_TABLES"),
+
+        priority_fee_enabled=_get_env_bool("PRIORITY_FEE_ENABLED", True),
+        priority_fee_refresh_sec=_get_env_float("PRIORITY_FEE_REFRESH_SEC", 2.0),
+        priority_fee_percentile_buy=_get_env_float("PRIORITY_FEE_PERCENTILE_BUY", 75.0),
+        priority_fee_percentile_sell=_get_env_float("PRIORITY_FEE_PERCENTILE_SELL", 75.0),
+        priority_fee_percentile_stop=_get_env_float("PRIORITY_FEE_PERCENTILE_STOP", 90.0),
+        priority_fee_max_micro_lamports=_get_env_int("PRIORITY_FEE_MAX_MICRO_LAMPORTS", 5_000_000),
+
+        send_rpc_urls=_get_env_list("SEND_RPC_URLS"),
+        confirm_poll_ms=_get_env_float("CONFIRM_POLL_MS", 400.0),
+        confirm_timeout_sec=_get_env_float("CONFIRM_TIMEOUT_SEC", 60.0),
+
+        executor_max_in_flight=_get_env_int("EXECUTOR_MAX_IN_FLIGHT", 16),
+        executor_timeout_sec=_get_env_float("EXECUTOR_TIMEOUT_SEC", 10.0),
+        executor_build_timeout_sec=_get_env_float("EXECUTOR_BUILD_TIMEOUT_SEC", 2.0),
+
+        jupiter_quote_refresh_sec=_get_env_float("JUPITER_QUOTE_REFRESH_SEC", 5.0),
+        jupiter_quote_max_age_sec=_get_env_float("JUPITER_QUOTE_MAX_AGE_SEC", 20.0),
+
+        jupiter_sell_concurrency=_get_env_int("JUPITER_SELL_CONCURRENCY", 8),
+        jupiter_sell_timeout_sec=_get_env_float("JUPITER_SELL_TIMEOUT_SEC", 8.0),
+        jupiter_sell_retries=_get_env_int("JUPITER_SELL_RETRIES", 1),
+
+        mint_info_cache_size=_get_env_int("MINT_INFO_CACHE_SIZE", 4096),
+
+        wallet_reconcile_sec=_get_env_float("WALLET_RECONCILE_SEC", 10.0),
+
+        record_dir=_get_env("RECORD_DIR"),
+        record_tick_window_sec=_get_env_float("RECORD_TICK_WINDOW_SEC", 600.0),
+        record_tick_max_mints=_get_env_int("RECORD_TICK_MAX_MINTS", 50),
+
+        sim_market=_get_env_bool("SIM_MARKET", False),
+        sim_latency_ms=_get_env_float("SIM_LATENCY_MS", 400.0),
+        sim_flow_trades_per_sec=_get_env_float("SIM_FLOW_TRADES_PER_SEC", 1.0),
+        sim_flow_mean_sol=_get_env_float("SIM_FLOW_MEAN_SOL", 0.5),
+        sim_flow_buy_prob=_get_env_float("SIM_FLOW_BUY_PROB", 0.5),
+        sim_flow_drift_sol_per_sec=_get_env_float("SIM_FLOW_DRIFT_SOL_PER_SEC", 0.0),
+        sim_dev_buy_sol=_get_env_float("SIM_DEV_BUY_SOL", 3.0),
+        sim_seed=sim_seed,
+
+        config_reload_file=_get_env("CONFIG_RELOAD_FILE"),
+        config_reload_sec=_get_env_float("CONFIG_RELOAD_SEC", 2.0),
+        config_apply_to_open=_get_env_bool("CONFIG_APPLY_TO_OPEN", False),
+
         log_level=_get_env("LOG_LEVEL", "INFO"),
     )
+
+
+# ----------------- recarga en caliente -----------------
+
+# Parámetros que el engine lee en cada decisión / tick; el resto (RPCs,
+# wallet, executors, runtime) sólo se leen al arrancar y requieren reinicio.
+HOT_RELOAD_FIELDS = (
+    "stop_loss_percent",
+    "trailing_stop_percent",
+    "invest_amount_sol",
+    "max_active_trades",
+    "filter_require_metadata",
+    "filter_creator_blacklist",
+    "filter_min_latest_price",
+    "filter_symbol_blocklist",
+    "filter_name_blocklist",
+    "scoring_min_score",
+)
+
+
+def _parse_like(current: object, raw: str) -> object:
+    """Convierte `raw` al tipo del valor actual (mismas reglas que _get_env_*)."""
+    raw = raw.strip()
+    if isinstance(current, bool):
+        return raw.lower() in ("1", "true", "yes", "y", "on")
+    if isinstance(current, int):
+        return int(raw)
+    if isinstance(current, float):
+        return float(raw)
+    if isinstance(current, tuple):
+        return tuple(item.strip() for item in raw.split(",") if item.strip())
+    return raw
+
+
+def validate_config(config: BotConfig) -> List[str]:
+    """Errores de una versión de config (lista vacía = válida)."""
+    errors: List[str] = []
+    if config.mode not in ("simulation", "real"):
+        errors.append("mode debe ser simulation o real")
+    if not 0 <= config.stop_loss_percent < 100:
+        errors.append("stop_loss_percent debe estar en [0, 100)")
+    if not 0 <= config.trailing_stop_percent < 100:
+        errors.append("trailing_stop_percent debe estar en [0, 100)")
+    if config.invest_amount_sol <= 0:
+        errors.append("invest_amount_sol debe ser > 0")
+    if config.max_active_trades < 1:
+        errors.append("max_active_trades debe ser >= 1")
+    if config.filter_min_latest_price < 0:
+        errors.append("filter_min_latest_price debe ser >= 0")
+    return errors
+
+
+def apply_overrides(base: BotConfig, changes: Dict[str, str]) -> BotConfig:
+    """
+    Nueva versión de `base` con `changes` (nombre de campo o de variable de
+    entorno -> valor en texto). Sólo HOT_RELOAD_FIELDS; ValueError si algún
+    cambio no se puede aplicar o la versión resultante no es válida.
+    """
+    values: Dict[str, object] = {}
+    for key, raw in changes.items():
+        name = key.strip().lower()
+        if name not in HOT_RELOAD_FIELDS:
+            raise ValueError(f"{name} no se puede recargar en caliente")
+        try:
+            values[name] = _parse_like(getattr(base, name), raw)
+        except ValueError:
+            raise ValueError(f"valor inválido para {name}: {raw!r}") from None
+
+    config = dataclasses.replace(base, **values)
+    errors = validate_config(config)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return config
+
+
+def read_overrides_file(path: str) -> Dict[str, str]:
+    """Fichero estilo .env (KEY=VALUE, # comentarios) → dict."""
+    changes: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            changes[key.strip()] = value.strip().strip('"').strip("'")
+    return changes
+
+
+
+# ----------------- varias estrategias en un proceso -----------------
+
+# Compartidos por todas las estrategias (una ingesta, un bot de Telegram)
+SHARED_FIELDS = (
+    "flintr_api_key",
+    "telegram_bot_token",
+    "telegram_chat_id",
+    "record_dir",
+    "record_tick_window_sec",
+    "record_tick_max_mints",
+    "log_level",
+)
+
+
+def _parse_field(name: str, current: object, raw: str) -> object:
+    if current is None:
+        # campos opcionales (X | None): el tipo declarado decide
+        field_type = {f.name: f.type for f in dataclasses.fields(BotConfig)}[name]
+        if int in typing.get_args(field_type):
+            return int(raw.strip())
+        return raw.strip()
+    return _parse_like(current, raw)
+
+
+def load_strategy_configs(base: BotConfig) -> Dict[str, BotConfig]:
+    """
+    STRATEGIES=scalp,swing → una BotConfig por estrategia: la base (.env)
+    más los overrides STRATEGY_<NOMBRE>_<CAMPO> (p.ej. STRATEGY_SCALP_STOP_LOSS_PERCENT,
+    STRATEGY_SWING_WALLET_PRIVATE_KEY). Sin STRATEGIES → {"main": base}.
+    """
+    names = _get_env_list("STRATEGIES")
+    if not names:
+        return {"main": base}
+
+    field_names = {f.name for f in dataclasses.fields(BotConfig)}
+    configs: Dict[str, BotConfig] = {}
+    for name in names:
+        prefix = f"STRATEGY_{name.upper()}_"
+        values: Dict[str, object] = {}
+        for key, raw in os.environ.items():
+            if not key.startswith(prefix) or raw == "":
+                continue
+            field = key[len(prefix):].lower()
+            if field not in field_names:
+                raise ValueError(f"{key}: {field} no es un campo de BotConfig")
+            if field in SHARED_FIELDS:
+                raise ValueError(f"{key}: {field} es compartido entre estrategias")
+            try:
+                values[field] = _parse_field(field, getattr(base, field), raw)
+            except ValueError:
+                raise ValueError(f"{key}: valor inválido {raw!r}") from None
+
+        config = dataclasses.replace(base, **values)
+        errors = validate_config(config)
+        if errors:
+            raise ValueError(f"Estrategia {name}: " + "; ".join(errors))
+        configs[name] = config
+    return configs
+
+
+def scope_overrides(changes: Dict[str, str], strategy: str) -> Dict[str, str]:
+    """
+    Overrides de un fichero de recarga que tocan a `strategy`: las claves sin
+    prefijo valen para todas; STRATEGY_<NOMBRE>_<CAMPO> sólo para esa
+    estrategia (y gana sobre la clave sin prefijo). Las de otras estrategias
+    se descartan.
+    """
+    prefix = f"STRATEGY_{strategy.upper()}_"
+    common: Dict[str, str] = {}
+    scoped: Dict[str, str] = {}
+    for key, value in changes.items():
+        upper = key.strip().upper()
+        if upper.startswith(prefix):
+            scoped[upper[len(prefix):]] = value
+        elif not upper.startswith("STRATEGY_"):
+            common[upper] = value
+    common.update(scoped)
+    return common
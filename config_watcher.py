@@ -0,0 +1,88 @@
+# config_watcher.py
+"""
+Recarga en caliente de parámetros de estrategia desde un fichero.
+
+CONFIG_RELOAD_FILE apunta a un fichero estilo .env con overrides
+(p.ej. `STOP_LOSS_PERCENT=25`). Cada CONFIG_RELOAD_SEC se mira su mtime; si
+cambió, se valida (config.apply_overrides, sólo HOT_RELOAD_FIELDS) sobre la
+config vigente y se publica como una versión nueva con
+TradingEngine.apply_config. Un fichero inválido se ignora entero: la
+versión anterior sigue activa.
+
+Con varias estrategias (STRATEGIES) un mismo fichero puede servir a todas:
+las claves sin prefijo valen para todas y STRATEGY_<NOMBRE>_<CAMPO> sólo para
+esa (config.scope_overrides). main.py arranca un watcher por fichero con los
+engines que lo usan; cada engine valida y publica su parte por separado.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Sequence, Union
+
+from config import apply_overrides, read_overrides_file, scope_overrides
+from strategy_host import as_engine_list
+
+logger = logging.getLogger(__name__)
+
+
+async def config_reload_loop(
+    engine: Union[Any, Sequence[Any]],
+    path: str,
+    interval_sec: float = 2.0,
+    apply_to_open: Optional[bool] = None,
+) -> None:
+    """
+    `engine`: un engine, una lista o un StrategyHost. `apply_to_open=None`
+    usa CONFIG_APPLY_TO_OPEN de cada engine.
+    """
+    engines = as_engine_list(engine)
+    logger.info(
+        "[Config] Vigilando %s cada %.1fs (%s)",
+        path,
+        interval_sec,
+        ", ".join(e.name for e in engines),
+    )
+    last_mtime: Optional[float] = None
+    last_changes: Dict[str, Dict[str, str]] = {}
+    while True:
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        except OSError as exc:
+            logger.warning("[Config] No se puede leer %s: %r", path, exc)
+            mtime = None
+
+        if mtime is not None and mtime != last_mtime:
+            last_mtime = mtime
+            try:
+                all_changes = read_overrides_file(path)
+            except OSError as exc:
+                logger.warning("[Config] No se puede leer %s: %r", path, exc)
+                all_changes = {}
+
+            for e in engines:
+                changes = scope_overrides(all_changes, e.name)
+                try:
+                    # guardar sin cambios reales no crea una versión nueva
+                    if changes and changes != last_changes.get(e.name):
+                        config = apply_overrides(e.config, changes)
+                        e.apply_config(
+                            config,
+                            apply_to_open=(
+                                e.config.config_apply_to_open
+                                if apply_to_open is None
+                                else apply_to_open
+                            ),
+                        )
+                        logger.info("[Config] Recargado %s [%s]: %s", path, e.name, changes)
+                    last_changes[e.name] = changes
+                except ValueError as exc:
+                    logger.warning(
+                        "[Config] Cambios en %s para %s rechazados: %s", path, e.name, exc
+                    )
+
+        await asyncio.sleep(interval_sec)
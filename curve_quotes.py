@@ -0,0 +1,145 @@
+# curve_quotes.py
+"""
+Tablas de cotización en bloque para la bonding curve de Pump.fun.
+
+`get_token_amount` / `get_sol_amount` cotizan un tamaño cada vez. Aquí, dado
+un BondingCurveLayout, se cotiza un vector entero de tamaños en una pasada:
+
+  - tokens / lamports de salida (mismo redondeo que las funciones escalares)
+  - price impact en bps respecto al precio spot de la curva
+  - curva de slippage: salida mínima para un SLIPPAGE_BPS dado
+
+Todo en enteros exactos (columnas array('Q') / array('q'), 64 bits), sin
+floats: el resultado es idéntico, tamaño a tamaño, al de la versión escalar.
+Con `max_size_for_impact` una estrategia elige el tamaño de entrada por
+impacto con una sola llamada.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, List
+
+if TYPE_CHECKING:
+    from pumpfun_executor import BondingCurveLayout
+
+BPS = 10_000
+# Igual que PUMP_SELL_FEE_BPS en pumpfun_executor (1% sobre el SOL de salida)
+DEFAULT_SELL_FEE_BPS = 100
+
+
+@dataclass
+class QuoteTable:
+    """
+    Una fila por tamaño (orden creciente):
+      sizes:        entrada (lamports en BUY, unidades base de token en SELL)
+      amounts_out:  salida (unidades base de token en BUY, lamports netos en SELL)
+      impact_bps:   cuánto peor que el precio spot sale la operación (>= 0)
+    """
+
+    side: str
+    sizes: array
+    amounts_out: array
+    impact_bps: array
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def min_out(self, slippage_bps: int) -> array:
+        """Curva de slippage: salida mínima aceptable para cada tamaño."""
+        keep = BPS - max(0, min(BPS, int(slippage_bps)))
+        return array("Q", [out * keep // BPS for out in self.amounts_out])
+
+    def max_size_for_impact(self, max_impact_bps: int) -> int:
+        """
+        Mayor tamaño de la tabla con impacto <= max_impact_bps (0 si ninguno).
+        El impacto crece con el tamaño salvo ruido de redondeo en tamaños
+        minúsculos, así que se recorre entera en vez de bisecar.
+        """
+        limit = int(max_impact_bps)
+        best = 0
+        for size, impact in zip(self.sizes, self.impact_bps):
+            if impact <= limit:
+                best = size
+        return best
+
+    def rows(self) -> List[tuple]:
+        return list(zip(self.sizes, self.amounts_out, self.impact_bps))
+
+
+def _sorted_sizes(sizes: Iterable[int]) -> array:
+    if isinstance(sizes, array) and sizes.typecode == "Q":
+        # ya son enteros >= 0; timsort sobre datos ordenados es ~O(n)
+        return array("Q", sorted(sizes))
+    return array("Q", sorted(max(0, int(s)) for s in sizes))
+
+
+def buy_quote_table(layout: "BondingCurveLayout", lamports_sizes: Iterable[int]) -> QuoteTable:
+    """
+    Tokens de salida por cada tamaño de compra en lamports.
+    Equivale a get_token_amount(vs, vt, rt, x) para cada x.
+    """
+    vs = int(layout.virtual_sol_reserves)
+    vt = int(layout.virtual_token_reserves)
+    rt = int(layout.real_token_reserves)
+    sizes = _sorted_sizes(lamports_sizes)
+
+    if vt == 0:
+        zeros = array("Q", bytes(8 * len(sizes)))
+        return QuoteTable("buy", sizes, zeros, array("q", bytes(8 * len(sizes))))
+
+    # vt - (k // (vs + x) + 1), acotado a [0, rt] con comparaciones en línea
+    k = vs * vt
+    vt_1 = vt - 1
+    raw = [vt_1 - k // (vs + x) if vs + x > 0 else 0 for x in sizes]
+    outs = array("Q", [rt if v > rt else (v if v > 0 else 0) for v in raw])
+
+    # tokens a precio spot = x * vt / vs; impacto = 1 - out / spot
+    if vs > 0:
+        vs_bps = vs * BPS
+        impact = array("q", [
+            BPS - out * vs_bps // (x * vt) if x else 0
+            for x, out in zip(sizes, outs)
+        ])
+    else:
+        impact = array("q", bytes(8 * len(sizes)))
+    return QuoteTable("buy", sizes, outs, impact)
+
+
+def sell_quote_table(
+    layout: "BondingCurveLayout",
+    token_sizes: Iterable[int],
+    fee_bps: int = DEFAULT_SELL_FEE_BPS,
+) -> QuoteTable:
+    """
+    Lamports netos (tras el fee del programa) por cada tamaño de venta.
+    Equivale a get_sol_amount(vs, vt, x, fee_bps) para cada x. El impacto
+    se mide sobre el SOL bruto, sin el fee.
+    """
+    vs = int(layout.virtual_sol_reserves)
+    vt = int(layout.virtual_token_reserves)
+    fee = int(fee_bps)
+    sizes = _sorted_sizes(token_sizes)
+
+    if vs <= 0 or vt <= 0:
+        zeros = array("Q", bytes(8 * len(sizes)))
+        return QuoteTable("sell", sizes, zeros, array("q", bytes(8 * len(sizes))))
+
+    gross = [x * vs // (vt + x) for x in sizes]
+    outs = array("Q", [g - g * fee // BPS for g in gross])
+    # SOL a precio spot = x * vs / vt; impacto = 1 - bruto / spot
+    vt_bps = vt * BPS
+    impact = array("q", [
+        BPS - g * vt_bps // (x * vs) if x else 0
+        for x, g in zip(sizes, gross)
+    ])
+    return QuoteTable("sell", sizes, outs, impact)
+
+
+def size_grid(min_size: int, max_size: int, steps: int) -> array:
+    """`steps` tamaños enteros equiespaciados entre min_size y max_size."""
+    if steps <= 1:
+        return array("Q", [int(max_size)])
+    span = int(max_size) - int(min_size)
+    return array("Q", [int(min_size) + span * i // (steps - 1) for i in range(steps)])
@@ -0,0 +1,221 @@
+# executor_runtime.py
+"""
+Runtime asyncio dedicado para los executors.
+
+TradingEngine es síncrono (lo llaman el thread de Flintr y el monitor de
+precios), pero PumpFunExecutor es async. En vez de crear un event loop por
+llamada, ExecutorRuntime mantiene UN loop de larga vida en su propio thread;
+ahí viven el AsyncClient (pool de conexiones persistente), el prefetcher de
+blockhash, el estimador de fees y el sender.
+
+- `submit(coro)` → concurrent.futures.Future (no bloquea)
+- `run(coro)`    → espera el resultado (bloquea al caller, no al loop)
+
+Cada envío tiene timeout (se cancela dentro del loop) y hay un límite de
+operaciones en vuelo: si está saturado se rechaza en vez de encolar compras
+que llegarían tarde.
+
+Los callbacks hacia código síncrono (p.ej. engine.handle_tx_result, que toma
+el lock del engine) se ejecutan con `call_sync()` en un thread aparte: el
+loop nunca se bloquea esperando un lock que tiene un thread que a su vez
+espera al loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RuntimeSaturated(RuntimeError):
+    """Se alcanzó el máximo de operaciones en vuelo."""
+
+
+def _log_callback_error(future: "concurrent.futures.Future[Any]") -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("[Runtime] Error en callback: %r", exc)
+
+
+class ExecutorRuntime:
+    def __init__(
+        self,
+        *,
+        name: str = "executor-loop",
+        max_in_flight: int = 16,
+        default_timeout_sec: float = 10.0,
+    ) -> None:
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.default_timeout_sec = default_timeout_sec
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._callbacks: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+        # estadísticas
+        self.submitted: int = 0
+        self.rejected: int = 0
+        self.timeouts: int = 0
+        self.errors: int = 0
+
+    # ------------- ciclo de vida -------------
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._callbacks = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"{self.name}-cb"
+        )
+        self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+            self._loop = None
+
+    def stop(
+        self,
+        shutdown: Optional[Callable[[], Awaitable[Any]]] = None,
+        timeout_sec: float = 5.0,
+    ) -> None:
+        """
+        Para el loop. Si se pasa `shutdown` (p.ej. executor.close) se ejecuta
+        antes dentro del loop para cerrar clientes y tasks limpiamente.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+
+        if shutdown is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout_sec)
+            except Exception as exc:
+                logger.warning("[Runtime] Error en shutdown: %r", exc)
+
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout_sec)
+            self._thread = None
+        if self._callbacks is not None:
+            self._callbacks.shutdown(wait=False)
+            self._callbacks = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            raise RuntimeError("ExecutorRuntime no iniciado (llama a start()).")
+        return self._loop
+
+    # ------------- envíos -------------
+
+    def submit(
+        self,
+        coro: Coroutine[Any, Any, T],
+        *,
+        timeout_sec: Optional[float] = None,
+    ) -> "concurrent.futures.Future[T]":
+        """Programa `coro` en el loop y devuelve un Future thread-safe."""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.rejected += 1
+                coro.close()
+                raise RuntimeSaturated(
+                    f"{self._in_flight} operaciones en vuelo (máx {self.max_in_flight})"
+                )
+            self._in_flight += 1
+            self.submitted += 1
+
+        timeout = self.default_timeout_sec if timeout_sec is None else timeout_sec
+        try:
+            future = asyncio.run_coroutine_threadsafe(
+                self._guarded(coro, timeout), self.loop
+            )
+        except Exception:
+            coro.close()
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        return future
+
+    def run(
+        self,
+        coro: Coroutine[Any, Any, T],
+        *,
+        timeout_sec: Optional[float] = None,
+    ) -> T:
+        """
+        Como submit(), pero espera el resultado (con el mismo timeout;
+        0 = sin límite, igual que en _guarded).
+        """
+        timeout = self.default_timeout_sec if timeout_sec is None else timeout_sec
+        future = self.submit(coro, timeout_sec=timeout)
+        if not timeout or timeout <= 0:
+            return future.result()
+        # margen para que el timeout interno cancele y propague primero
+        return future.result(timeout + 1.0)
+
+    async def _guarded(self, coro: Coroutine[Any, Any, T], timeout: float) -> T:
+        try:
+            if timeout and timeout > 0:
+                return await asyncio.wait_for(coro, timeout)
+            return await coro
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def call_sync(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Ejecuta `fn(*args)` fuera del loop (callbacks hacia el engine)."""
+        pool = self._callbacks
+        if pool is None:
+            fn(*args)
+            return
+        future = pool.submit(fn, *args)
+        future.add_done_callback(_log_callback_error)
+
+    def get_stats_snapshot(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "in_flight": in_flight,
+            "max_in_flight": self.max_in_flight,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
@@ -0,0 +1,165 @@
+# fee_estimator.py
+"""
+Estimador de priority fee (micro-lamports por CU) en background.
+
+Un task asyncio muestrea `getRecentPrioritizationFees` para las cuentas del
+programa de Pump.fun, mantiene una ventana de los últimos slots y
+precalcula percentiles. Los builders de TX llaman a `fee_for(urgency)`, que
+sólo lee un dict en memoria: ningún RPC en el camino crítico.
+
+Urgencias:
+  - "buy":  entradas normales
+  - "sell": salidas normales (graduation, etc.)
+  - "stop": stop loss / trailing stop (percentil más alto)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Percentiles que se precalculan en cada refresco
+TRACKED_PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+
+def percentile(sorted_values: Sequence[int], pct: float) -> int:
+    """Percentil nearest-rank sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0
+    pct = max(0.0, min(100.0, pct))
+    rank = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return int(sorted_values[rank])
+
+
+class PriorityFeeEstimator:
+    def __init__(
+        self,
+        rpc_url: str,
+        accounts: Sequence[str],
+        *,
+        urgency_percentiles: Optional[Dict[str, float]] = None,
+        refresh_interval_sec: float = 2.0,
+        window_slots: int = 300,
+        min_fee: int = 0,
+        max_fee: int = 5_000_000,
+        default_fee: int = 0,
+    ) -> None:
+        self.rpc_url = rpc_url
+        self.accounts = list(accounts)
+        self.urgency_percentiles = dict(
+            urgency_percentiles or {"buy": 75.0, "sell": 75.0, "stop": 90.0}
+        )
+        self.refresh_interval_sec = refresh_interval_sec
+        self.window_slots = max(1, window_slots)
+        self.min_fee = min_fee
+        self.max_fee = max_fee
+        self.default_fee = default_fee
+
+        # slot -> prioritizationFee (ventana acotada, ordenada por slot)
+        self._samples: "OrderedDict[int, int]" = OrderedDict()
+        # urgency -> fee precalculado (lo único que lee el hot path)
+        self._fees: Dict[str, int] = {}
+        self._percentiles: Dict[int, int] = {}
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refresh_errors: int = 0
+
+    # ------------- background -------------
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _refresh_loop(self) -> None:
+        logger.info("[Fees] Estimador iniciado (cada %.1fs)", self.refresh_interval_sec)
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.refresh_errors += 1
+                logger.debug("[Fees] Error refrescando: %r", exc)
+            await asyncio.sleep(self.refresh_interval_sec)
+
+    async def refresh(self) -> None:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=5.0)
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getRecentPrioritizationFees",
+            "params": [self.accounts],
+        }
+        resp = await self._http.post(self.rpc_url, json=payload)
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("error"):
+            raise RuntimeError(f"getRecentPrioritizationFees error: {body['error']}")
+        self.add_samples(body.get("result") or [])
+
+    # ------------- muestras / percentiles -------------
+
+    def add_samples(self, samples: List[Dict[str, Any]]) -> None:
+        for item in samples:
+            try:
+                slot = int(item["slot"])
+                fee = int(item["prioritizationFee"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._samples[slot] = fee
+            self._samples.move_to_end(slot)
+
+        # Mantener sólo los últimos window_slots (por número de slot)
+        if len(self._samples) > self.window_slots:
+            for slot in sorted(self._samples)[: len(self._samples) - self.window_slots]:
+                del self._samples[slot]
+
+        self._recompute()
+
+    def _recompute(self) -> None:
+        values = sorted(self._samples.values())
+        self._percentiles = {p: percentile(values, p) for p in TRACKED_PERCENTILES}
+        fees: Dict[str, int] = {}
+        for urgency, pct in self.urgency_percentiles.items():
+            fee = percentile(values, pct) if values else self.default_fee
+            fees[urgency] = max(self.min_fee, min(self.max_fee, fee))
+        # Swap atómico del dict: el hot path nunca ve un estado a medias
+        self._fees = fees
+
+    # ------------- hot path -------------
+
+    def fee_for(self, urgency: str = "buy") -> int:
+        """Micro-lamports por CU para la urgencia pedida (sin RPC)."""
+        fee = self._fees.get(urgency)
+        if fee is None:
+            return max(self.min_fee, min(self.max_fee, self.default_fee))
+        return fee
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self._samples),
+            "percentiles": dict(self._percentiles),
+            "fees": dict(self._fees),
+            "refresh_errors": self.refresh_errors,
+        }
@@ -1,23 +1,33 @@
 # flintr_client.py
 import json
 import time
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from websocket import WebSocketApp
 
 FlintrCallback = Callable[[Dict[str, Any]], None]
 
+# Plataforma comodín: el handler recibe eventos de cualquier plataforma.
+ANY_PLATFORM = "*"
+
+# Iconos para los logs por tipo de evento
+_EVENT_ICONS = {"mint": "🟢", "graduation": "🎓"}
+
 
 class FlintrClient:
     """
     Cliente WebSocket para Flintr.
+
+    Los eventos token se enrutan con una tabla de dispatch indexada por
+    (platform, type): una sola conexión y un solo json.loads por frame
+    pueden alimentar varios handlers/estrategias y varias plataformas.
     """
 
     def __init__(
         self,
         api_key: str,
         *,
-        platform_filter: str = "pump.fun",
+        platform_filter: Union[str, Iterable[str], None] = "pump.fun",
         on_mint: Optional[FlintrCallback] = None,
         on_graduation: Optional[FlintrCallback] = None,
         debug: bool = True,
@@ -36,8 +46,54 @@ class FlintrClient:
         self.debug = debug
         self.reconnect_delay = reconnect_delay
 
+        # (platform, type) -> handlers
+        self._handlers: Dict[Tuple[str, str], List[FlintrCallback]] = {}
+
+        # platform_filter vacío/None → todas las plataformas (como antes)
+        if not platform_filter:
+            platforms: List[str] = [ANY_PLATFORM]
+        elif isinstance(platform_filter, str):
+            platforms = [platform_filter]
+        else:
+            platforms = list(platform_filter)
+
+        for platform in platforms:
+            if on_mint is not None:
+                self.register(platform, "mint", on_mint)
+            if on_graduation is not None:
+                self.register(platform, "graduation", on_graduation)
+
     # ----------------- API pública -----------------
 
+    def register(
+        self,
+        platform: str,
+        event_type: str,
+        callback: FlintrCallback,
+    ) -> None:
+        """
+        Registra `callback` para eventos token (platform, event_type).
+        Usa ANY_PLATFORM ("*") para recibir el tipo de cualquier plataforma.
+        """
+        self._handlers.setdefault((platform, event_type), []).append(callback)
+
+    def unregister(
+        self,
+        platform: str,
+        event_type: str,
+        callback: FlintrCallback,
+    ) -> None:
+        key = (platform, event_type)
+        handlers = self._handlers.get(key)
+        if not handlers:
+            return
+        try:
+            handlers.remove(callback)
+        except ValueError:
+            return
+        if not handlers:
+            del self._handlers[key]
+
     def run_forever(self) -> None:
         """Loop infinito con reconexión automática."""
         while True:
@@ -103,50 +159,56 @@ class FlintrClient:
 
     def _handle_token_event(self, data: Dict[str, Any]) -> None:
         event = data.get("event") or {}
-        platform = event.get("platform")
-        event_type = event.get("type")
+        platform = event.get("platform") or ""
+        event_type = event.get("type") or ""
 
-        if self.platform_filter and platform != self.platform_filter:
-            return
+        # Lookup O(1): handlers exactos + comodín de plataforma
+        handlers = self._handlers.get((platform, event_type))
+        wildcard = self._handlers.get((ANY_PLATFORM, event_type))
 
-        if event_type == "mint":
-            self._handle_mint(data)
-        elif event_type == "graduation":
-            self._handle_graduation(data)
-        else:
+        if not handlers and not wildcard:
             if self.debug:
                 self._log("[Flintr] Token event ignorado:", platform, event_type)
+            return
 
-    def _handle_mint(self, data: Dict[str, Any]) -> None:
-        mint = data.get("data", {}).get("mint")
-        meta = data.get("data", {}).get("metaData") or {}
-        symbol = meta.get("symbol") or ""
-        name = meta.get("name") or ""
+        if self.debug:
+            self._log_token_event(data, platform, event_type)
 
-        self._log(f"🟢 [Flintr] MINT pump.fun → {symbol} ({name}) mint={mint}")
+        if handlers:
+            self._dispatch(handlers, data, event_type)
+        if wildcard:
+            self._dispatch(wildcard, data, event_type)
 
-        if self.on_mint:
+    def _dispatch(
+        self,
+        handlers: List[FlintrCallback],
+        data: Dict[str, Any],
+        event_type: str,
+    ) -> None:
+        # Copia: un handler puede (des)registrar otros durante el dispatch
+        for handler in tuple(handlers):
             try:
-                self.on_mint(data)
+                handler(data)
             except Exception as exc:
-                self._warn("[Flintr] Error en on_mint:", repr(exc))
+                self._warn(f"[Flintr] Error en handler {event_type}:", repr(exc))
 
-    def _handle_graduation(self, data: Dict[str, Any]) -> None:
+    def _log_token_event(
+        self,
+        data: Dict[str, Any],
+        platform: str,
+        event_type: str,
+    ) -> None:
         mint = data.get("data", {}).get("mint")
         meta = data.get("data", {}).get("metaData") or {}
         symbol = meta.get("symbol") or ""
         name = meta.get("name") or ""
+        icon = _EVENT_ICONS.get(event_type, "•")
 
         self._log(
-            f"🎓 [Flintr] GRADUATION pump.fun → {symbol} ({name}) mint={mint}"
+            f"{icon} [Flintr] {event_type.upper()} {platform} → "
+            f"{symbol} ({name}) mint={mint}"
         )
 
-        if self.on_graduation:
-            try:
-                self.on_graduation(data)
-            except Exception as exc:
-                self._warn("[Flintr] Error en on_graduation:", repr(exc))
-
     # ----------------- Logs -----------------
 
     def _log(self, *args: Any) -> None:
@@ -1,95 +1,413 @@
 # jupiter_executor.py
+import asyncio
+import base64
+import json
+import logging
 import os
-from typing import Any, Dict
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-from jup_python_sdk.clients.ultra_api_client import UltraApiClient
+import base58
+import httpx
+from jup_python_sdk.models.ultra_api.ultra_execute_request_model import UltraExecuteRequest
 from jup_python_sdk.models.ultra_api.ultra_order_request_model import UltraOrderRequest
+from solders.keypair import Keypair
+from solders.message import to_bytes_versioned
+from solders.transaction import VersionedTransaction
 
 from config import BotConfig
+from executor_runtime import ExecutorRuntime
+
+logger = logging.getLogger(__name__)
 
 # Mint de WSOL en Solana mainnet (target de salida)
 WSOL_MINT = "So11111111111111111111111111111111111111112"
 
+# Órdenes de salida precalentadas que se piden a la vez en cada refresco
+_QUOTE_REFRESH_CONCURRENCY = 8
+
+
+@dataclass
+class ExitTarget:
+    """Posición abierta cuya salida mantenemos cotizada."""
+
+    mint: str
+    amount: int  # unidades base del token
+
+
+@dataclass
+class PrewarmedOrder:
+    """Orden Ultra ya construida (sin firmar) para vender `amount` de `mint`."""
+
+    mint: str
+    amount: int
+    request_id: str
+    transaction: VersionedTransaction
+    out_amount: int
+    fetched_at: float
+
+
+def _to_base_units(amount_tokens: float, decimals: int) -> int:
+    # Normalizar decimales a un rango razonable
+    try:
+        d = int(decimals)
+    except Exception:
+        d = 6
+    d = max(0, min(12, d))
+    # Pasar a unidades enteras (ej. 1.23 * 10**6 = 1_230_000)
+    return int(amount_tokens * (10 ** d))
+
+
+def _load_keypair(raw: str) -> Keypair:
+    """WALLET_PRIVATE_KEY en base58 (estilo Phantom) o como array uint8 JSON."""
+    raw = raw.strip()
+    if raw.startswith("[") and raw.endswith("]"):
+        return Keypair.from_bytes(bytes(json.loads(raw)))
+    return Keypair.from_bytes(base58.b58decode(raw))
+
 
 class JupiterExecutor:
     """
-    Executor de ventas usando Jupiter Ultra API (jup-python-sdk).
+    Executor de ventas usando Jupiter Ultra API.
 
     - Usa tu WALLET_PRIVATE_KEY (base58 estilo Phantom).
     - Opcionalmente usa JUPITER_API_KEY si existe.
-    - Vende un token cualquiera contra SOL (WSOL) con order_and_execute.
+    - Vende un token cualquiera contra SOL (WSOL) con order + execute.
+
+    Todo el HTTP es async (httpx.AsyncClient con pool persistente) y corre en
+    un ExecutorRuntime propio. Para cada posición abierta registrada con
+    `track_exit`, un task en background mantiene una orden Ultra del tamaño
+    exacto ya construida: al salir sólo queda firmar (local) y hacer el
+    POST de execute, un único round trip en vez de order + execute.
     """
 
-    def __init__(self, config: BotConfig) -> None:
+    def __init__(self, config: BotConfig, runtime: Optional[ExecutorRuntime] = None) -> None:
         self.config = config
 
         api_key = os.getenv("JUPITER_API_KEY")
-        kwargs: Dict[str, Any] = {
-            # Le decimos al SDK que la private key está en esta env var
-            "private_key_env_var": "WALLET_PRIVATE_KEY",
-        }
+        # JUPITER_API_URL (mismo host que el feed de precios); con API key el
+        # host lite pasa a ser el de pago
+        self.base_url = config.jupiter_api_url.rstrip("/")
         if api_key:
-            kwargs["api_key"] = api_key
-
-        # Ultra API client: no necesitas RPC explícito, lo hace la API por dentro
-        self.client = UltraApiClient(**kwargs)
+            self.base_url = self.base_url.replace("://lite-api.jup.ag", "://api.jup.ag")
+        self._headers: Dict[str, str] = {"Accept": "application/json"}
+        if api_key:
+            self._headers["x-api-key"] = api_key
 
         # Guardamos slippage en bps por si luego queremos usarlo
         self.slippage_bps = config.slippage_bps
 
-    def sell_to_sol(self, mint: str, amount_tokens: float, decimals: int) -> Dict[str, Any]:
+        self._runtime = runtime or ExecutorRuntime(
+            name="jupiter-executor",
+            max_in_flight=config.executor_max_in_flight,
+            default_timeout_sec=config.executor_timeout_sec,
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self._keypair: Optional[Keypair] = None
+
+        # mint -> salida a mantener cotizada / orden precalentada
+        self._targets: Dict[str, ExitTarget] = {}
+        self._orders: Dict[str, PrewarmedOrder] = {}
+        self._warm_task: Optional[asyncio.Task] = None
+        self.quote_refresh_sec = config.jupiter_quote_refresh_sec
+        self.quote_max_age_sec = config.jupiter_quote_max_age_sec
+
+        # ventas en lote (sell_many)
+        self.sell_concurrency = max(1, config.jupiter_sell_concurrency)
+        self.sell_timeout_sec = config.jupiter_sell_timeout_sec
+        self.sell_retries = max(0, config.jupiter_sell_retries)
+
+        # estadísticas
+        self.prewarmed_hits: int = 0
+        self.prewarmed_misses: int = 0
+        self.refresh_errors: int = 0
+        self.last_exit_ms: Optional[float] = None
+
+    # ------------- helpers -------------
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=_QUOTE_REFRESH_CONCURRENCY),
+            )
+        return self._http
+
+    def _get_keypair(self) -> Keypair:
+        if self._keypair is None:
+            if not self.config.wallet_private_key:
+                raise RuntimeError("WALLET_PRIVATE_KEY requerido para JupiterExecutor.")
+            self._keypair = _load_keypair(self.config.wallet_private_key)
+        return self._keypair
+
+    def _sign(self, tx: VersionedTransaction) -> VersionedTransaction:
+        wallet = self._get_keypair()
+        index = list(tx.message.account_keys).index(wallet.pubkey())
+        signatures = list(tx.signatures)
+        # se firma el mensaje con su prefijo de versión (v0), no bytes(message)
+        signatures[index] = wallet.sign_message(to_bytes_versioned(tx.message))
+        return VersionedTransaction.populate(tx.message, signatures)
+
+    def _ensure_runtime(self) -> ExecutorRuntime:
+        if not self._runtime.running:
+            self._runtime.start()
+        return self._runtime
+
+    # ------------- Ultra API (async) -------------
+
+    async def order(self, mint: str, amount: int) -> PrewarmedOrder:
+        """GET /ultra/v1/order para vender `amount` (unidades base) de `mint`."""
+        request = UltraOrderRequest(
+            input_mint=mint,
+            output_mint=WSOL_MINT,
+            amount=amount,
+            taker=str(self._get_keypair().pubkey()),
+        )
+        resp = await self._get_http().get("/ultra/v1/order", params=request.to_dict())
+        resp.raise_for_status()
+        body = resp.json()
+        if not body.get("transaction"):
+            raise RuntimeError(f"Ultra order sin transaction: {body.get('errorMessage') or body}")
+        return PrewarmedOrder(
+            mint=mint,
+            amount=amount,
+            request_id=body["requestId"],
+            transaction=VersionedTransaction.from_bytes(base64.b64decode(body["transaction"])),
+            out_amount=int(body.get("outAmount") or 0),
+            fetched_at=time.monotonic(),
+        )
+
+    async def execute(self, order: PrewarmedOrder) -> Dict[str, Any]:
+        """Firma la orden y hace POST /ultra/v1/execute."""
+        signed = self._sign(order.transaction)
+        request = UltraExecuteRequest(
+            request_id=order.request_id,
+            signed_transaction=base64.b64encode(bytes(signed)).decode("ascii"),
+        )
+        resp = await self._get_http().post("/ultra/v1/execute", json=request.to_dict())
+        resp.raise_for_status()
+        return resp.json()
+
+    def _take_prewarmed(self, mint: str, amount: int) -> Optional[PrewarmedOrder]:
+        order = self._orders.pop(mint, None)
+        if order is None or order.amount != amount:
+            return None
+        if time.monotonic() - order.fetched_at > self.quote_max_age_sec:
+            return None
+        return order
+
+    async def sell_to_sol_async(
+        self,
+        mint: str,
+        amount_tokens: float,
+        decimals: int,
+    ) -> Dict[str, Any]:
         """
-        Vende `amount_tokens` del token `mint` contra SOL usando Jupiter Ultra.
+        Vende `amount_tokens` (unidades decimales) de `mint` contra SOL.
+        Con orden precalentada del mismo tamaño: firmar + execute. Si no hay,
+        está vieja o el execute falla: order + execute.
 
-        - mint: address del token (string base58).
-        - amount_tokens: cantidad de tokens en unidades decimales (ej. 1234.56).
-        - decimals: decimales del token (ej. 6 en la mayoría de memecoins).
+        La salida sigue registrada (y precalentándose) hasta que el engine
+        cierra la posición: si la venta falla, el reintento vuelve a tener
+        una orden lista.
         """
         if amount_tokens <= 0:
             raise ValueError("amount_tokens debe ser > 0")
-
-        # Normalizar decimales a un rango razonable
-        try:
-            d = int(decimals)
-        except Exception:
-            d = 6
-        if d < 0:
-            d = 0
-        if d > 12:
-            d = 12
-
-        # Pasar a unidades enteras (ej. 1.23 * 10**6 = 1_230_000)
-        amount = int(amount_tokens * (10 ** d))
+        amount = _to_base_units(amount_tokens, decimals)
         if amount <= 0:
             raise ValueError("amount calculado es 0; revisa amount_tokens/decimals")
 
-        taker = self.client._get_public_key()
+        started = time.monotonic()
+        order = self._take_prewarmed(mint, amount)
+        if order is not None:
+            self.prewarmed_hits += 1
+            try:
+                result = await self.execute(order)
+                self.last_exit_ms = (time.monotonic() - started) * 1000.0
+                return result
+            except Exception as exc:
+                logger.warning("[Jupiter] Orden precalentada falló (%r); pidiendo una nueva.", exc)
+        else:
+            self.prewarmed_misses += 1
 
-        order_request = UltraOrderRequest(
-            input_mint=mint,
-            output_mint=WSOL_MINT,
-            amount=amount,
-            taker=taker,
-            # Más adelante podemos añadir slippage, dex preferidos, etc.,
-            # conforme el modelo de UltraOrderRequest exponga más campos.
+        result = await self.execute(await self.order(mint, amount))
+        self.last_exit_ms = (time.monotonic() - started) * 1000.0
+        return result
+
+    # ------------- ventas en lote -------------
+
+    async def sell_many_async(
+        self,
+        orders: Iterable[Tuple[str, float, int]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Vende varias posiciones a la vez: (mint, amount_tokens, decimals).
+        Hasta JUPITER_SELL_CONCURRENCY en paralelo, cada intento con timeout
+        JUPITER_SELL_TIMEOUT_SEC y hasta JUPITER_SELL_RETRIES reintentos.
+
+        Devuelve mint -> {"ok", "response", "error", "attempts", "latency_ms"}.
+        """
+        # un mint repetido se vende una sola vez (gana el último)
+        unique = {mint: (amount, decimals) for mint, amount, decimals in orders}
+        semaphore = asyncio.Semaphore(self.sell_concurrency)
+
+        async def sell_one(mint: str, amount_tokens: float, decimals: int) -> Dict[str, Any]:
+            started = time.monotonic()
+            error: Optional[str] = None
+            attempts = 0
+            async with semaphore:
+                while attempts <= self.sell_retries:
+                    attempts += 1
+                    try:
+                        response = await asyncio.wait_for(
+                            self.sell_to_sol_async(mint, amount_tokens, decimals),
+                            self.sell_timeout_sec,
+                        )
+                    except asyncio.TimeoutError:
+                        error = f"timeout ({self.sell_timeout_sec}s)"
+                        continue
+                    except ValueError as exc:
+                        # amount inválido: reintentar no ayuda
+                        error = repr(exc)
+                        break
+                    except Exception as exc:
+                        error = repr(exc)
+                        continue
+
+                    if response.get("status") == "Success":
+                        return {
+                            "ok": True,
+                            "response": response,
+                            "error": None,
+                            "attempts": attempts,
+                            "latency_ms": (time.monotonic() - started) * 1000.0,
+                        }
+                    error = f"status={response.get('status')}: {response.get('error')}"
+
+            logger.warning("[Jupiter] sell_many %s falló tras %d intentos: %s", mint, attempts, error)
+            return {
+                "ok": False,
+                "response": None,
+                "error": error,
+                "attempts": attempts,
+                "latency_ms": (time.monotonic() - started) * 1000.0,
+            }
+
+        mints = list(unique)
+        results = await asyncio.gather(
+            *(sell_one(mint, *unique[mint]) for mint in mints)
+        )
+        return dict(zip(mints, results))
+
+    def sell_many(self, orders: Iterable[Tuple[str, float, int]]) -> Dict[str, Dict[str, Any]]:
+        """Versión síncrona de sell_many_async (una sola espera para todo el lote)."""
+        orders = list(orders)
+        if not orders:
+            return {}
+        # peor caso: todas las tandas agotan sus intentos
+        waves = -(-len(orders) // self.sell_concurrency)
+        timeout = waves * (self.sell_retries + 1) * self.sell_timeout_sec + 1.0
+        return self._ensure_runtime().run(self.sell_many_async(orders), timeout_sec=timeout)
+
+    # ------------- órdenes precalentadas -------------
+
+    def track_exit(self, mint: str, amount_tokens: float, decimals: int = 6) -> None:
+        """Mantener cotizada la salida de una posición abierta (thread-safe)."""
+        amount = _to_base_units(amount_tokens, decimals)
+        if amount <= 0:
+            return
+        self._targets[mint] = ExitTarget(mint=mint, amount=amount)
+        runtime = self._ensure_runtime()
+        runtime.loop.call_soon_threadsafe(self._ensure_warm_loop)
+
+    def untrack_exit(self, mint: str) -> None:
+        self._targets.pop(mint, None)
+        self._orders.pop(mint, None)
+
+    def _ensure_warm_loop(self) -> None:
+        if self._warm_task is None or self._warm_task.done():
+            self._warm_task = asyncio.get_running_loop().create_task(self._warm_loop())
+
+    async def _warm_loop(self) -> None:
+        logger.info("[Jupiter] Precalentando órdenes de salida (cada %.1fs)", self.quote_refresh_sec)
+        while self._targets:
+            try:
+                await self.refresh_orders()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.debug("[Jupiter] Error refrescando órdenes: %r", exc)
+            await asyncio.sleep(self.quote_refresh_sec)
+
+    async def refresh_orders(self) -> None:
+        """Pide en paralelo una orden nueva por cada salida registrada."""
+        targets = list(self._targets.values())
+        semaphore = asyncio.Semaphore(_QUOTE_REFRESH_CONCURRENCY)
+
+        async def refresh_one(target: ExitTarget) -> None:
+            async with semaphore:
+                try:
+                    order = await self.order(target.mint, target.amount)
+                except Exception as exc:
+                    self.refresh_errors += 1
+                    logger.debug("[Jupiter] Orden de %s falló: %r", target.mint, exc)
+                    return
+            # sólo si la posición sigue abierta con el mismo tamaño
+            current = self._targets.get(target.mint)
+            if current is not None and current.amount == order.amount:
+                self._orders[target.mint] = order
+
+        await asyncio.gather(*(refresh_one(t) for t in targets))
+
+        # descartar órdenes de salidas ya no registradas
+        for mint in [m for m in self._orders if m not in self._targets]:
+            self._orders.pop(mint, None)
+
+    # ------------- API síncrona (TradingEngine) -------------
+
+    def sell_to_sol(self, mint: str, amount_tokens: float, decimals: int) -> Dict[str, Any]:
+        """
+        Vende `amount_tokens` del token `mint` contra SOL usando Jupiter Ultra.
+
+        - mint: address del token (string base58).
+        - amount_tokens: cantidad de tokens en unidades decimales (ej. 1234.56).
+        - decimals: decimales del token (ej. 6 en la mayoría de memecoins).
+
+        El response suele traer "status" ("Success" / "Failed"), "signature"
+        y campos extra según versión de Ultra API.
+        """
+        return self._ensure_runtime().run(
+            self.sell_to_sol_async(mint, amount_tokens, decimals)
         )
 
-        # Esto ya:
-        #  - busca la mejor ruta
-        #  - construye la tx
-        #  - la firma con tu WALLET_PRIVATE_KEY
-        #  - la ejecuta on-chain
-        resp: Dict[str, Any] = self.client.order_and_execute(order_request)
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._targets),
+            "prewarmed": len(self._orders),
+            "prewarmed_hits": self.prewarmed_hits,
+            "prewarmed_misses": self.prewarmed_misses,
+            "refresh_errors": self.refresh_errors,
+            "last_exit_ms": self.last_exit_ms,
+        }
 
-        # El response suele traer:
-        #  - "status" ("Success" / "Failed")
-        #  - "signature" (tx id)
-        #  - campos extra según versión de Ultra API
-        return resp
+    async def _aclose(self) -> None:
+        task, self._warm_task = self._warm_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
     def close(self) -> None:
-        """Cerrar conexiones HTTP internas del cliente (buena práctica al apagar el bot)."""
+        """Cerrar conexiones HTTP y el runtime (buena práctica al apagar el bot)."""
         try:
-            self.client.close()
+            self._runtime.stop(self._aclose)
         except Exception:
             pass
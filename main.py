@@ -5,14 +5,17 @@ import asyncio
 
 from dotenv import load_dotenv
 
-from config import load_config
+from config import load_config, load_strategy_configs
 from flintr_client import FlintrClient
 from trading_engine import TradingEngine
-from telegram_bot import build_application
-from price_monitor import price_monitor_loop
-from jupiter_executor import JupiterExecutor
-# Si ya tienes PumpFunExecutor para compras reales:
-# from pumpfun_executor import PumpFunExecutor
+from telegram_bot import build_application, start_notifications
+from price_monitor import price_monitor_loop, watchlist_tick_loop
+from backtester import EventRecorder, MintWatchlist, TickRecorder, recorder_paths
+from strategy_host import StrategyHost
+
+# Los executors y SDKs pesados (solana-py, solders, jup SDK) se importan
+# dentro de main() sólo si el MODE los necesita: arranque más rápido y
+# menos memoria en simulation.
 
 
 def main() -> None:
@@ -34,31 +37,94 @@ def main() -> None:
         raise RuntimeError("FLINTR_API_KEY no configurado")
 
     # -------------------------------------------------------------------------
-    # Crear TradingEngine + executors
+    # Crear TradingEngines (uno por estrategia) + executors
     # -------------------------------------------------------------------------
 
-    # Si aún no tienes PumpFunExecutor, puedes dejar executor=None
-    # pump_executor = PumpFunExecutor(config=config)
-    pump_executor = None
-
-    jupiter_executor = JupiterExecutor(config=config)
-
-    engine = TradingEngine(
-        config=config,
-        executor=pump_executor,
-        jupiter_executor=jupiter_executor,
-    )
+    # STRATEGIES=a,b → varias BotConfig (cada una con su wallet / SL / TS…)
+    # en este proceso; sin STRATEGIES, una sola estrategia "main".
+    strategy_configs = load_strategy_configs(config)
+
+    # En MODE=real las compras / SL on-chain van por PumpFunExecutor, que
+    # corre en su propio loop asyncio (ExecutorRuntime). En simulation
+    # executor=None → paper trading con el precio de Flintr.
+    pump_executors = []
+    jupiter_executors = []
+    sim_market = None
+    mint_info = None
+    engines = {}
+    for name, strategy_config in strategy_configs.items():
+        pump_executor = None
+        jupiter_executor = None
+        if strategy_config.mode == "real":
+            from jupiter_executor import JupiterExecutor
+            from mint_info import MintInfoCache
+            from pumpfun_executor import PumpFunExecutor
+
+            # executors por estrategia: cada una firma con su wallet
+            pump_executor = PumpFunExecutor(config=strategy_config)
+            pump_executor.start()
+            pump_executors.append(pump_executor)
+
+            # ventas post-graduation / cierres masivos (sólo se usa en MODE=real)
+            jupiter_executor = JupiterExecutor(config=strategy_config)
+            jupiter_executors.append(jupiter_executor)
+
+            # decimals exactos para las ventas (datos del mint: una caché para todas)
+            if mint_info is None and strategy_config.helius_rpc_url:
+                mint_info = MintInfoCache(
+                    strategy_config.helius_rpc_url,
+                    max_entries=strategy_config.mint_info_cache_size,
+                )
+        elif strategy_config.sim_market:
+            from market_sim import SimulatedPumpMarket
+
+            # SIM_MARKET: fills con slippage / fees / latencia sobre curvas
+            # locales; un único mercado compartido por todas las estrategias
+            if sim_market is None:
+                sim_market = SimulatedPumpMarket.from_config(strategy_config)
+            pump_executor = sim_market
+
+        engines[name] = TradingEngine(
+            config=strategy_config,
+            executor=pump_executor,
+            jupiter_executor=jupiter_executor,
+            mint_info=mint_info if strategy_config.mode == "real" else None,
+            name=name,
+        )
+
+    host = StrategyHost(engines)
+    engine = host.primary
+    if len(host) > 1:
+        logger.info("🧩 %d estrategias: %s", len(host), ", ".join(engines))
 
     # -------------------------------------------------------------------------
     # Flintr WebSocket en un thread aparte (mints + graduations en tiempo real)
+    # Una sola conexión: cada frame se despacha a todos los engines, cada uno
+    # en sus propios hilos (StrategyHost.attach).
     # -------------------------------------------------------------------------
     flintr = FlintrClient(
         api_key=config.flintr_api_key,
         platform_filter="pump.fun",
-        on_mint=engine.handle_flintr_mint,
-        on_graduation=engine.handle_flintr_graduation,
         debug=True,
     )
+    host.attach(flintr)
+
+    # Grabación opcional de eventos + ticks para el backtester
+    tick_recorder = None
+    tick_watchlist = None
+    if config.record_dir:
+        events_path, ticks_path = recorder_paths(config.record_dir)
+        event_recorder = EventRecorder(events_path)
+        flintr.register("*", "mint", event_recorder)
+        flintr.register("*", "graduation", event_recorder)
+        tick_recorder = TickRecorder(ticks_path)
+        # ticks también de mints no comprados / ya cerrados (ventana móvil)
+        tick_watchlist = MintWatchlist(
+            config.record_tick_window_sec,
+            config.record_tick_max_mints,
+        )
+        flintr.register("*", "mint", tick_watchlist.observe)
+        logger.info("📼 Grabando eventos/ticks en %s", config.record_dir)
 
     def flintr_thread() -> None:
         logger.info("🚀 Flintr WebSocket thread iniciado...")
@@ -73,11 +139,72 @@ def main() -> None:
 
     async def run_telegram_and_price_monitor() -> None:
         # Construimos el bot de Telegram con todos los comandos
-        app = await build_application(config, engine)
+        app = await build_application(config, engine, engines)
+
+        # Eventos de trading → chat (digest + rate limit, sin bloquear al engine)
+        if config.telegram_notify:
+            start_notifications(app, config, engine, engines)
 
-        # Lanzamos el monitor de precios como tarea en el mismo loop
+        # Un solo feed de precios para todas las estrategias (mints deduplicados)
         loop = asyncio.get_running_loop()
-        loop.create_task(price_monitor_loop(engine))
+        if sim_market is not None:
+            from market_sim import market_price_loop
+
+            loop.create_task(
+                market_price_loop(
+                    [e for e in engines.values() if e.executor is sim_market],
+                    sim_market,
+                )
+            )
+        feed_engines = [
+            e for e in engines.values()
+            if sim_market is None or e.executor is not sim_market
+        ]
+        if feed_engines:
+            loop.create_task(price_monitor_loop(feed_engines, on_tick=tick_recorder))
+        if tick_watchlist is not None:
+            loop.create_task(
+                watchlist_tick_loop(feed_engines, tick_watchlist, tick_recorder)
+            )
+
+        # Recarga en caliente de parámetros de estrategia (CONFIG_RELOAD_FILE):
+        # un watcher por fichero; en un fichero compartido cada estrategia sólo
+        # toma las claves sin prefijo y las STRATEGY_<NOMBRE>_ suyas
+        reload_groups = {}
+        for e in engines.values():
+            if e.config.config_reload_file:
+                reload_groups.setdefault(e.config.config_reload_file, []).append(e)
+        if reload_groups:
+            from config_watcher import config_reload_loop
+
+            for path, group in reload_groups.items():
+                loop.create_task(
+                    config_reload_loop(
+                        group,
+                        path,
+                        min(e.config.config_reload_sec for e in group),
+                    )
+                )
+
+        for e in engines.values():
+            strategy_config = e.config
+
+            # MODE=real: amount_tokens corregido con los balances reales de la wallet
+            if (
+                strategy_config.mode == "real"
+                and strategy_config.wallet_reconcile_sec > 0
+                and strategy_config.helius_rpc_url
+                and strategy_config.wallet_private_key
+            ):
+                from wallet_reconciler import WalletReconciler, wallet_reconcile_loop
+
+                loop.create_task(
+                    wallet_reconcile_loop(
+                        e,
+                        WalletReconciler.from_config(strategy_config),
+                        strategy_config.wallet_reconcile_sec,
+                    )
+                )
 
         logger.info("✅ Telegram bot arrancando (polling) + PriceMonitor activo...")
         await app.run_polling(drop_pending_updates=True)
@@ -87,11 +214,22 @@ def main() -> None:
     except KeyboardInterrupt:
         logger.info("⏹️  Bot detenido por el usuario (Ctrl+C).")
     finally:
-        # Cerrar el cliente de Jupiter al apagar
-        try:
-            jupiter_executor.close()
-        except Exception:
-            pass
+        # Cerrar los clientes de Jupiter y los runtimes de Pump.fun al apagar
+        for jupiter_executor in jupiter_executors:
+            try:
+                jupiter_executor.close()
+            except Exception:
+                pass
+        for pump_executor in pump_executors:
+            try:
+                pump_executor.shutdown()
+            except Exception:
+                pass
+        if mint_info is not None:
+            try:
+                mint_info.close()
+            except Exception:
+                pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,539 @@
+# market_sim.py
+"""
+Mercado Pump.fun simulado en proceso (paper trading realista).
+
+En MODE=simulation el engine llenaba al `latestPrice` de Flintr o al primer
+precio del monitor: sin slippage, sin fees, sin latencia. SimulatedPumpMarket
+mantiene una BondingCurveLayout por mint y:
+
+  - aplica nuestras compras / ventas a las reservas (mismo redondeo que
+    get_token_amount / get_sol_amount, con el fee del 1% del programa)
+  - añade flujo sintético de otros traders (Poisson, tamaños exponenciales
+    en SOL tanto para compras como para ventas: con SIM_FLOW_BUY_PROB=0.5 el
+    flujo es neutro y la tendencia sólo viene de SIM_FLOW_DRIFT_SOL_PER_SEC)
+  - las curvas nuevas arrancan con las compras del creador y los snipers
+    del primer bloque (SIM_DEV_BUY_SOL),
+    así los demás holders tienen tokens que vender desde el lanzamiento
+  - modela la latencia de envío: antes de cada fill el resto del mercado
+    opera durante SIM_LATENCY_MS, así que llenamos peor que la cotización
+
+Se usa como `executor` del TradingEngine (buy_on_mint / sell_on_curve) y
+como feed de precios. No duerme nunca: con un reloj simulado
+(backtester.SimClock) el engine corre a toda velocidad para stress tests.
+
+Uso offline:
+    python market_sim.py --mints 500 --duration 3600 --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import io
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import BotConfig, load_config
+from strategy_host import as_engine_list, open_mints
+from pumpfun_executor import (
+    INITIAL_REAL_TOKEN_RESERVES,
+    PUMP_SELL_FEE_BPS,
+    PUMP_TOKEN_DECIMALS,
+    BondingCurveLayout,
+    CurveCompleteError,
+    curve_layout_from_event,
+    get_sol_amount,
+    get_token_amount,
+    initial_curve_layout,
+)
+
+LAMPORTS_PER_SOL = 1_000_000_000
+_TOKEN_UNIT = 10 ** PUMP_TOKEN_DECIMALS
+# Fee del programa también en BUY (sobre los lamports de entrada)
+PUMP_BUY_FEE_BPS = 100
+
+
+def curve_price_sol(layout: BondingCurveLayout) -> float:
+    """Precio spot en SOL por token (unidades decimales)."""
+    if layout.virtual_token_reserves <= 0:
+        return 0.0
+    return (layout.virtual_sol_reserves / LAMPORTS_PER_SOL) / (
+        layout.virtual_token_reserves / _TOKEN_UNIT
+    )
+
+
+def apply_buy(layout: BondingCurveLayout, lamports: int) -> int:
+    """Compra `lamports` (fee incluido) en la curva; devuelve tokens base."""
+    net = lamports - lamports * PUMP_BUY_FEE_BPS // 10_000
+    tokens = get_token_amount(
+        layout.virtual_sol_reserves,
+        layout.virtual_token_reserves,
+        layout.real_token_reserves,
+        net,
+    )
+    if tokens <= 0:
+        return 0
+    layout.virtual_sol_reserves += net
+    layout.real_sol_reserves += net
+    layout.virtual_token_reserves -= tokens
+    layout.real_token_reserves -= tokens
+    if layout.real_token_reserves <= 0:
+        layout.complete = True
+    return tokens
+
+
+def apply_sell(layout: BondingCurveLayout, tokens: int) -> int:
+    """Vende `tokens` base en la curva; devuelve lamports netos de fee."""
+    net = get_sol_amount(
+        layout.virtual_sol_reserves,
+        layout.virtual_token_reserves,
+        tokens,
+        PUMP_SELL_FEE_BPS,
+    )
+    gross = get_sol_amount(
+        layout.virtual_sol_reserves,
+        layout.virtual_token_reserves,
+        tokens,
+        0,
+    )
+    gross = min(gross, layout.real_sol_reserves)
+    if gross <= 0:
+        return 0
+    layout.virtual_sol_reserves -= gross
+    layout.real_sol_reserves -= gross
+    layout.virtual_token_reserves += tokens
+    layout.real_token_reserves += tokens
+    return min(net, gross)
+
+
+def tokens_for_sol_out(layout: BondingCurveLayout, lamports: int) -> int:
+    """Tokens base a vender para sacar `lamports` brutos de la curva."""
+    vs, vt = layout.virtual_sol_reserves, layout.virtual_token_reserves
+    lamports = min(lamports, layout.real_sol_reserves)
+    if lamports <= 0 or lamports >= vs:
+        return 0
+    # x·y = k → t = vt·dx / (vs − dx), redondeado hacia arriba
+    return -(-vt * lamports // (vs - lamports))
+
+
+class SimulatedPumpMarket:
+    """
+    Mercado simulado con la misma interfaz síncrona que PumpFunExecutor.
+    """
+
+    # el engine vende por la curva (SL/TS) también en MODE=simulation
+    simulated = True
+
+    def __init__(
+        self,
+        *,
+        latency_sec: float = 0.4,
+        flow_trades_per_sec: float = 1.0,
+        flow_mean_sol: float = 0.5,
+        flow_buy_prob: float = 0.5,
+        flow_drift_sol_per_sec: float = 0.0,
+        dev_buy_sol: float = 3.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency_sec = max(0.0, latency_sec)
+        self.flow_trades_per_sec = max(0.0, flow_trades_per_sec)
+        self.flow_mean_sol = max(0.0, flow_mean_sol)
+        self.flow_buy_prob = max(0.0, min(1.0, flow_buy_prob))
+        self.flow_drift_sol_per_sec = flow_drift_sol_per_sec
+        self.dev_buy_sol = max(0.0, dev_buy_sol)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._curves: Dict[str, BondingCurveLayout] = {}
+        # tokens base en manos nuestras (el flujo sintético no los vende)
+        self._ours: Dict[str, int] = {}
+        self._next_sig = 0
+
+        # el engine se engancha aquí igual que con PumpFunExecutor; los
+        # fills simulados son síncronos, así que no hay resultados diferidos
+        self.on_tx_result: Optional[Callable[[Dict[str, Any]], None]] = None
+
+        self.buys: int = 0
+        self.sells: int = 0
+        self.flow_trades: int = 0
+        # ventas del flujo que los demás no podían cubrir (quedan pendientes)
+        self.flow_sells_capped: int = 0
+        self._sell_backlog: Dict[str, int] = {}
+        self.graduated: int = 0
+        self._graduated_mints: set = set()
+
+    @classmethod
+    def from_config(cls, config: BotConfig) -> "SimulatedPumpMarket":
+        return cls(
+            latency_sec=config.sim_latency_ms / 1000.0,
+            flow_trades_per_sec=config.sim_flow_trades_per_sec,
+            flow_mean_sol=config.sim_flow_mean_sol,
+            flow_buy_prob=config.sim_flow_buy_prob,
+            flow_drift_sol_per_sec=config.sim_flow_drift_sol_per_sec,
+            dev_buy_sol=config.sim_dev_buy_sol,
+            seed=config.sim_seed,
+        )
+
+    # ------------- curvas -------------
+
+    def observe(self, event: Dict[str, Any]) -> BondingCurveLayout:
+        """Curva del mint del evento (la crea desde el payload o la inicial)."""
+        mint = event["data"]["mint"]
+        with self._lock:
+            return self._curve_locked(mint, event)
+
+    def _curve_locked(
+        self, mint: str, event: Optional[Dict[str, Any]] = None
+    ) -> BondingCurveLayout:
+        layout = self._curves.get(mint)
+        if layout is None:
+            layout = curve_layout_from_event(event) if event else None
+            if layout is None:
+                # lanzamiento: curva inicial + compras previas (creador, snipers)
+                layout = initial_curve_layout()
+                apply_buy(layout, int(self.dev_buy_sol * LAMPORTS_PER_SOL))
+            self._curves[mint] = layout
+            self._ours[mint] = 0
+        return layout
+
+    def forget(self, mint: str) -> None:
+        with self._lock:
+            self._curves.pop(mint, None)
+            self._ours.pop(mint, None)
+            self._graduated_mints.discard(mint)
+            self._sell_backlog.pop(mint, None)
+
+    def price(self, mint: str) -> float:
+        with self._lock:
+            layout = self._curves.get(mint)
+            return curve_price_sol(layout) if layout is not None else 0.0
+
+    def is_complete(self, mint: str) -> bool:
+        with self._lock:
+            layout = self._curves.get(mint)
+            return layout is not None and layout.complete
+
+    def prices(self) -> Dict[str, float]:
+        with self._lock:
+            return {m: curve_price_sol(l) for m, l in self._curves.items() if not l.complete}
+
+    # ------------- flujo sintético -------------
+
+    def advance(self, dt_sec: float, mints: Optional[List[str]] = None) -> None:
+        """Aplica `dt_sec` de flujo sintético a `mints` (o a todas las curvas)."""
+        with self._lock:
+            targets = mints if mints is not None else list(self._curves)
+            for mint in targets:
+                layout = self._curves.get(mint)
+                if layout is not None:
+                    self._flow_locked(mint, layout, dt_sec)
+
+    def _flow_locked(self, mint: str, layout: BondingCurveLayout, dt_sec: float) -> None:
+        if dt_sec <= 0 or layout.complete:
+            return
+        rng = self._rng
+        if self.flow_trades_per_sec > 0 and self.flow_mean_sol > 0:
+            # llegadas Poisson: suma de interllegadas exponenciales
+            t = rng.expovariate(self.flow_trades_per_sec)
+            while t <= dt_sec and not layout.complete:
+                size_lamports = int(rng.expovariate(1.0 / self.flow_mean_sol) * LAMPORTS_PER_SOL)
+                if rng.random() < self.flow_buy_prob:
+                    apply_buy(layout, size_lamports)
+                    if self._sell_backlog.get(mint) and not layout.complete:
+                        # hay tokens nuevos en manos de otros: venta pendiente
+                        self._flow_sell_locked(mint, layout, 0)
+                else:
+                    self._flow_sell_locked(mint, layout, size_lamports)
+                self.flow_trades += 1
+                t += rng.expovariate(self.flow_trades_per_sec)
+
+        # tendencia explícita: flujo neto proporcional al tiempo
+        drift_lamports = int(abs(self.flow_drift_sol_per_sec) * dt_sec * LAMPORTS_PER_SOL)
+        if drift_lamports > 0 and not layout.complete:
+            if self.flow_drift_sol_per_sec > 0:
+                apply_buy(layout, drift_lamports)
+            else:
+                self._flow_sell_locked(mint, layout, drift_lamports)
+
+        self._check_graduated_locked(mint, layout)
+
+    def _flow_sell_locked(self, mint: str, layout: BondingCurveLayout, lamports: int) -> None:
+        """
+        Venta del flujo dimensionada por SOL de salida (simétrica a las
+        compras). Lo que los demás holders no pueden cubrir no se descarta:
+        queda pendiente y se vende en cuanto vuelvan a tener tokens, si no
+        el suelo de la curva sesgaría el flujo neutro hacia arriba.
+        """
+        wanted = lamports + self._sell_backlog.get(mint, 0)
+        # otros holders: todo lo comprado de la curva menos lo nuestro
+        others = INITIAL_REAL_TOKEN_RESERVES - layout.real_token_reserves - self._ours.get(mint, 0)
+        tokens = min(tokens_for_sol_out(layout, wanted), max(0, others))
+        sold = 0
+        if tokens > 0:
+            sold = get_sol_amount(layout.virtual_sol_reserves, layout.virtual_token_reserves, tokens, 0)
+            apply_sell(layout, tokens)
+        backlog = max(0, wanted - sold)
+        if backlog > 0:
+            if lamports > 0:
+                self.flow_sells_capped += 1
+            self._sell_backlog[mint] = backlog
+        else:
+            self._sell_backlog.pop(mint, None)
+
+    def _check_graduated_locked(self, mint: str, layout: BondingCurveLayout) -> None:
+        # la curva se llenó (flujo o compra nuestra) → graduation, una vez por mint
+        if layout.complete and mint not in self._graduated_mints:
+            self._graduated_mints.add(mint)
+            self.graduated += 1
+
+    def _signature_locked(self, kind: str) -> str:
+        self._next_sig += 1
+        return f"sim-{kind.lower()}-{self._next_sig}"
+
+    # ------------- interfaz de executor -------------
+
+    def buy_on_mint(self, event: Dict[str, Any], size_sol: float) -> Dict[str, Any]:
+        mint = event["data"]["mint"]
+        with self._lock:
+            layout = self._curve_locked(mint, event)
+            # el mercado se mueve mientras nuestra TX viaja
+            self._flow_locked(mint, layout, self.latency_sec)
+            if layout.complete:
+                raise CurveCompleteError("Bonding curve completa; el token ya graduó.")
+            tokens = apply_buy(layout, int(size_sol * LAMPORTS_PER_SOL))
+            if tokens <= 0:
+                raise RuntimeError("token_amount calculado es 0; no tiene sentido comprar.")
+            self._ours[mint] = self._ours.get(mint, 0) + tokens
+            self.buys += 1
+            self._check_graduated_locked(mint, layout)
+            amount_tokens = tokens / _TOKEN_UNIT
+            return {
+                "signature": self._signature_locked("BUY"),
+                "amount_tokens": amount_tokens,
+                "entry_price_sol": size_sol / amount_tokens,
+            }
+
+    def sell_on_curve(
+        self,
+        mint: str,
+        amount_tokens: float,
+        urgency: str = "stop",
+    ) -> Dict[str, Any]:
+        with self._lock:
+            layout = self._curves.get(mint)
+            if layout is None:
+                raise RuntimeError(f"Mint {mint} desconocido en el mercado simulado.")
+            self._flow_locked(mint, layout, self.latency_sec)
+            if layout.complete:
+                raise CurveCompleteError("Bonding curve completa; el token ya graduó.")
+            tokens = min(int(amount_tokens * _TOKEN_UNIT), self._ours.get(mint, 0))
+            if tokens <= 0:
+                raise ValueError("token_amount calculado es 0; revisa amount_tokens")
+            lamports = apply_sell(layout, tokens)
+            self._ours[mint] -= tokens
+            self.sells += 1
+            sol_out = lamports / LAMPORTS_PER_SOL
+            return {
+                "signature": self._signature_locked("SELL"),
+                "expected_sol_out": sol_out,
+                "exit_price_sol": sol_out / (tokens / _TOKEN_UNIT),
+            }
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "curves": len(self._curves),
+                "buys": self.buys,
+                "sells": self.sells,
+                "flow_trades": self.flow_trades,
+                "flow_sells_capped": self.flow_sells_capped,
+                "flow_sell_backlog_sol": sum(self._sell_backlog.values()) / LAMPORTS_PER_SOL,
+                "graduated": self.graduated,
+            }
+
+
+# ----------------- Feed de precios (modo live) -----------------
+
+def _graduation_event(mint: str) -> Dict[str, Any]:
+    return {
+        "event": {"class": "token", "type": "graduation", "platform": "pump.fun"},
+        "data": {"mint": mint, "tokenData": {"decimals": PUMP_TOKEN_DECIMALS}},
+    }
+
+
+def step_market(engine: Any, market: SimulatedPumpMarket, dt_sec: float) -> int:
+    """
+    Avanza el flujo de las posiciones OPEN y empuja sus precios al engine;
+    las curvas que se completan se entregan como graduation.
+    Devuelve el nº de ticks de precio enviados.
+
+    `engine` puede ser un StrategyHost / lista: todas las estrategias operan
+    sobre el mismo mercado y cada curva avanza una vez por paso.
+    """
+    engines = as_engine_list(engine)
+    holders_by_mint = open_mints(engines)
+    market.advance(dt_sec, list(holders_by_mint))
+    ticks = 0
+    try:
+        for mint, holders in holders_by_mint.items():
+            if market.is_complete(mint):
+                event = _graduation_event(mint)
+                for holder in holders:
+                    holder.handle_flintr_graduation(event)
+                continue
+            price = market.price(mint)
+            if price > 0:
+                for holder in holders:
+                    holder.update_price(mint, price, defer_exit=True)
+                    ticks += 1
+    finally:
+        # las salidas del paso se venden juntas, como en price_monitor_loop
+        for e in engines:
+            e.flush_exits()
+    return ticks
+
+
+async def market_price_loop(
+    engine: Any,
+    market: SimulatedPumpMarket,
+    poll_interval_sec: float = 1.0,
+) -> None:
+    """
+    Sustituye a price_monitor_loop con SIM_MARKET: avanza el flujo sintético
+    de las posiciones abiertas y empuja su precio al engine.
+    """
+    print(f"[MarketSim] Mercado simulado activo (cada {poll_interval_sec}s)")
+    while True:
+        try:
+            step_market(engine, market, poll_interval_sec)
+        except Exception as exc:
+            print("[MarketSim] Error en paso de mercado:", repr(exc))
+        await asyncio.sleep(poll_interval_sec)
+
+
+# ----------------- Stress test offline -----------------
+
+def _synthetic_mint_event(index: int, rng: random.Random) -> Dict[str, Any]:
+    symbol = f"SIM{index}"
+    return {
+        "event": {"class": "token", "type": "mint", "platform": "pump.fun"},
+        "data": {
+            "mint": f"sim-mint-{index}",
+            "metaData": {
+                "symbol": symbol,
+                "name": f"Simulated {index}",
+                "uri": f"https://example.invalid/{symbol}.json",
+                "twitter": "x" if rng.random() < 0.5 else "",
+            },
+            "tokenData": {},
+        },
+    }
+
+
+def run_market_sim(
+    config: BotConfig,
+    *,
+    mints: int = 200,
+    duration_sec: float = 3600.0,
+    tick_sec: float = 1.0,
+    seed: Optional[int] = None,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Corre el TradingEngine contra el mercado simulado con reloj simulado:
+    llegan `mints` mints repartidos en `duration_sec`, el flujo avanza a
+    pasos de `tick_sec` y al final se cierran las posiciones abiertas.
+    """
+    # import local: backtester importa trading_engine
+    from backtester import SimClock, backtest_config, summarize_trades
+    from trading_engine import TradingEngine
+
+    if seed is not None:
+        config = dataclasses.replace(config, sim_seed=seed)
+    rng = random.Random(seed)
+    market = SimulatedPumpMarket.from_config(config)
+
+    clock = SimClock()
+    engine = TradingEngine(
+        config=backtest_config(config),
+        executor=market,  # type: ignore[arg-type]
+        clock=clock,
+    )
+
+    arrivals = sorted(rng.uniform(0.0, duration_sec) for _ in range(mints))
+    next_arrival = 0
+    n_ticks = 0
+    started = time.perf_counter()
+
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink as buf:
+        t = 0.0
+        while t < duration_sec:
+            clock.now = t
+            while next_arrival < len(arrivals) and arrivals[next_arrival] <= t:
+                engine.handle_flintr_mint(_synthetic_mint_event(next_arrival, rng))
+                next_arrival += 1
+
+            n_ticks += step_market(engine, market, tick_sec)
+            t += tick_sec
+
+            if buf is not None and buf.tell() > 1 << 20:
+                buf.seek(0)
+                buf.truncate()
+
+        clock.now = duration_sec
+        # se vende en la curva (con slippage y fees), no a precio spot
+        engine.close_all_positions(reason="END OF SIM")
+
+    trades = engine.get_trades_snapshot()
+    stats = summarize_trades(trades)
+    stats.update(
+        {
+            "mints": mints,
+            "ticks": n_ticks,
+            "elapsed_sec": time.perf_counter() - started,
+            "market": market.get_stats_snapshot(),
+        }
+    )
+    return {"trades": trades, "stats": stats}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TradingEngine contra un mercado Pump.fun simulado")
+    parser.add_argument("--mints", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=3600.0, help="segundos simulados")
+    parser.add_argument("--tick", type=float, default=1.0, help="paso de precio (s)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--stop-loss", type=float, default=None)
+    parser.add_argument("--trailing-stop", type=float, default=None)
+    parser.add_argument("--latency-ms", type=float, default=None)
+    parser.add_argument("--verbose", action="store_true", help="mostrar logs del engine")
+    args = parser.parse_args()
+
+    overrides: Dict[str, Any] = {}
+    if args.stop_loss is not None:
+        overrides["stop_loss_percent"] = args.stop_loss
+    if args.trailing_stop is not None:
+        overrides["trailing_stop_percent"] = args.trailing_stop
+    if args.latency_ms is not None:
+        overrides["sim_latency_ms"] = args.latency_ms
+
+    config = dataclasses.replace(load_config(), **overrides)
+    result = run_market_sim(
+        config,
+        mints=args.mints,
+        duration_sec=args.duration,
+        tick_sec=args.tick,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    print(json.dumps(result["stats"], indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
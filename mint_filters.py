@@ -0,0 +1,171 @@
+# mint_filters.py
+"""
+Filtros pre-trade para eventos MINT de Flintr.
+
+Se ejecutan en TradingEngine.handle_flintr_mint ANTES de tomar el lock y de
+cualquier llamada al executor/RPC, así el capital y el presupuesto de RPC
+sólo se gastan en candidatos que pasan el screening.
+
+Las etapas van ordenadas de más barata a más cara:
+  1. metadata completa (lookups en dict)
+  2. creator en blacklist (lookup O(1) en set)
+  3. latestPrice mínimo (parseo de float)
+  4. blocklists de symbol/name (una regex compilada por campo)
+
+Cada etapa que rechaza incrementa su contador en `rejections`.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from config import BotConfig
+
+# Una etapa recibe el evento completo y devuelve True si el mint pasa.
+FilterStage = Callable[[Dict[str, Any]], bool]
+
+# Campos donde Flintr puede traer el creador/deployer del token
+_CREATOR_KEYS = ("creator", "deployer", "owner")
+
+
+def _event_parts(event: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    data = event.get("data") or {}
+    meta = data.get("metaData") or {}
+    token_data = data.get("tokenData") or {}
+    return data, meta, token_data
+
+
+def _compile_blocklist(words: Iterable[str]) -> Optional[Pattern[str]]:
+    """Compila la blocklist en una sola regex (substring, case-insensitive)."""
+    terms = sorted({w.strip() for w in words if w and w.strip()}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+
+
+def extract_creator(event: Dict[str, Any]) -> Optional[str]:
+    data, meta, token_data = _event_parts(event)
+    for source in (data, token_data, meta):
+        for key in _CREATOR_KEYS:
+            value = source.get(key)
+            if isinstance(value, str) and value:
+                return value
+    return None
+
+
+def extract_latest_price(event: Dict[str, Any]) -> float:
+    _, _, token_data = _event_parts(event)
+    raw = token_data.get("latestPrice")
+    try:
+        return float(raw) if raw not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ----------------- Etapas -----------------
+
+def metadata_complete_stage() -> FilterStage:
+    def _check(event: Dict[str, Any]) -> bool:
+        _, meta, _ = _event_parts(event)
+        return bool(meta.get("symbol")) and bool(meta.get("name"))
+
+    return _check
+
+
+def creator_blacklist_stage(creators: Iterable[str]) -> FilterStage:
+    blacklist = frozenset(c for c in creators if c)
+
+    def _check(event: Dict[str, Any]) -> bool:
+        creator = extract_creator(event)
+        return creator is None or creator not in blacklist
+
+    return _check
+
+
+def min_latest_price_stage(min_price: float) -> FilterStage:
+    def _check(event: Dict[str, Any]) -> bool:
+        return extract_latest_price(event) >= min_price
+
+    return _check
+
+
+def blocklist_stage(field_name: str, pattern: Pattern[str]) -> FilterStage:
+    def _check(event: Dict[str, Any]) -> bool:
+        _, meta, _ = _event_parts(event)
+        value = meta.get(field_name) or ""
+        return pattern.search(value) is None
+
+    return _check
+
+
+# ----------------- Pipeline -----------------
+
+class MintFilterPipeline:
+    """
+    Pipeline de filtros en orden. `check(event)` devuelve None si el mint
+    pasa todas las etapas, o el nombre de la primera etapa que lo rechazó.
+    """
+
+    def __init__(self, stages: Optional[List[Tuple[str, FilterStage]]] = None) -> None:
+        self.stages: List[Tuple[str, FilterStage]] = list(stages or [])
+        self._lock = threading.Lock()
+        self.checked: int = 0
+        self.passed: int = 0
+        self.rejections: Dict[str, int] = {name: 0 for name, _ in self.stages}
+
+    @classmethod
+    def from_config(cls, config: BotConfig) -> "MintFilterPipeline":
+        stages: List[Tuple[str, FilterStage]] = []
+
+        if config.filter_require_metadata:
+            stages.append(("metadata", metadata_complete_stage()))
+
+        if config.filter_creator_blacklist:
+            stages.append(
+                ("creator_blacklist", creator_blacklist_stage(config.filter_creator_blacklist))
+            )
+
+        if config.filter_min_latest_price > 0:
+            stages.append(
+                ("min_latest_price", min_latest_price_stage(config.filter_min_latest_price))
+            )
+
+        symbol_re = _compile_blocklist(config.filter_symbol_blocklist)
+        if symbol_re is not None:
+            stages.append(("symbol_blocklist", blocklist_stage("symbol", symbol_re)))
+
+        name_re = _compile_blocklist(config.filter_name_blocklist)
+        if name_re is not None:
+            stages.append(("name_blocklist", blocklist_stage("name", name_re)))
+
+        return cls(stages)
+
+    def check(self, event: Dict[str, Any]) -> Optional[str]:
+        rejected_by: Optional[str] = None
+        for name, stage in self.stages:
+            try:
+                ok = stage(event)
+            except Exception:
+                ok = False
+            if not ok:
+                rejected_by = name
+                break
+
+        with self._lock:
+            self.checked += 1
+            if rejected_by is None:
+                self.passed += 1
+            else:
+                self.rejections[rejected_by] = self.rejections.get(rejected_by, 0) + 1
+
+        return rejected_by
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "passed": self.passed,
+                "rejections": dict(self.rejections),
+            }
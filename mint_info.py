@@ -0,0 +1,270 @@
+# mint_info.py
+"""
+Caché de info de mints SPL (decimals, supply, token program).
+
+El engine pide `prefetch(mint)` al abrir una posición; los mints pendientes
+se agrupan durante una ventana corta y se leen con `getMultipleAccounts`
+(hasta 100 cuentas por llamada) en el loop de un ExecutorRuntime. En la
+salida, `decimals(mint)` sólo lee memoria: ningún RPC en el camino crítico.
+
+La caché es un LRU acotado (MINT_INFO_CACHE_SIZE): los mints de posiciones
+ya cerradas acaban saliendo solos.
+
+Un lote que falla (o un mint cuya cuenta aún no aparece) se reintenta con
+backoff exponencial hasta MAX_FETCH_ATTEMPTS veces; además el engine vuelve
+a pedir prefetch en cada miss.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from executor_runtime import ExecutorRuntime
+
+logger = logging.getLogger(__name__)
+
+# Límite de cuentas por llamada a getMultipleAccounts
+MAX_ACCOUNTS_PER_CALL = 100
+
+# Reintentos de mints no leídos: RETRY_BASE_SEC, x2 por intento
+RETRY_BASE_SEC = 0.5
+MAX_FETCH_ATTEMPTS = 5
+
+# Layout de la cuenta Mint (SPL Token y Token-2022 comparten los 82 bytes base)
+_MINT_LEN = 82
+_SUPPLY_OFFSET = 36
+_DECIMALS_OFFSET = 44
+
+
+@dataclass(frozen=True)
+class MintInfo:
+    mint: str
+    decimals: int
+    supply: int
+    token_program: str
+    fetched_at: float
+
+
+def parse_mint_account(mint: str, data: bytes, owner: str) -> MintInfo:
+    if len(data) < _MINT_LEN:
+        raise ValueError(f"Cuenta mint demasiado corta: {len(data)} bytes")
+    return MintInfo(
+        mint=mint,
+        decimals=data[_DECIMALS_OFFSET],
+        supply=int.from_bytes(data[_SUPPLY_OFFSET:_SUPPLY_OFFSET + 8], "little"),
+        token_program=owner,
+        fetched_at=time.time(),
+    )
+
+
+class MintInfoCache:
+    def __init__(
+        self,
+        rpc_url: str,
+        *,
+        max_entries: int = 4096,
+        batch_window_sec: float = 0.01,
+        runtime: Optional[ExecutorRuntime] = None,
+    ) -> None:
+        self.rpc_url = rpc_url
+        self.max_entries = max(1, max_entries)
+        self.batch_window_sec = batch_window_sec
+        # runtime propio salvo que se comparta el de un executor
+        self._owns_runtime = runtime is None
+        self._runtime = runtime or ExecutorRuntime(name="mint-info")
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, MintInfo]" = OrderedDict()
+        self._pending: Dict[str, None] = {}
+        # mint -> intentos fallidos (en backoff)
+        self._attempts: Dict[str, int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._next_id = 0
+
+        # estadísticas
+        self.hits: int = 0
+        self.misses: int = 0
+        self.rpc_calls: int = 0
+        self.fetch_errors: int = 0
+
+    # ------------- lectura (sin RPC) -------------
+
+    def get(self, mint: str) -> Optional[MintInfo]:
+        with self._lock:
+            info = self._cache.get(mint)
+            if info is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(mint)
+            self.hits += 1
+            return info
+
+    def decimals(self, mint: str, default: int = 6) -> int:
+        info = self.get(mint)
+        return info.decimals if info is not None else default
+
+    def _store_locked(self, info: MintInfo) -> None:
+        self._cache[info.mint] = info
+        self._cache.move_to_end(info.mint)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    # ------------- precarga en lote -------------
+
+    def prefetch(self, mints: Iterable[str]) -> None:
+        """Encola mints para leerlos en el próximo lote (thread-safe, no bloquea)."""
+        with self._lock:
+            added = False
+            for mint in mints:
+                if mint and mint not in self._cache and mint not in self._pending:
+                    self._pending[mint] = None
+                    added = True
+        if not added:
+            return
+        if not self._runtime.running:
+            self._runtime.start()
+        self._runtime.loop.call_soon_threadsafe(self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_after_window())
+
+    async def _flush_after_window(self) -> None:
+        # ventana corta para agrupar los prefetch que llegan juntos
+        await asyncio.sleep(self.batch_window_sec)
+        while True:
+            with self._lock:
+                batch = list(self._pending)[:MAX_ACCOUNTS_PER_CALL]
+                for mint in batch:
+                    del self._pending[mint]
+            if not batch:
+                return
+            try:
+                found = await self.fetch_many_async(batch)
+            except Exception as exc:
+                self.fetch_errors += 1
+                logger.warning("[MintInfo] Error leyendo %d mints: %r", len(batch), exc)
+                self._retry_later(batch)
+                continue
+            missing = [mint for mint in batch if mint not in found]
+            if missing:
+                self._retry_later(missing)
+
+    def _retry_later(self, mints: List[str]) -> None:
+        """Re-encola `mints` con backoff; tras MAX_FETCH_ATTEMPTS se abandonan."""
+        retry: List[str] = []
+        attempt = 0
+        with self._lock:
+            for mint in mints:
+                n = self._attempts.get(mint, 0) + 1
+                if n >= MAX_FETCH_ATTEMPTS:
+                    self._attempts.pop(mint, None)
+                    logger.warning("[MintInfo] %s sin info tras %d intentos", mint, n)
+                    continue
+                self._attempts[mint] = n
+                retry.append(mint)
+                attempt = max(attempt, n)
+        if retry:
+            delay = RETRY_BASE_SEC * (2 ** (attempt - 1))
+            asyncio.get_running_loop().call_later(delay, self._requeue, retry)
+
+    def _requeue(self, mints: List[str]) -> None:
+        with self._lock:
+            for mint in mints:
+                if mint not in self._cache:
+                    self._pending[mint] = None
+        self._schedule_flush()
+
+    async def fetch_many_async(self, mints: List[str]) -> Dict[str, MintInfo]:
+        """Lee `mints` con getMultipleAccounts (en trozos de 100) y los cachea."""
+        chunks = [
+            mints[i:i + MAX_ACCOUNTS_PER_CALL]
+            for i in range(0, len(mints), MAX_ACCOUNTS_PER_CALL)
+        ]
+        found: Dict[str, MintInfo] = {}
+        for chunk, accounts in zip(
+            chunks,
+            await asyncio.gather(*(self._get_multiple_accounts(c) for c in chunks)),
+        ):
+            for mint, account in zip(chunk, accounts):
+                if not account:
+                    continue
+                try:
+                    raw = base64.b64decode(account["data"][0])
+                    found[mint] = parse_mint_account(mint, raw, account.get("owner", ""))
+                except (KeyError, IndexError, TypeError, ValueError) as exc:
+                    logger.debug("[MintInfo] %s no es una cuenta mint válida: %r", mint, exc)
+
+        with self._lock:
+            for info in found.values():
+                self._store_locked(info)
+                self._attempts.pop(info.mint, None)
+        return found
+
+    def fetch_many(self, mints: List[str]) -> Dict[str, MintInfo]:
+        """Versión síncrona (bloquea): para precargar fuera del camino crítico."""
+        if not self._runtime.running:
+            self._runtime.start()
+        return self._runtime.run(self.fetch_many_async(list(mints)))
+
+    async def _get_multiple_accounts(self, mints: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=5.0)
+        self._next_id += 1
+        self.rpc_calls += 1
+        payload = {
+            "jsonrpc": "2.0",
+            "id": self._next_id,
+            "method": "getMultipleAccounts",
+            "params": [mints, {"encoding": "base64"}],
+        }
+        resp = await self._http.post(self.rpc_url, json=payload)
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("error"):
+            raise RuntimeError(f"getMultipleAccounts error: {body['error']}")
+        value = (body.get("result") or {}).get("value") or []
+        return list(value) + [None] * (len(mints) - len(value))
+
+    # ------------- ciclo de vida / stats -------------
+
+    async def _aclose(self) -> None:
+        task, self._flush_task = self._flush_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def close(self) -> None:
+        if self._owns_runtime:
+            self._runtime.stop(self._aclose)
+        elif self._runtime.running:
+            self._runtime.run(self._aclose())
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._cache)
+            pending = len(self._pending)
+        return {
+            "size": size,
+            "pending": pending,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rpc_calls": self.rpc_calls,
+            "fetch_errors": self.fetch_errors,
+        }
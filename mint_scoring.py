@@ -0,0 +1,173 @@
+# mint_scoring.py
+"""
+Scoring micro-batch de mints de Flintr.
+
+En vez de decidir cada MINT por separado al llegar, se acumulan durante una
+ventana corta (SCORING_WINDOW_MS, ej. 50–200 ms). Al cerrar la ventana:
+
+  - se extraen features de metaData/tokenData de cada evento
+  - cada evento recibe un score (suma ponderada de sus features)
+  - se abren posiciones sólo para los mejores, hasta los slots libres
+
+Así, durante ráfagas de mints, los pocos slots de max_active_trades se usan
+en los mejores candidatos y no en los primeros que llegaron.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# (nombre de feature, peso). El score es la suma ponderada de features.
+FEATURE_WEIGHTS: Tuple[Tuple[str, float], ...] = (
+    ("has_symbol", 1.0),
+    ("has_name", 1.0),
+    ("has_image", 0.5),
+    ("has_description", 0.5),
+    ("num_socials", 1.0),
+    ("has_price", 1.5),
+    ("symbol_len_ok", 0.5),
+)
+
+_SOCIAL_KEYS = ("twitter", "telegram", "website")
+
+SelectedCallback = Callable[[List[Dict[str, Any]]], None]
+FreeSlotsFn = Callable[[], int]
+
+
+def _extract_features(event: Dict[str, Any]) -> Tuple[float, ...]:
+    data = event.get("data") or {}
+    meta = data.get("metaData") or {}
+    token_data = data.get("tokenData") or {}
+
+    symbol = meta.get("symbol") or ""
+    name = meta.get("name") or ""
+
+    latest_price_raw = token_data.get("latestPrice")
+    try:
+        latest_price = float(latest_price_raw) if latest_price_raw not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        latest_price = 0.0
+
+    num_socials = sum(1 for k in _SOCIAL_KEYS if meta.get(k))
+
+    return (
+        1.0 if symbol else 0.0,
+        1.0 if name else 0.0,
+        1.0 if (meta.get("image") or meta.get("uri")) else 0.0,
+        1.0 if meta.get("description") else 0.0,
+        float(num_socials),
+        1.0 if latest_price > 0 else 0.0,
+        1.0 if 2 <= len(symbol) <= 10 else 0.0,
+    )
+
+
+def score_event(event: Dict[str, Any]) -> float:
+    return sum(
+        weight * value
+        for (_, weight), value in zip(FEATURE_WEIGHTS, _extract_features(event))
+    )
+
+
+def score_batch(events: Sequence[Dict[str, Any]]) -> List[float]:
+    """Puntúa un batch completo (un score por evento, en el mismo orden)."""
+    return [score_event(event) for event in events]
+
+
+class MintBatchScorer:
+    """
+    Acumula mints durante `window_sec` y entrega los mejores a `on_selected`.
+
+    - `submit(event)` es barato (append bajo lock); el primer evento de un
+      batch arma un timer que hace `flush()` al cerrar la ventana.
+    - `free_slots()` se consulta en el flush para saber cuántos abrir.
+    """
+
+    def __init__(
+        self,
+        window_sec: float,
+        on_selected: SelectedCallback,
+        free_slots: FreeSlotsFn,
+        *,
+        min_score: float = 0.0,
+    ) -> None:
+        self.window_sec = window_sec
+        self.on_selected = on_selected
+        self.free_slots = free_slots
+        self.min_score = min_score
+
+        self._lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._timer: Optional[threading.Timer] = None
+
+        # estadísticas
+        self.batches: int = 0
+        self.scored: int = 0
+        self.selected: int = 0
+
+    def submit(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending.append(event)
+            if self._timer is None:
+                self._timer = threading.Timer(self.window_sec, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Puntúa el batch pendiente y entrega los seleccionados."""
+        with self._lock:
+            batch = self._pending
+            self._pending = []
+            timer = self._timer
+            self._timer = None
+
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+
+        if not batch:
+            return []
+
+        # Dedup por mint (Flintr puede repetir eventos dentro de la ventana)
+        seen: Dict[str, Dict[str, Any]] = {}
+        for event in batch:
+            mint = (event.get("data") or {}).get("mint")
+            if mint and mint not in seen:
+                seen[mint] = event
+        events = list(seen.values())
+
+        scores = score_batch(events)
+        slots = max(0, int(self.free_slots()))
+
+        ranked = sorted(
+            (i for i in range(len(events)) if scores[i] >= self.min_score),
+            key=lambda i: scores[i],
+            reverse=True,
+        )
+        selected = [events[i] for i in ranked[:slots]]
+
+        with self._lock:
+            self.batches += 1
+            self.scored += len(events)
+            self.selected += len(selected)
+
+        if len(events) > 1 or not selected:
+            print(
+                f"[Scoring] Batch de {len(events)} mints, slots={slots}, "
+                f"seleccionados={len(selected)}"
+            )
+
+        if selected:
+            try:
+                self.on_selected(selected)
+            except Exception as exc:
+                print("[Scoring] Error en on_selected:", repr(exc))
+
+        return selected
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "scored": self.scored,
+                "selected": self.selected,
+            }
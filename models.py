@@ -37,6 +37,15 @@ class Position:
     # P&L realizado
     realized_pnl_sol: float = 0.0
     realized_pnl_percent: float = 0.0
+    close_reason: Optional[str] = None
 
     # último precio visto (para /positions)
     last_price_sol: float = 0.0
+
+    # TX de compra on-chain (MODE=real): firma y estado de confirmación
+    buy_signature: Optional[str] = None
+    buy_status: Optional[str] = None
+
+    # salida en curso (CLOSING): motivo y TX de venta hasta que aterrice
+    exit_reason: Optional[str] = None
+    sell_signature: Optional[str] = None
@@ -0,0 +1,259 @@
+# param_sweep.py
+"""
+Barrido de parámetros (SL / TS / tamaño) sobre el backtester, en paralelo.
+
+- El grid se reparte entre workers de un ProcessPoolExecutor.
+- Los ticks se convierten UNA vez a un binario de registros fijos
+  (ts f64, mint_idx u32, price f64) y cada worker lo abre con mmap en
+  sólo lectura: todos comparten las mismas páginas del page cache del SO
+  en vez de tener una copia por proceso.
+- Los eventos Flintr (pocos comparados con los ticks) se cargan una vez
+  por worker en el initializer, no una vez por combinación.
+
+Uso:
+    python param_sweep.py --events events.jsonl --ticks ticks.csv \\
+        --stop-loss 10,15,20 --trailing-stop 10,20,30 --invest 0.05 \\
+        --workers 8 --out sweep.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import dataclasses
+import itertools
+import json
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import BotConfig, load_config
+from backtester import (
+    PriceTick,
+    RecordedEvent,
+    iter_price_ticks,
+    iter_recorded_events,
+    run_backtest,
+)
+
+# ts (f64), índice de mint (u32), precio en SOL (f64) — sin padding
+TICK_RECORD = struct.Struct("<dId")
+
+# combinaciones por tarea enviada a un worker (reparto dinámico)
+MAX_CHUNKSIZE = 4
+
+# nombre CLI → campo de BotConfig
+SWEEP_PARAMS = {
+    "stop_loss": "stop_loss_percent",
+    "trailing_stop": "trailing_stop_percent",
+    "invest": "invest_amount_sol",
+}
+
+
+# ----------------- Ticks binarios (compartidos vía mmap) -----------------
+
+def tick_binary_paths(ticks_csv: str) -> Tuple[str, str]:
+    base, _ = os.path.splitext(ticks_csv)
+    return base + ".bin", base + ".mints.json"
+
+
+def build_tick_binary(ticks_csv: str) -> Tuple[str, str]:
+    """
+    Convierte el CSV de ticks a binario + tabla de mints. Reutiliza el
+    binario si ya existe y es más nuevo que el CSV.
+    """
+    bin_path, mints_path = tick_binary_paths(ticks_csv)
+    if (
+        os.path.exists(bin_path)
+        and os.path.exists(mints_path)
+        and os.path.getmtime(bin_path) >= os.path.getmtime(ticks_csv)
+    ):
+        return bin_path, mints_path
+
+    mint_index: Dict[str, int] = {}
+    pack = TICK_RECORD.pack
+    with open(bin_path, "wb") as out:
+        for ts, mint, price in iter_price_ticks(ticks_csv):
+            idx = mint_index.get(mint)
+            if idx is None:
+                idx = mint_index[mint] = len(mint_index)
+            out.write(pack(ts, idx, price))
+
+    mints = [""] * len(mint_index)
+    for mint, idx in mint_index.items():
+        mints[idx] = mint
+    with open(mints_path, "w", encoding="utf-8") as fh:
+        json.dump(mints, fh)
+
+    return bin_path, mints_path
+
+
+def iter_mmap_ticks(buf: Any, mints: Sequence[str]) -> Iterator[PriceTick]:
+    """Itera ticks directamente sobre el buffer mmap (sin copiarlo)."""
+    if len(buf) == 0:
+        return
+    for ts, idx, price in TICK_RECORD.iter_unpack(buf):
+        yield ts, mints[idx], price
+
+
+# ----------------- Worker -----------------
+
+_W_CONFIG: Optional[BotConfig] = None
+_W_EVENTS: List[RecordedEvent] = []
+_W_MINTS: List[str] = []
+_W_TICKS: Any = None
+
+
+def _init_worker(
+    config: BotConfig,
+    events_path: str,
+    bin_path: str,
+    mints_path: str,
+) -> None:
+    global _W_CONFIG, _W_EVENTS, _W_MINTS, _W_TICKS
+
+    _W_CONFIG = config
+    _W_EVENTS = list(iter_recorded_events(events_path))
+    with open(mints_path, "r", encoding="utf-8") as fh:
+        _W_MINTS = json.load(fh)
+
+    if os.path.getsize(bin_path) == 0:
+        _W_TICKS = b""
+        return
+    with open(bin_path, "rb") as fh:
+        # ACCESS_READ: páginas compartidas entre todos los workers
+        _W_TICKS = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _run_combo(params: Dict[str, float]) -> Dict[str, Any]:
+    assert _W_CONFIG is not None, "worker sin inicializar"
+    config = dataclasses.replace(_W_CONFIG, **params)
+    result = run_backtest(
+        config,
+        _W_EVENTS,
+        iter_mmap_ticks(_W_TICKS, _W_MINTS),
+    )
+    stats = result["stats"]
+    row: Dict[str, Any] = dict(params)
+    row.update(
+        {
+            "total_pnl_sol": stats["total_pnl_sol"],
+            "total_trades": stats["total_trades"],
+            "win_rate": stats["win_rate"],
+            "avg_pnl_percent": stats["avg_pnl_percent"],
+            "max_drawdown_sol": stats["max_drawdown_sol"],
+            # trades cerrados por END OF DATA: resultado sin salida real
+            "out_of_data": stats["out_of_data"],
+            "elapsed_sec": stats["elapsed_sec"],
+        }
+    )
+    return row
+
+
+# ----------------- Sweep -----------------
+
+def expand_grid(grid: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def run_sweep(
+    config: BotConfig,
+    events_path: str,
+    ticks_csv: str,
+    grid: Dict[str, Sequence[float]],
+    *,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ejecuta el backtest para cada combinación del grid (claves = campos de
+    BotConfig) y devuelve las filas ordenadas por total_pnl_sol desc.
+    """
+    combos = expand_grid(grid)
+    if not combos:
+        return []
+
+    bin_path, mints_path = build_tick_binary(ticks_csv)
+
+    n_workers = max(1, min(workers or os.cpu_count() or 1, len(combos)))
+    # Trozos pequeños: el coste varía mucho con SL/TS y los combos vecinos se
+    # parecen, así que un bloque contiguo por worker deja a uno con lo lento.
+    # Con trozos de <= MAX_CHUNKSIZE los workers libres siguen tomando trabajo.
+    chunksize = max(1, min(MAX_CHUNKSIZE, len(combos) // (n_workers * 4)))
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(config, events_path, bin_path, mints_path),
+    ) as pool:
+        rows = list(pool.map(_run_combo, combos, chunksize=chunksize))
+
+    rows.sort(key=lambda r: r["total_pnl_sol"], reverse=True)
+    return rows
+
+
+def format_table(rows: List[Dict[str, Any]], top: Optional[int] = None) -> str:
+    if not rows:
+        return "(sin resultados)"
+    rows = rows[:top] if top else rows
+    headers = ["#"] + list(rows[0].keys())
+    body = []
+    for rank, row in enumerate(rows, start=1):
+        cells = [str(rank)]
+        for value in row.values():
+            cells.append(f"{value:.4f}" if isinstance(value, float) else str(value))
+        body.append(cells)
+    widths = [max(len(h), *(len(r[i]) for r in body)) for i, h in enumerate(headers)]
+    lines = ["  ".join(h.rjust(w) for h, w in zip(headers, widths))]
+    lines += ["  ".join(c.rjust(w) for c, w in zip(r, widths)) for r in body]
+    return "\n".join(lines)
+
+
+def _parse_values(raw: Optional[str]) -> Optional[List[float]]:
+    if not raw:
+        return None
+    return [float(v) for v in raw.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep paralelo de SL/TS/tamaño")
+    parser.add_argument("--events", required=True)
+    parser.add_argument("--ticks", required=True)
+    parser.add_argument("--stop-loss", help="lista separada por comas (ej. 10,15,20)")
+    parser.add_argument("--trailing-stop", help="lista separada por comas")
+    parser.add_argument("--invest", help="lista separada por comas (SOL)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", default=None, help="CSV con el ranking completo")
+    args = parser.parse_args()
+
+    grid: Dict[str, Sequence[float]] = {}
+    for cli_name, field_name in SWEEP_PARAMS.items():
+        values = _parse_values(getattr(args, cli_name))
+        if values:
+            grid[field_name] = values
+
+    if not grid:
+        parser.error("indica al menos un parámetro a barrer")
+
+    rows = run_sweep(
+        load_config(),
+        args.events,
+        args.ticks,
+        grid,
+        workers=args.workers,
+    )
+
+    if args.out and rows:
+        with open(args.out, "w", encoding="utf-8", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    print(format_table(rows, top=args.top))
+
+
+if __name__ == "__main__":
+    main()
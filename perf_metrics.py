@@ -0,0 +1,222 @@
+# perf_metrics.py
+"""
+Métricas de latencia en proceso y profiler por muestreo (/latency, /perf).
+
+- LatencyHistogram: histograma estilo HDR (buckets log-lineales en µs,
+  ~1% de error relativo) con record O(1) y memoria fija; percentiles sin
+  guardar muestras.
+- LATENCY: registro global por nombre de etapa del camino crítico
+  (flintr_to_decision, price_fetch, update_price, tx_build, tx_send).
+- sample_profile: muestrea sys._current_frames() de todos los threads
+  durante N segundos y cuenta los frames más frecuentes, sin reiniciar
+  el proceso ni instrumentar nada.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 2^7 = 128 sub-buckets por potencia de 2 → error relativo < 1%
+_SUB_BITS = 7
+_SUB_COUNT = 1 << _SUB_BITS
+# hasta 2^38 µs (~76 h): cualquier latencia razonable cabe
+_MAX_EXPONENT = 38 - _SUB_BITS
+
+PERCENTILES = (50.0, 95.0, 99.0)
+
+# etapas del camino crítico que muestra /latency (en este orden)
+STAGES = ("flintr_to_decision", "price_fetch", "update_price", "tx_build", "tx_send")
+
+
+def _bucket_index(value_us: int) -> int:
+    exponent = value_us.bit_length() - _SUB_BITS
+    if exponent <= 0:
+        return value_us
+    if exponent > _MAX_EXPONENT:
+        exponent = _MAX_EXPONENT
+        value_us = (_SUB_COUNT << exponent) - 1
+    # dentro de cada exponente sólo se usa la mitad alta de los sub-buckets
+    return exponent * (_SUB_COUNT >> 1) + (value_us >> exponent)
+
+
+def _bucket_upper_us(index: int) -> int:
+    if index < _SUB_COUNT:
+        return index
+    half = _SUB_COUNT >> 1
+    exponent = index // half - 1
+    sub = index - exponent * half
+    return ((sub + 1) << exponent) - 1
+
+
+class LatencyHistogram:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = array("Q", bytes(8 * ((_MAX_EXPONENT + 2) * (_SUB_COUNT >> 1) + 1)))
+        self.count: int = 0
+        self.total_us: int = 0
+        self.min_us: int = 0
+        self.max_us: int = 0
+
+    def record_us(self, value_us: int) -> None:
+        if value_us < 0:
+            value_us = 0
+        index = _bucket_index(value_us)
+        with self._lock:
+            self._counts[index] += 1
+            if self.count == 0 or value_us < self.min_us:
+                self.min_us = value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+            self.count += 1
+            self.total_us += value_us
+
+    def record(self, seconds: float) -> None:
+        self.record_us(int(seconds * 1_000_000))
+
+    def percentiles(self, qs: Tuple[float, ...] = PERCENTILES) -> Dict[float, float]:
+        """Percentiles en ms (cota superior del bucket, acotada a max)."""
+        with self._lock:
+            counts = self._counts.tolist()
+            total, max_us = self.count, self.max_us
+        out = {q: 0.0 for q in qs}
+        if total == 0:
+            return out
+
+        targets = sorted((max(1, int(total * q / 100.0 + 0.5)), q) for q in qs)
+        seen = 0
+        t = 0
+        for index, n in enumerate(counts):
+            if not n:
+                continue
+            seen += n
+            while t < len(targets) and seen >= targets[t][0]:
+                out[targets[t][1]] = min(_bucket_upper_us(index), max_us) / 1000.0
+                t += 1
+            if t == len(targets):
+                break
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            for i in range(len(self._counts)):
+                self._counts[i] = 0
+            self.count = self.total_us = self.min_us = self.max_us = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        pct = self.percentiles()
+        count = self.count
+        return {
+            "count": count,
+            "p50_ms": pct[50.0],
+            "p95_ms": pct[95.0],
+            "p99_ms": pct[99.0],
+            "max_ms": self.max_us / 1000.0,
+            "mean_ms": (self.total_us / count / 1000.0) if count else 0.0,
+        }
+
+
+class LatencyRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        hist = self._histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(name, LatencyHistogram())
+        return hist
+
+    def record(self, name: str, seconds: float) -> None:
+        self.histogram(name).record(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).record(time.perf_counter() - started)
+
+    def reset(self) -> None:
+        for hist in list(self._histograms.values()):
+            hist.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        names = list(STAGES) + sorted(set(self._histograms) - set(STAGES))
+        return {
+            name: self._histograms[name].snapshot()
+            for name in names
+            if name in self._histograms
+        }
+
+
+LATENCY = LatencyRegistry()
+
+
+# ----------------- profiler por muestreo -----------------
+
+def sample_profile(
+    duration_sec: float,
+    *,
+    interval_sec: float = 0.005,
+    top: int = 15,
+) -> Dict[str, object]:
+    """
+    Muestrea el stack de todos los threads (salvo el propio) cada
+    `interval_sec` durante `duration_sec`. Bloquea: llamar desde un thread
+    aparte (asyncio.to_thread).
+
+    Devuelve {"samples", "self": [(frame, n)], "inclusive": [(frame, n)]}:
+    `self` cuenta el frame en ejecución (hoja), `inclusive` cualquier frame
+    del stack (una vez por muestra).
+    """
+    own = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    self_counts: Counter = Counter()
+    inclusive_counts: Counter = Counter()
+    samples = 0
+
+    deadline = time.monotonic() + duration_sec
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            samples += 1
+            leaf = True
+            seen: set = set()
+            f: Optional[object] = frame
+            while f is not None:
+                code = f.f_code
+                key = f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+                if leaf:
+                    # la hoja con nº de línea y thread: dónde está el tiempo
+                    self_counts[f"{key} L{f.f_lineno} [{names.get(ident, ident)}]"] += 1
+                    leaf = False
+                if key not in seen:
+                    seen.add(key)
+                    inclusive_counts[key] += 1
+                f = f.f_back
+        time.sleep(interval_sec)
+
+    return {
+        "samples": samples,
+        "self": self_counts.most_common(top),
+        "inclusive": inclusive_counts.most_common(top),
+    }
+
+
+def format_profile(result: Dict[str, object], top: int = 10) -> List[str]:
+    samples = int(result.get("samples") or 0) or 1
+    lines: List[str] = []
+    for title, key in (("Self (hoja)", "self"), ("Inclusivo", "inclusive")):
+        lines.append(f"{title}:")
+        for frame, n in list(result.get(key) or [])[:top]:
+            lines.append(f"  {n / samples * 100.0:5.1f}%  {frame}")
+    return lines
@@ -2,9 +2,9 @@
 """
 Monitor de precios para tus posiciones abiertas.
 
-- Intenta primero DexScreener: https://api.dexscreener.com/latest/dex/tokens/{mint}
+- Intenta primero DexScreener: https://api.dexscreener.com/latest/dex/tokens/{mint1,mint2,...}
 - Si falla o no hay pares válidos, hace fallback a Jupiter Price API v3:
-  https://lite-api.jup.ag/price/v3?ids={mint},{So1111...}
+  https://lite-api.jup.ag/price/v3?ids={mint1,mint2,...},{So1111...}
 - Actualiza last_price_sol en TradingEngine.update_price(mint, price_sol)
 """
 
@@ -12,10 +12,13 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
 import httpx
 
+from perf_metrics import LATENCY
+from strategy_host import StrategyHost, as_engine_list, open_mints
 from trading_engine import TradingEngine
 
 logger = logging.getLogger(__name__)
@@ -27,39 +30,13 @@ JUPITER_PRICE_URL_LITE = "https://lite-api.jup.ag/price/v3"
 SOL_MINT = "So11111111111111111111111111111111111111112"
 
 
-async def _fetch_price_from_dexscreener(
-    client: httpx.AsyncClient,
-    mint: str,
-) -> Optional[float]:
-    """
-    Devuelve el precio del token EN SOL usando DexScreener (priceNative de un par donde
-    el quote sea SOL). Si no lo encuentra, devuelve None.
-    """
-    url = f"{DEXSCREENER_TOKENS_URL}/{mint}"
-    try:
-        resp = await client.get(url, timeout=8)
-    except Exception as exc:
-        logger.debug("[PriceMonitor] DexScreener error de red: %r", exc)
-        return None
-
-    if resp.status_code != 200:
-        logger.debug(
-            "[PriceMonitor] DexScreener status %s para %s",
-            resp.status_code,
-            mint,
-        )
-        return None
+# máx. de direcciones por request (DexScreener /tokens y Jupiter Price v3)
+DEXSCREENER_MAX_MINTS = 30
+JUPITER_PRICE_MAX_IDS = 50
 
-    try:
-        data = resp.json()
-    except Exception as exc:
-        logger.debug("[PriceMonitor] DexScreener JSON inválido: %r", exc)
-        return None
-
-    pairs = data.get("pairs") or []
-    if not pairs:
-        return None
 
+def _best_sol_price(pairs: List[dict]) -> Optional[float]:
+    """priceNative del par con más liquidez, preferentemente contra SOL."""
     # Filtrar pares en Solana (opcional, pero ayuda) y donde el quote sea SOL
     # En DexScreener, para Solana típicamente: chainId="solana" y quoteToken.symbol="SOL" 
     sol_pairs = [
@@ -95,137 +72,254 @@ async def _fetch_price_from_dexscreener(
         return None
 
 
-async def _fetch_price_from_jupiter(
+async def _fetch_prices_from_dexscreener(
     client: httpx.AsyncClient,
-    mint: str,
+    mints: Sequence[str],
+) -> Dict[str, float]:
+    """
+    Precio EN SOL de varios mints con DexScreener, hasta DEXSCREENER_MAX_MINTS
+    por request (/tokens/{a,b,c}). Los mints sin par válido no aparecen.
+    """
+    prices: Dict[str, float] = {}
+    for i in range(0, len(mints), DEXSCREENER_MAX_MINTS):
+        chunk = list(mints[i:i + DEXSCREENER_MAX_MINTS])
+        url = f"{DEXSCREENER_TOKENS_URL}/{','.join(chunk)}"
+        try:
+            resp = await client.get(url, timeout=8)
+        except Exception as exc:
+            logger.debug("[PriceMonitor] DexScreener error de red: %r", exc)
+            continue
+
+        if resp.status_code != 200:
+            logger.debug(
+                "[PriceMonitor] DexScreener status %s para %d mints",
+                resp.status_code,
+                len(chunk),
+            )
+            continue
+
+        try:
+            data = resp.json()
+        except Exception as exc:
+            logger.debug("[PriceMonitor] DexScreener JSON inválido: %r", exc)
+            continue
+
+        # la respuesta mezcla los pares de todos los mints: agrupar por base
+        wanted = set(chunk)
+        pairs_by_mint: Dict[str, List[dict]] = {}
+        for pair in data.get("pairs") or []:
+            base = (pair.get("baseToken") or {}).get("address")
+            if base in wanted:
+                pairs_by_mint.setdefault(base, []).append(pair)
+
+        for mint, pairs in pairs_by_mint.items():
+            price_sol = _best_sol_price(pairs)
+            if price_sol is not None:
+                prices[mint] = price_sol
+    return prices
+
+
+async def _fetch_prices_from_jupiter(
+    client: httpx.AsyncClient,
+    mints: Sequence[str],
     base_url: str = JUPITER_PRICE_URL_LITE,
-) -> Optional[float]:
+) -> Dict[str, float]:
     """
-    Fallback: usa Jupiter Price API v3 para obtener precio en USD del token y de SOL
-    y devuelve token_price_usd / sol_price_usd = precio del token en SOL.
+    Fallback: usa Jupiter Price API v3 para obtener precio en USD de los tokens y de
+    SOL y devuelve token_price_usd / sol_price_usd = precio de cada token en SOL.
     Doc: https://lite-api.jup.ag/price/v3?ids=... 
     """
-    # ids = token, SOL
-    url = f"{base_url}?ids={mint},{SOL_MINT}"
-    try:
-        resp = await client.get(url, timeout=8)
-    except Exception as exc:
-        logger.debug("[PriceMonitor] Jupiter error de red: %r", exc)
-        return None
-
-    if resp.status_code != 200:
-        logger.debug(
-            "[PriceMonitor] Jupiter status %s para %s",
-            resp.status_code,
-            mint,
-        )
-        return None
-
-    try:
-        data = resp.json()
-    except Exception as exc:
-        logger.debug("[PriceMonitor] Jupiter JSON inválido: %r", exc)
-        return None
+    prices: Dict[str, float] = {}
+    # ids = tokens + SOL
+    step = JUPITER_PRICE_MAX_IDS - 1
+    for i in range(0, len(mints), step):
+        chunk = list(mints[i:i + step])
+        url = f"{base_url}?ids={','.join(chunk)},{SOL_MINT}"
+        try:
+            resp = await client.get(url, timeout=8)
+        except Exception as exc:
+            logger.debug("[PriceMonitor] Jupiter error de red: %r", exc)
+            continue
+
+        if resp.status_code != 200:
+            logger.debug(
+                "[PriceMonitor] Jupiter status %s para %d mints",
+                resp.status_code,
+                len(chunk),
+            )
+            continue
 
-    token_info = data.get(mint)
-    sol_info = data.get(SOL_MINT)
-    if not token_info or not sol_info:
-        return None
+        try:
+            data = resp.json()
+        except Exception as exc:
+            logger.debug("[PriceMonitor] Jupiter JSON inválido: %r", exc)
+            continue
 
-    try:
-        token_usd = float(token_info.get("usdPrice"))
-        sol_usd = float(sol_info.get("usdPrice"))
-        if token_usd <= 0 or sol_usd <= 0:
-            return None
-        return token_usd / sol_usd
-    except (TypeError, ValueError):
-        return None
+        sol_info = data.get(SOL_MINT)
+        try:
+            sol_usd = float(sol_info.get("usdPrice")) if sol_info else 0.0
+        except (TypeError, ValueError):
+            sol_usd = 0.0
+        if sol_usd <= 0:
+            continue
+
+        for mint in chunk:
+            token_info = data.get(mint)
+            if not token_info:
+                continue
+            try:
+                token_usd = float(token_info.get("usdPrice"))
+            except (TypeError, ValueError):
+                continue
+            if token_usd > 0:
+                prices[mint] = token_usd / sol_usd
+    return prices
 
 
-async def _fetch_price_for_mint(
+async def _fetch_prices_for_mints(
     client: httpx.AsyncClient,
-    mint: str,
+    mints: Sequence[str],
     jupiter_base_url: str,
-) -> Optional[float]:
+) -> Dict[str, float]:
     """
-    Lógica unificada: primero DexScreener, si no hay precio, fallback Jupiter.
-    Devuelve precio en SOL (float) o None.
+    Lógica unificada: primero DexScreener, y Jupiter sólo para los mints que
+    quedaron sin precio. Devuelve {mint: precio en SOL}.
     """
-    # 1) DexScreener
-    price = await _fetch_price_from_dexscreener(client, mint)
-    if price is not None:
-        return price
-
-    # 2) Jupiter Price v3 (lite/pro según base_url que pases en config)
-    price = await _fetch_price_from_jupiter(client, mint, base_url=jupiter_base_url)
-    return price
+    prices = await _fetch_prices_from_dexscreener(client, mints)
+    missing = [m for m in mints if m not in prices]
+    if missing:
+        prices.update(
+            await _fetch_prices_from_jupiter(client, missing, base_url=jupiter_base_url)
+        )
+    return prices
 
 
 async def price_monitor_loop(
-    engine: TradingEngine,
+    engine: Union[TradingEngine, StrategyHost, Sequence[TradingEngine]],
     poll_interval_sec: float = 3.0,
+    on_tick: Optional[Callable[[str, float], None]] = None,
 ) -> None:
     """
     Bucle principal para mantener last_price_sol lo más real posible.
 
     - Cada `poll_interval_sec` revisa todas las posiciones OPEN.
-    - Para cada mint, pide precio (DexScreener + fallback Jupiter).
-    - Llama engine.update_price(mint, price_sol).
+    - Pide los precios por lotes (DexScreener + fallback Jupiter).
+    - Llama engine.update_price(mint, price_sol) y al final del ciclo
+      engine.flush_exits(): los SL/TS que saltaron se venden a la vez.
+    - Si se pasa `on_tick`, se le entrega cada (mint, price_sol) (p.ej. TickRecorder).
+
+    Con varios engines (StrategyHost) el feed es uno solo: cada mint abierto
+    se consulta una vez por ciclo y el precio va a todos los que lo tienen.
     """
-    logger.info("[PriceMonitor] Iniciado bucle de precios...")
+    engines = as_engine_list(engine)
+    logger.info("[PriceMonitor] Iniciado bucle de precios (%d engines)...", len(engines))
 
     # Usamos la base de Jupiter desde tu config (ej: https://lite-api.jup.ag)
-    jupiter_price_base = engine.config.jupiter_api_url.rstrip("/") + "/price/v3"
+    jupiter_price_base = engines[0].config.jupiter_api_url.rstrip("/") + "/price/v3"
 
     async with httpx.AsyncClient() as client:
         while True:
             try:
-                snapshot = engine.get_positions_snapshot()
-                open_positions = [
-                    p for p in snapshot if p.get("status") == "OPEN"
-                ]
+                holders_by_mint = open_mints(engines)
 
-                if not open_positions:
+                if not holders_by_mint:
                     await asyncio.sleep(poll_interval_sec)
                     continue
 
-                for pos in open_positions:
-                    mint = pos.get("mint")
-                    if not mint:
-                        continue
+                # un request por lote de mints en vez de uno por mint
+                fetch_started = time.perf_counter()
+                prices = await _fetch_prices_for_mints(
+                    client,
+                    list(holders_by_mint),
+                    jupiter_base_url=jupiter_price_base,
+                )
+                LATENCY.record("price_fetch", time.perf_counter() - fetch_started)
+
+                try:
+                    for mint, holders in holders_by_mint.items():
+                        price_sol = prices.get(mint)
+                        if price_sol is None:
+                            logger.debug(
+                                "[PriceMonitor] Sin precio para mint %s (DexScreener+Jupiter)",
+                                mint,
+                            )
+                            continue
+
+                        if on_tick is not None:
+                            on_tick(mint, price_sol)
+
+                        for holder in holders:
+                            updated_pos = holder.update_price(
+                                mint, price_sol, defer_exit=True
+                            )
+                            if updated_pos is not None:
+                                logger.debug(
+                                    "[PriceMonitor] %s price=%.10f SOL (max=%.10f)",
+                                    updated_pos.symbol,
+                                    updated_pos.last_price_sol,
+                                    updated_pos.max_price_sol,
+                                )
+                finally:
+                    # todos los SL/TS del ciclo salen juntos
+                    for e in engines:
+                        e.flush_exits()
 
-                    price_sol = await _fetch_price_for_mint(
+                await asyncio.sleep(poll_interval_sec)
+
+            except asyncio.CancelledError:
+                logger.info("[PriceMonitor] Cancelado, saliendo del bucle.")
+                break
+            except Exception as exc:
+                logger.exception("[PriceMonitor] Error en bucle: %r", exc)
+                # Esperar un poco antes de reintentar
+                await asyncio.sleep(5.0)
+
+
+async def watchlist_tick_loop(
+    engine: Union[TradingEngine, StrategyHost, Sequence[TradingEngine]],
+    watchlist: Any,
+    on_tick: Callable[[str, float], None],
+    poll_interval_sec: float = 5.0,
+) -> None:
+    """
+    Ticks para el backtester de mints que ninguna estrategia tiene abiertos
+    (`watchlist`: backtester.MintWatchlist). Sin esto sólo se grabarían las
+    posiciones OPEN: no habría datos de los mints no comprados ni de lo que
+    pasa tras una salida.
+
+    Va en su propio bucle para no alargar el ciclo de price_monitor_loop (el
+    que dispara SL/TS). Los mints abiertos los graba price_monitor_loop; aquí
+    sólo se les renueva la ventana, para seguirlos tras el cierre.
+    """
+    engines = as_engine_list(engine)
+    jupiter_price_base = (
+        engines[0].config.jupiter_api_url.rstrip("/") + "/price/v3"
+        if engines
+        else JUPITER_PRICE_URL_LITE
+    )
+
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                held = open_mints(engines)
+                for mint in held:
+                    watchlist.touch(mint)
+
+                pending = [m for m in watchlist.mints() if m not in held]
+                if pending:
+                    prices = await _fetch_prices_for_mints(
                         client,
-                        mint,
+                        pending,
                         jupiter_base_url=jupiter_price_base,
                     )
-
-                    if price_sol is None:
-                        logger.debug(
-                            "[PriceMonitor] Sin precio para mint %s (DexScreener+Jupiter)",
-                            mint,
-                        )
-                        await asyncio.sleep(0.2)
-                        continue
-
-                    updated_pos = engine.update_price(mint, price_sol)
-                    if updated_pos is not None:
-                        logger.debug(
-                            "[PriceMonitor] %s price=%.10f SOL (max=%.10f)",
-                            updated_pos.symbol,
-                            updated_pos.last_price_sol,
-                            updated_pos.max_price_sol,
-                        )
-
-                    # Pequeño delay entre tokens para no abusar del rate limit
-                    await asyncio.sleep(0.25)
+                    for mint, price_sol in prices.items():
+                        on_tick(mint, price_sol)
 
                 await asyncio.sleep(poll_interval_sec)
 
             except asyncio.CancelledError:
-                logger.info("[PriceMonitor] Cancelado, saliendo del bucle.")
+                logger.info("[PriceMonitor] Watchlist cancelada, saliendo del bucle.")
                 break
             except Exception as exc:
-                logger.exception("[PriceMonitor] Error en bucle: %r", exc)
-                # Esperar un poco antes de reintentar
+                logger.exception("[PriceMonitor] Error en watchlist: %r", exc)
                 await asyncio.sleep(5.0)
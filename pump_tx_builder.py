@@ -0,0 +1,298 @@
+# pump_tx_builder.py
+#
+# Builder de TX de BUY / SELL para Pump.fun con todo lo que no cambia entre
+# operaciones precalculado:
+#
+#   - template estático de AccountMeta (global, fee, system, token, rent,
+#     event authority, program) creado una sola vez
+#   - valores derivados del owner (pubkey, AccountMeta firmante) cacheados
+#   - PDAs por mint (bonding curve, associated bonding curve, ATA del user)
+#     y las listas completas de AccountMeta (buy y sell) memoizadas en un LRU
+#
+# Todo con tipos solders (sin pasar por solana-py ni convertir la keypair),
+# así que por compra sólo se empaquetan los argumentos y se firma.
+#
+# Las TX salen por defecto como VersionedTransaction (MessageV0) con
+# instrucciones de compute budget y, opcionalmente, address lookup tables
+# para reducir el tamaño serializado.
+
+from __future__ import annotations
+
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYS_PROGRAM_ID
+from solders.sysvar import RENT as SYSVAR_RENT_PUBKEY
+from solders.transaction import Transaction, VersionedTransaction
+
+# ----------------- CONSTANTES PUMP.FUN (solders) -----------------
+
+PUMP_FUN_PROGRAM = Pubkey.from_string("6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P")
+PUMP_GLOBAL = Pubkey.from_string("4wTV1YmiEkRvAtNtsSGPtUrqRYQMe5SKy2uB4Jjaxnjf")
+PUMP_FEE_RECIPIENT = Pubkey.from_string("CebN5WGQ4jvEPvsVU4EoHEpgzq1VV7AbicfhtW4xC9iM")
+PUMP_EVENT_AUTHORITY = Pubkey.from_string("Ce6TQqeHC9p8KetsN6JsjHK7UTZk7nasjjnr7XxXp9F1")
+TOKEN_PROGRAM = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+ASSOCIATED_TOKEN_PROGRAM = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+
+# Método BUY: bytes que van al principio de la instrucción
+PUMP_BUY_METHOD = bytes([0x66, 0x06, 0x3D, 0x12, 0x01, 0xDA, 0xEB, 0xEA])
+# Método SELL: sha256("global:sell")[:8] (discriminador Anchor)
+PUMP_SELL_METHOD = bytes([0x33, 0xE6, 0x85, 0xA4, 0x01, 0x7F, 0x83, 0xAD])
+
+# PumpFunSwapInstructionData { method_id: [u8;8], token_amount: u64, lamports: u64 }
+# (en SELL el segundo u64 es min_sol_output)
+_SWAP_ARGS = struct.Struct("<8sQQ")
+
+DEFAULT_PDA_CACHE_SIZE = 4096
+
+
+def derive_bonding_curve(mint: Pubkey) -> Pubkey:
+    """PDA [b"bonding-curve", mint] del programa de Pump.fun."""
+    pda, _ = Pubkey.find_program_address([b"bonding-curve", bytes(mint)], PUMP_FUN_PROGRAM)
+    return pda
+
+
+def derive_ata(owner: Pubkey, mint: Pubkey, token_program: Pubkey = TOKEN_PROGRAM) -> Pubkey:
+    """Associated token account (equivalente a get_associated_token_address)."""
+    pda, _ = Pubkey.find_program_address(
+        [bytes(owner), bytes(token_program), bytes(mint)],
+        ASSOCIATED_TOKEN_PROGRAM,
+    )
+    return pda
+
+
+@dataclass(frozen=True)
+class MintAccounts:
+    mint: Pubkey
+    bonding_curve: Pubkey
+    associated_bonding_curve: Pubkey
+    user_ata: Pubkey
+    # Las 12 cuentas de la instrucción BUY, en orden
+    buy_metas: Tuple[AccountMeta, ...]
+    # Las 12 cuentas de la instrucción SELL, en orden
+    sell_metas: Tuple[AccountMeta, ...]
+
+
+class PumpBuyTxBuilder:
+    """
+    Construye y firma TX de BUY / SELL de Pump.fun para un owner fijo.
+    """
+
+    def __init__(
+        self,
+        owner: Keypair,
+        *,
+        pda_cache_size: int = DEFAULT_PDA_CACHE_SIZE,
+    ) -> None:
+        self.owner = owner
+        self.owner_pubkey = owner.pubkey()
+        self.pda_cache_size = max(1, pda_cache_size)
+
+        # Template estático (no depende ni del owner ni del mint)
+        self._global_meta = AccountMeta(PUMP_GLOBAL, is_signer=False, is_writable=False)
+        self._fee_meta = AccountMeta(PUMP_FEE_RECIPIENT, is_signer=False, is_writable=True)
+        self._tail_metas: Tuple[AccountMeta, ...] = (
+            AccountMeta(SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(TOKEN_PROGRAM, is_signer=False, is_writable=False),
+            AccountMeta(SYSVAR_RENT_PUBKEY, is_signer=False, is_writable=False),
+            AccountMeta(PUMP_EVENT_AUTHORITY, is_signer=False, is_writable=False),
+            AccountMeta(PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+        )
+        # SELL: system, associated token program, token, event authority, program
+        self._sell_tail_metas: Tuple[AccountMeta, ...] = (
+            AccountMeta(SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(ASSOCIATED_TOKEN_PROGRAM, is_signer=False, is_writable=False),
+            AccountMeta(TOKEN_PROGRAM, is_signer=False, is_writable=False),
+            AccountMeta(PUMP_EVENT_AUTHORITY, is_signer=False, is_writable=False),
+            AccountMeta(PUMP_FUN_PROGRAM, is_signer=False, is_writable=False),
+        )
+
+        # Derivado del owner, una sola vez
+        self._owner_meta = AccountMeta(self.owner_pubkey, is_signer=True, is_writable=True)
+
+        # mint -> MintAccounts (LRU acotado)
+        self._mint_cache: "OrderedDict[Pubkey, MintAccounts]" = OrderedDict()
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+        # compute unit limit -> Instruction (el límite casi nunca cambia)
+        self._cu_limit_ixs: Dict[int, Instruction] = {}
+
+    # ------------- cuentas por mint -------------
+
+    def mint_accounts(
+        self,
+        mint: Pubkey,
+        bonding_curve: Optional[Pubkey] = None,
+        associated_bonding_curve: Optional[Pubkey] = None,
+    ) -> MintAccounts:
+        """
+        Cuentas del mint (memoizadas). Si Flintr trae ammData.* se pasan como
+        bonding_curve / associated_bonding_curve y se evita derivarlas.
+        """
+        cached = self._mint_cache.get(mint)
+        if cached is not None:
+            self._mint_cache.move_to_end(mint)
+            self.cache_hits += 1
+            return cached
+
+        self.cache_misses += 1
+
+        if bonding_curve is None:
+            bonding_curve = derive_bonding_curve(mint)
+        if associated_bonding_curve is None:
+            associated_bonding_curve = derive_ata(bonding_curve, mint)
+        user_ata = derive_ata(self.owner_pubkey, mint)
+
+        head = (
+            self._global_meta,
+            self._fee_meta,
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(bonding_curve, is_signer=False, is_writable=True),
+            AccountMeta(associated_bonding_curve, is_signer=False, is_writable=True),
+            AccountMeta(user_ata, is_signer=False, is_writable=True),
+            self._owner_meta,
+        )
+
+        accounts = MintAccounts(
+            mint=mint,
+            bonding_curve=bonding_curve,
+            associated_bonding_curve=associated_bonding_curve,
+            user_ata=user_ata,
+            buy_metas=head + self._tail_metas,
+            sell_metas=head + self._sell_tail_metas,
+        )
+
+        self._mint_cache[mint] = accounts
+        if len(self._mint_cache) > self.pda_cache_size:
+            self._mint_cache.popitem(last=False)
+        return accounts
+
+    # ------------- instrucción + TX -------------
+
+    def build_buy_ix(
+        self,
+        accounts: MintAccounts,
+        token_amount: int,
+        lamports: int,
+    ) -> Instruction:
+        data = _SWAP_ARGS.pack(PUMP_BUY_METHOD, int(token_amount), int(lamports))
+        return Instruction(PUMP_FUN_PROGRAM, data, list(accounts.buy_metas))
+
+    def build_sell_ix(
+        self,
+        accounts: MintAccounts,
+        token_amount: int,
+        min_sol_output: int,
+    ) -> Instruction:
+        data = _SWAP_ARGS.pack(PUMP_SELL_METHOD, int(token_amount), int(min_sol_output))
+        return Instruction(PUMP_FUN_PROGRAM, data, list(accounts.sell_metas))
+
+    def compute_budget_ixs(
+        self,
+        compute_unit_limit: int = 0,
+        compute_unit_price: int = 0,
+    ) -> List[Instruction]:
+        """
+        Instrucciones de compute budget (0 = no incluirla).
+        compute_unit_price va en micro-lamports por CU.
+        """
+        ixs: List[Instruction] = []
+        if compute_unit_limit > 0:
+            ix = self._cu_limit_ixs.get(compute_unit_limit)
+            if ix is None:
+                ix = self._cu_limit_ixs[compute_unit_limit] = set_compute_unit_limit(
+                    compute_unit_limit
+                )
+            ixs.append(ix)
+        if compute_unit_price > 0:
+            ixs.append(set_compute_unit_price(compute_unit_price))
+        return ixs
+
+    def build_v0_tx(
+        self,
+        instructions: Sequence[Instruction],
+        blockhash: Hash,
+        *,
+        compute_unit_limit: int = 0,
+        compute_unit_price: int = 0,
+        lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> VersionedTransaction:
+        """
+        VersionedTransaction (MessageV0) firmada por el owner. Sirve para
+        cualquier instrucción de Pump.fun (buy / sell).
+        """
+        ixs = self.compute_budget_ixs(compute_unit_limit, compute_unit_price)
+        ixs.extend(instructions)
+        message = MessageV0.try_compile(
+            self.owner_pubkey,
+            ixs,
+            list(lookup_tables),
+            blockhash,
+        )
+        return VersionedTransaction(message, [self.owner])
+
+    def build_buy_tx_v0(
+        self,
+        accounts: MintAccounts,
+        token_amount: int,
+        lamports: int,
+        blockhash: Hash,
+        *,
+        compute_unit_limit: int = 0,
+        compute_unit_price: int = 0,
+        lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> VersionedTransaction:
+        ix = self.build_buy_ix(accounts, token_amount, lamports)
+        return self.build_v0_tx(
+            [ix],
+            blockhash,
+            compute_unit_limit=compute_unit_limit,
+            compute_unit_price=compute_unit_price,
+            lookup_tables=lookup_tables,
+        )
+
+    def build_sell_tx_v0(
+        self,
+        accounts: MintAccounts,
+        token_amount: int,
+        min_sol_output: int,
+        blockhash: Hash,
+        *,
+        compute_unit_limit: int = 0,
+        compute_unit_price: int = 0,
+        lookup_tables: Sequence[AddressLookupTableAccount] = (),
+    ) -> VersionedTransaction:
+        ix = self.build_sell_ix(accounts, token_amount, min_sol_output)
+        return self.build_v0_tx(
+            [ix],
+            blockhash,
+            compute_unit_limit=compute_unit_limit,
+            compute_unit_price=compute_unit_price,
+            lookup_tables=lookup_tables,
+        )
+
+    def build_buy_tx(
+        self,
+        accounts: MintAccounts,
+        token_amount: int,
+        lamports: int,
+        blockhash: Hash,
+    ) -> Transaction:
+        """TX legacy firmada por el owner, lista para enviar."""
+        ix = self.build_buy_ix(accounts, token_amount, lamports)
+        return Transaction.new_signed_with_payer(
+            [ix],
+            self.owner_pubkey,
+            [self.owner],
+            blockhash,
+        )
@@ -9,46 +9,75 @@
 #
 # Modo real:
 #   - construye y envía la TX firmada con tu WALLET_PRIVATE_KEY
+#
+# Todo lo async corre en un ExecutorRuntime (un loop de larga vida en su
+# propio thread); buy_on_mint / sell_on_curve son la cara síncrona que usa
+# TradingEngine.
 
-import asyncio
+import concurrent.futures
 import logging
-import struct
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import base58
-from solana.publickey import PublicKey
 from solana.rpc.async_api import AsyncClient
-from solana.rpc.types import TxOpts
-from solana.system_program import SYS_PROGRAM_ID
-from solana.sysvar import SYSVAR_RENT_PUBKEY
-from solana.transaction import Transaction, TransactionInstruction, AccountMeta
-
-from spl.token.constants import TOKEN_PROGRAM_ID
-from spl.token.instructions import get_associated_token_address
 
+from solders.address_lookup_table_account import (
+    AddressLookupTable,
+    AddressLookupTableAccount,
+)
 from solders.keypair import Keypair
-from solders.pubkey import Pubkey as SPubkey
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction, VersionedTransaction
 
+from blockhash_cache import BlockhashCache
 from config import BotConfig
+from executor_runtime import ExecutorRuntime
+from fee_estimator import PriorityFeeEstimator
+from perf_metrics import LATENCY
+from tx_sender import TxFanoutSender
+from pump_tx_builder import (
+    ASSOCIATED_TOKEN_PROGRAM,
+    PUMP_BUY_METHOD,
+    PUMP_SELL_METHOD,
+    PUMP_EVENT_AUTHORITY,
+    PUMP_FEE_RECIPIENT,
+    PUMP_FUN_PROGRAM,
+    PUMP_GLOBAL,
+    PumpBuyTxBuilder,
+)
 
 logger = logging.getLogger(__name__)
 
+
+class CurveCompleteError(RuntimeError):
+    """La bonding curve está completa: el token graduó (vender por Jupiter)."""
+
+
+def _future_outcome(
+    future: "concurrent.futures.Future[Any]",
+) -> tuple[Optional[Any], Optional[BaseException]]:
+    if future.cancelled():
+        return None, concurrent.futures.CancelledError()
+    exc = future.exception()
+    return (None, exc) if exc is not None else (future.result(), None)
+
+
 # ----------------- CONSTANTES PUMP.FUN -----------------
 # Tomadas de listen-rs pump.rs (pump sniper) :contentReference[oaicite:4]{index=4}
+# (definidas como solders.Pubkey en pump_tx_builder)
 
-PUMP_FUN_PROGRAM_ID = PublicKey("6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P")
-PUMP_GLOBAL_ADDRESS = PublicKey("4wTV1YmiEkRvAtNtsSGPtUrqRYQMe5SKy2uB4Jjaxnjf")
-PUMP_FEE_ADDRESS = PublicKey("CebN5WGQ4jvEPvsVU4EoHEpgzq1VV7AbicfhtW4xC9iM")
-EVENT_AUTHORITY = PublicKey("Ce6TQqeHC9p8KetsN6JsjHK7UTZk7nasjjnr7XxXp9F1")
-ASSOCIATED_TOKEN_PROGRAM_ID = PublicKey(
-    "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
-)
+PUMP_FUN_PROGRAM_ID = PUMP_FUN_PROGRAM
+PUMP_GLOBAL_ADDRESS = PUMP_GLOBAL
+PUMP_FEE_ADDRESS = PUMP_FEE_RECIPIENT
+EVENT_AUTHORITY = PUMP_EVENT_AUTHORITY
+ASSOCIATED_TOKEN_PROGRAM_ID = ASSOCIATED_TOKEN_PROGRAM
 
-# Método BUY: bytes que van al principio de la instrucción
-PUMP_BUY_METHOD = bytes(
-    [0x66, 0x06, 0x3D, 0x12, 0x01, 0xDA, 0xEB, 0xEA]
-)
+# Todos los tokens de Pump.fun usan 6 decimales
+PUMP_TOKEN_DECIMALS = 6
+# Fee del programa sobre el SOL de salida en SELL (1%)
+PUMP_SELL_FEE_BPS = 100
 
 
 # ----------------- BONDING CURVE LAYOUT -----------------
@@ -120,6 +149,95 @@ def get_token_amount(
     return int(final_amount_out)
 
 
+def get_sol_amount(
+    virtual_sol_reserves: int,
+    virtual_token_reserves: int,
+    token_amount: int,
+    fee_bps: int = PUMP_SELL_FEE_BPS,
+) -> int:
+    """
+    Inversa de get_token_amount: lamports que salen al vender `token_amount`
+    (unidades base) en la bonding curve, ya descontado el fee del programa.
+    """
+    vs = int(virtual_sol_reserves)
+    vt = int(virtual_token_reserves)
+    amount_in = int(token_amount)
+
+    if amount_in <= 0 or vs <= 0 or vt <= 0:
+        return 0
+
+    sol_out = amount_in * vs // (vt + amount_in)
+    fee = sol_out * int(fee_bps) // 10_000
+    return int(max(0, sol_out - fee))
+
+
+# ----------------- CURVA INICIAL (sizing optimista sin RPC) -----------------
+# Reservas con las que nace toda bonding curve de Pump.fun (Global account)
+
+INITIAL_VIRTUAL_TOKEN_RESERVES = 1_073_000_000_000_000
+INITIAL_VIRTUAL_SOL_RESERVES = 30_000_000_000
+INITIAL_REAL_TOKEN_RESERVES = 793_100_000_000_000
+TOKEN_TOTAL_SUPPLY = 1_000_000_000_000_000
+
+# Posibles nombres de las reservas en el payload de Flintr (tokenData/ammData)
+_EVENT_RESERVE_KEYS = {
+    "virtual_sol_reserves": ("virtualSolReserves", "vSolInBondingCurve"),
+    "virtual_token_reserves": ("virtualTokenReserves", "vTokensInBondingCurve"),
+    "real_token_reserves": ("realTokenReserves",),
+}
+
+
+def initial_curve_layout() -> BondingCurveLayout:
+    return BondingCurveLayout(
+        blob1=0,
+        virtual_token_reserves=INITIAL_VIRTUAL_TOKEN_RESERVES,
+        virtual_sol_reserves=INITIAL_VIRTUAL_SOL_RESERVES,
+        real_token_reserves=INITIAL_REAL_TOKEN_RESERVES,
+        real_sol_reserves=0,
+        blob4=TOKEN_TOTAL_SUPPLY,
+        complete=False,
+    )
+
+
+def curve_layout_from_event(event: Dict[str, Any]) -> Optional[BondingCurveLayout]:
+    """
+    Reservas de la curva a partir del payload de Flintr, si vienen completas
+    (enteros en unidades base). Si falta alguna, None.
+    """
+    data = event.get("data") or {}
+    sources = (data.get("tokenData") or {}, data.get("ammData") or {})
+
+    values: Dict[str, int] = {}
+    for field_name, keys in _EVENT_RESERVE_KEYS.items():
+        for source in sources:
+            raw = next((source[k] for k in keys if source.get(k) not in (None, "")), None)
+            if raw is None:
+                continue
+            try:
+                values[field_name] = int(raw)
+            except (TypeError, ValueError):
+                continue
+            break
+
+    if "virtual_sol_reserves" not in values or "virtual_token_reserves" not in values:
+        return None
+    if values["virtual_sol_reserves"] <= 0 or values["virtual_token_reserves"] <= 0:
+        return None
+
+    return BondingCurveLayout(
+        blob1=0,
+        virtual_token_reserves=values["virtual_token_reserves"],
+        virtual_sol_reserves=values["virtual_sol_reserves"],
+        # sin real_token_reserves no limitamos por él
+        real_token_reserves=values.get(
+            "real_token_reserves", values["virtual_token_reserves"]
+        ),
+        real_sol_reserves=0,
+        blob4=0,
+        complete=False,
+    )
+
+
 # ----------------- EXECUTOR -----------------
 
 class PumpFunExecutor:
@@ -130,15 +248,55 @@ class PumpFunExecutor:
     - Construye la instrucción buy a partir del evento de Flintr
     """
 
-    def __init__(self, config: BotConfig) -> None:
+    def __init__(
+        self,
+        config: BotConfig,
+        runtime: Optional[ExecutorRuntime] = None,
+    ) -> None:
         self._config = config
+        # loop asyncio dedicado: cliente RPC, prefetchers y sender viven ahí
+        self._runtime = runtime or ExecutorRuntime(
+            name="pumpfun-executor",
+            max_in_flight=config.executor_max_in_flight,
+            default_timeout_sec=config.executor_timeout_sec,
+        )
         if not config.helius_rpc_url:
             logger.warning("HELIUS_RPC_URL no configurado, PumpFunExecutor limitado.")
         if not config.wallet_private_key:
             logger.warning("WALLET_PRIVATE_KEY no configurado, no se podrá firmar TX.")
         self._client: Optional[AsyncClient] = None
         self._owner_kp: Optional[Keypair] = None
-        self._owner_pubkey: Optional[PublicKey] = None
+        self._owner_pubkey: Optional[Pubkey] = None
+        self._builder: Optional[PumpBuyTxBuilder] = None
+        # priority fee por percentiles, muestreado en background
+        self._fee_estimator: Optional[PriorityFeeEstimator] = None
+        if config.priority_fee_enabled and config.helius_rpc_url:
+            self._fee_estimator = PriorityFeeEstimator(
+                config.helius_rpc_url,
+                [str(PUMP_FUN_PROGRAM_ID), str(PUMP_GLOBAL_ADDRESS), str(PUMP_FEE_ADDRESS)],
+                urgency_percentiles={
+                    "buy": config.priority_fee_percentile_buy,
+                    "sell": config.priority_fee_percentile_sell,
+                    "stop": config.priority_fee_percentile_stop,
+                },
+                refresh_interval_sec=config.priority_fee_refresh_sec,
+                min_fee=config.compute_unit_price_micro_lamports,
+                max_fee=config.priority_fee_max_micro_lamports,
+                default_fee=config.compute_unit_price_micro_lamports,
+            )
+
+        # envío en abanico + confirmación; el engine se engancha en on_tx_result
+        self._sender: Optional[TxFanoutSender] = None
+        self.on_tx_result: Optional[Callable[[Dict[str, Any]], None]] = None
+
+        # address lookup tables (LOOKUP_TABLES), cargadas una vez
+        self._lookup_tables: Optional[List[AddressLookupTableAccount]] = None
+
+        # blockhash refrescado en background (fuera del camino crítico)
+        self._blockhash_cache = BlockhashCache(
+            refresh_interval_sec=config.blockhash_refresh_ms / 1000.0,
+            max_age_sec=config.blockhash_max_age_sec,
+        )
 
     # ------------- Helpers internos -------------
 
@@ -147,9 +305,81 @@ class PumpFunExecutor:
             if not self._config.helius_rpc_url:
                 raise RuntimeError("HELIUS_RPC_URL requerido para PumpFunExecutor.")
             self._client = AsyncClient(self._config.helius_rpc_url)
+        # Los refrescos en background viven en el loop que usa el cliente
+        self._blockhash_cache.start(self._client)
+        if self._fee_estimator is not None:
+            self._fee_estimator.start()
         return self._client
 
-    def _get_owner(self) -> tuple[Keypair, PublicKey]:
+    def priority_fee(self, urgency: str = "buy") -> int:
+        """Micro-lamports por CU para `urgency` ("buy" / "sell" / "stop"), sin RPC."""
+        if self._fee_estimator is None:
+            return self._config.compute_unit_price_micro_lamports
+        return self._fee_estimator.fee_for(urgency)
+
+    def _get_sender(self) -> TxFanoutSender:
+        if self._sender is None:
+            endpoints = list(self._config.send_rpc_urls)
+            if not endpoints and self._config.helius_rpc_url:
+                endpoints = [self._config.helius_rpc_url]
+            self._sender = TxFanoutSender(
+                endpoints,
+                on_result=self._on_tx_result,
+                poll_interval_sec=self._config.confirm_poll_ms / 1000.0,
+                confirm_timeout_sec=self._config.confirm_timeout_sec,
+            )
+        return self._sender
+
+    def _on_tx_result(self, result: Dict[str, Any]) -> None:
+        # Fuera del loop: el engine toma su lock en handle_tx_result
+        if self.on_tx_result is not None:
+            self._runtime.call_sync(self.on_tx_result, result)
+
+    def _last_valid_height(self, tx: Union[VersionedTransaction, Transaction]) -> Optional[int]:
+        # el sender expira la TX por altura de bloque (fallback: CONFIRM_TIMEOUT_SEC)
+        return self._blockhash_cache.last_valid_for(tx.message.recent_blockhash)
+
+    def get_sender_stats(self) -> Optional[Dict[str, Any]]:
+        return self._sender.get_stats_snapshot() if self._sender is not None else None
+
+    def get_runtime_stats(self) -> Dict[str, Any]:
+        return self._runtime.get_stats_snapshot()
+
+    def start(self) -> None:
+        """
+        Arranca el runtime y abre el cliente RPC (con sus refrescos de
+        blockhash / fees) y el pool del sender antes de la primera compra.
+        """
+        self._runtime.start()
+        if self._config.helius_rpc_url:
+            try:
+                self._runtime.run(self._warm_up())
+            except Exception as exc:
+                logger.warning("No se pudo precalentar el cliente RPC: %r", exc)
+
+    async def _warm_up(self) -> None:
+        await self._get_client()
+        if self._config.mode == "real":
+            # crear el pool httpx (contexto SSL incluido) fuera de la 1ª compra
+            self._get_sender()._get_http()
+
+    def shutdown(self) -> None:
+        """Cierra clientes / tasks dentro del loop y para el runtime."""
+        self._runtime.stop(self.close)
+
+    async def close(self) -> None:
+        """Para los refrescos en background, el sender y cierra el cliente RPC."""
+        await self._blockhash_cache.stop()
+        if self._fee_estimator is not None:
+            await self._fee_estimator.stop()
+        if self._sender is not None:
+            await self._sender.close()
+            self._sender = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def _get_owner(self) -> tuple[Keypair, Pubkey]:
         if self._owner_kp is not None and self._owner_pubkey is not None:
             return self._owner_kp, self._owner_pubkey
 
@@ -159,21 +389,54 @@ class PumpFunExecutor:
         # Private key como bs58 (como en TypeScript: bs58.decode(...))
         secret_bytes = base58.b58decode(self._config.wallet_private_key)
         kp = Keypair.from_bytes(secret_bytes)
-        pub = PublicKey(bytes(kp.pubkey()))
+        pub = kp.pubkey()
         self._owner_kp = kp
         self._owner_pubkey = pub
         return kp, pub
 
+    def _get_builder(self) -> PumpBuyTxBuilder:
+        if self._builder is None:
+            wallet_kp, _ = self._get_owner()
+            self._builder = PumpBuyTxBuilder(wallet_kp)
+        return self._builder
+
+    async def _get_lookup_tables(self) -> List[AddressLookupTableAccount]:
+        if self._lookup_tables is not None:
+            return self._lookup_tables
+
+        tables: List[AddressLookupTableAccount] = []
+        if self._config.lookup_tables:
+            client = await self._get_client()
+            for address in self._config.lookup_tables:
+                try:
+                    key = Pubkey.from_string(address)
+                    resp = await client.get_account_info(key)
+                    if resp.value is None:
+                        logger.warning("Lookup table %s no encontrada.", address)
+                        continue
+                    table = AddressLookupTable.deserialize(bytes(resp.value.data))
+                    tables.append(
+                        AddressLookupTableAccount(key=key, addresses=list(table.addresses))
+                    )
+                except Exception as exc:
+                    logger.warning("No se pudo cargar lookup table %s: %r", address, exc)
+
+        self._lookup_tables = tables
+        return tables
+
     async def _fetch_bonding_curve_layout(
-        self, bonding_curve: PublicKey
+        self, bonding_curve: Pubkey
     ) -> BondingCurveLayout:
         client = await self._get_client()
         resp = await client.get_account_info(bonding_curve)
         if resp.value is None or resp.value.data is None:
             raise RuntimeError("No se pudo leer la cuenta de bonding curve.")
 
-        # resp.value.data es un tuple (data, encoding) en solana-py >=0.30
-        data_raw = resp.value.data[0]
+        # Con respuestas solders resp.value.data ya son bytes; en solana-py
+        # antiguo venía como tuple (data, encoding)
+        data_raw = resp.value.data
+        if isinstance(data_raw, (list, tuple)):
+            data_raw = data_raw[0]
         if isinstance(data_raw, str):
             # viene en base64
             import base64 as b64
@@ -186,107 +449,83 @@ class PumpFunExecutor:
         layout = BondingCurveLayout.parse(data_bytes[:49])
         return layout
 
-    # ------------- Construcción de la instrucción BUY -------------
-
-    def _build_pump_buy_instruction_from_event(
+    async def _resolve_curve_layout(
         self,
         event: Dict[str, Any],
-        owner: PublicKey,
-        user_ata: PublicKey,
-        bonding_curve: PublicKey,
-        associated_bonding_curve: PublicKey,
-        token_amount: int,
-        lamports: int,
-    ) -> TransactionInstruction:
+        bonding_curve: Pubkey,
+    ) -> tuple[BondingCurveLayout, str]:
         """
-        Construye la Instruction de BUY de Pump.fun a partir de:
-        - evento Flintr (para el mint)
-        - cuentas de bonding curve
-        - token_amount calculado
-        - lamports a gastar
-
-        Equivalente a make_pump_swap_ix(...) en listen-rs. :contentReference[oaicite:7]{index=7}
+        Devuelve (layout, origen) con origen en "event" | "initial" | "rpc".
         """
+        if self._config.optimistic_sizing:
+            layout = curve_layout_from_event(event)
+            if layout is not None:
+                return layout, "event"
 
-        mint_str = event["data"]["mint"]
-        mint = PublicKey(mint_str)
+            event_type = (event.get("event") or {}).get("type")
+            if event_type == "mint":
+                return initial_curve_layout(), "initial"
 
-        accounts = [
-            AccountMeta(pubkey=PUMP_GLOBAL_ADDRESS, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FEE_ADDRESS, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=mint, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=bonding_curve, is_signer=False, is_writable=True),
-            AccountMeta(
-                pubkey=associated_bonding_curve, is_signer=False, is_writable=True
-            ),
-            AccountMeta(pubkey=user_ata, is_signer=False, is_writable=True),
-            AccountMeta(pubkey=owner, is_signer=True, is_writable=True),
-            AccountMeta(pubkey=SYS_PROGRAM_ID, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=SYSVAR_RENT_PUBKEY, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=EVENT_AUTHORITY, is_signer=False, is_writable=False),
-            AccountMeta(pubkey=PUMP_FUN_PROGRAM_ID, is_signer=False, is_writable=False),
-        ]
-
-        # Datos: PumpFunSwapInstructionData { method_id: [u8;8], token_amount: u64, lamports: u64 }
-        data = PUMP_BUY_METHOD + struct.pack("<QQ", int(token_amount), int(lamports))
-
-        ix = TransactionInstruction(
-            program_id=PUMP_FUN_PROGRAM_ID,
-            data=data,
-            keys=accounts,
-        )
-        return ix
+        return await self._fetch_bonding_curve_layout(bonding_curve), "rpc"
 
     # ------------- API pública del executor -------------
 
     async def build_buy_tx_from_event(
         self,
         event: Dict[str, Any],
-    ) -> Transaction:
+        size_sol: Optional[float] = None,
+    ) -> Union[VersionedTransaction, Transaction]:
         """
         Construye una Transaction para comprar en Pump.fun el mint del evento Flintr.
-        Usa config.invest_amount_sol como cantidad fija de SOL.
+        Usa `size_sol` o, si no se pasa, config.invest_amount_sol.
+
+        Con USE_VERSIONED_TX (por defecto) sale como VersionedTransaction v0
+        con compute budget y lookup tables; si no, como Transaction legacy.
+        """
+        tx, _ = await self._build_buy_tx(event, size_sol)
+        return tx
+
+    async def _build_buy_tx(
+        self,
+        event: Dict[str, Any],
+        size_sol: Optional[float] = None,
+    ) -> tuple[Union[VersionedTransaction, Transaction], int]:
+        """
+        Como build_buy_tx_from_event, más los tokens que pide la instrucción
+        (unidades base, ya con el margen): la compra es de salida exacta, así
+        que es lo que recibe la wallet.
         """
 
         client = await self._get_client()
-        wallet_kp, owner = self._get_owner()
+        builder = self._get_builder()
 
         # 1) Mint del evento
-        mint_str = event["data"]["mint"]
-        mint = PublicKey(mint_str)
+        mint = Pubkey.from_string(event["data"]["mint"])
 
         # 2) Bonding curve & associated bonding curve
         #    Si Flintr trae ammData.*, úsalo. Si no, derivar como en listen-rs. :contentReference[oaicite:8]{index=8}
+        #    (memoizado por mint junto con el ATA del usuario)
         amm_data = event.get("data", {}).get("ammData", {}) or {}
         bonding_curve_str = amm_data.get("bondingCurve")
         associated_bonding_curve_str = amm_data.get("associatedBondingCurve")
 
-        if bonding_curve_str:
-            bonding_curve = PublicKey(bonding_curve_str)
-        else:
-            # Derivar PDA: [b"bonding-curve", mint]
-            from solana.publickey import PublicKey as SdkPK
-
-            bonding_curve, _ = PublicKey.find_program_address(
-                [b"bonding-curve", bytes(mint)],
-                PUMP_FUN_PROGRAM_ID,
-            )
-
-        if associated_bonding_curve_str:
-            associated_bonding_curve = PublicKey(associated_bonding_curve_str)
-        else:
-            associated_bonding_curve = get_associated_token_address(
-                bonding_curve, mint
-            )
-
-        # 3) ATA del usuario para ese mint
-        user_ata = get_associated_token_address(owner, mint)
+        accounts = builder.mint_accounts(
+            mint,
+            bonding_curve=(
+                Pubkey.from_string(bonding_curve_str) if bonding_curve_str else None
+            ),
+            associated_bonding_curve=(
+                Pubkey.from_string(associated_bonding_curve_str)
+                if associated_bonding_curve_str
+                else None
+            ),
+        )
 
-        # 4) Leer bonding curve y calcular token_amount según get_token_amount
-        layout = await self._fetch_bonding_curve_layout(bonding_curve)
+        # 3) Reservas de la curva: optimista (payload/curva inicial, 0 RPC)
+        #    o leyendo la cuenta on-chain si no hay datos
+        layout, source = await self._resolve_curve_layout(event, accounts.bonding_curve)
 
-        invest_sol = self._config.invest_amount_sol
+        invest_sol = self._config.invest_amount_sol if size_sol is None else size_sol
         lamports = int(invest_sol * 1_000_000_000)
 
         raw_token_amount = get_token_amount(
@@ -296,34 +535,129 @@ class PumpFunExecutor:
             lamports,
         )
 
-        # aplicar "slippage tonto" como listen-rs (90% del amount) :contentReference[oaicite:9]{index=9}
-        token_amount = int(raw_token_amount * 0.9)
+        if source == "rpc":
+            # aplicar "slippage tonto" como listen-rs (90% del amount) :contentReference[oaicite:9]{index=9}
+            token_amount = int(raw_token_amount * 0.9)
+        else:
+            # Reservas no verificadas: margen configurable (más amplio)
+            margin_bps = max(0, min(10_000, self._config.optimistic_margin_bps))
+            token_amount = raw_token_amount * (10_000 - margin_bps) // 10_000
+
+        logger.debug(
+            "Pump.fun BUY sizing (%s): lamports=%s token_amount=%s",
+            source,
+            lamports,
+            token_amount,
+        )
 
         if token_amount <= 0:
             raise RuntimeError("token_amount calculado es 0; no tiene sentido comprar.")
 
-        # 5) Construir Instruction BUY
-        ix = self._build_pump_buy_instruction_from_event(
-            event=event,
-            owner=owner,
-            user_ata=user_ata,
-            bonding_curve=bonding_curve,
-            associated_bonding_curve=associated_bonding_curve,
+        # 4) Construir y firmar la Transaction
+        #    (blockhash desde memoria; RPC sólo si stale)
+        cached = await self._blockhash_cache.get(client)
+
+        if not self._config.use_versioned_tx:
+            tx = builder.build_buy_tx(
+                accounts,
+                token_amount=token_amount,
+                lamports=lamports,
+                blockhash=cached.blockhash,
+            )
+            return tx, token_amount
+
+        tx = builder.build_buy_tx_v0(
+            accounts,
             token_amount=token_amount,
             lamports=lamports,
+            blockhash=cached.blockhash,
+            compute_unit_limit=self._config.compute_unit_limit,
+            compute_unit_price=self.priority_fee("buy"),
+            lookup_tables=await self._get_lookup_tables(),
         )
+        return tx, token_amount
+
+    # ------------- SELL directo en la bonding curve -------------
 
-        # 6) Construir Transaction
-        recent_blockhash_resp = await client.get_latest_blockhash()
-        blockhash = recent_blockhash_resp.value.blockhash
+    async def build_sell_tx(
+        self,
+        mint_str: str,
+        token_amount: int,
+        *,
+        urgency: str = "stop",
+    ) -> tuple[VersionedTransaction, int, int]:
+        """
+        Construye la TX de SELL en Pump.fun para `token_amount` (unidades base).
+        Devuelve (tx, sol_out_esperado, min_sol_output) en lamports.
+        Falla si la curva ya está completa (token graduado → usar Jupiter).
+        """
+        client = await self._get_client()
+        builder = self._get_builder()
 
-        tx = Transaction(fee_payer=owner, recent_blockhash=blockhash)
-        tx.add(ix)
+        accounts = builder.mint_accounts(Pubkey.from_string(mint_str))
 
-        # No la firmo aquí todavía; dejo que el caller decida
-        tx.sign(solana_keypair_from_solders(wallet_kp))
+        # El SELL necesita reservas reales para el min_sol_output
+        layout = await self._fetch_bonding_curve_layout(accounts.bonding_curve)
+        if layout.complete:
+            raise CurveCompleteError("Bonding curve completa; el token ya graduó.")
 
-        return tx
+        expected_sol = get_sol_amount(
+            layout.virtual_sol_reserves,
+            layout.virtual_token_reserves,
+            token_amount,
+        )
+        slippage_bps = max(0, min(10_000, self._config.slippage_bps))
+        min_sol_output = expected_sol * (10_000 - slippage_bps) // 10_000
+
+        cached = await self._blockhash_cache.get(client)
+        tx = builder.build_sell_tx_v0(
+            accounts,
+            token_amount=token_amount,
+            min_sol_output=min_sol_output,
+            blockhash=cached.blockhash,
+            compute_unit_limit=self._config.compute_unit_limit,
+            compute_unit_price=self.priority_fee(urgency),
+            lookup_tables=await self._get_lookup_tables(),
+        )
+        return tx, expected_sol, min_sol_output
+
+    async def send_sell(
+        self,
+        mint: str,
+        amount_tokens: float,
+        *,
+        urgency: str = "stop",
+    ) -> Dict[str, Any]:
+        """
+        Vende `amount_tokens` (unidades decimales) directamente en la bonding
+        curve, sin pasar por un agregador. Sólo en MODE=real.
+        """
+        if self._config.mode != "real":
+            raise RuntimeError("send_sell llamado en MODE != real")
+
+        token_amount = int(amount_tokens * (10 ** PUMP_TOKEN_DECIMALS))
+        if token_amount <= 0:
+            raise ValueError("token_amount calculado es 0; revisa amount_tokens")
+
+        with LATENCY.timer("tx_build"):
+            tx, expected_sol, min_sol_output = await self.build_sell_tx(
+                mint, token_amount, urgency=urgency
+            )
+        sig = str(tx.signatures[0])
+
+        with LATENCY.timer("tx_send"):
+            await self._get_sender().send(
+                bytes(tx),
+                sig,
+                context={"kind": "SELL", "mint": mint},
+                last_valid_block_height=self._last_valid_height(tx),
+            )
+        logger.info(f"Pump.fun SELL enviado, signature={sig}")
+        return {
+            "signature": sig,
+            "expected_sol_out": expected_sol / 1_000_000_000,
+            "min_sol_output": min_sol_output / 1_000_000_000,
+        }
 
     async def simulate_buy_from_event(
         self,
@@ -346,34 +680,169 @@ class PumpFunExecutor:
         event: Dict[str, Any],
     ) -> str:
         """
-        Envía la TX real a la red (usa Helius). Debes usarlo SOLO en MODE=real.
-        Devuelve la signature.
+        Envía la TX real a la red, en abanico a SEND_RPC_URLS (o Helius).
+        Debes usarlo SOLO en MODE=real. Devuelve la signature; el resultado
+        final (LANDED / FAILED / EXPIRED) llega después por on_tx_result.
         """
         if self._config.mode != "real":
             raise RuntimeError("send_buy_from_event llamado en MODE != real")
 
-        client = await self._get_client()
         tx = await self.build_buy_tx_from_event(event)
+        sig = str(tx.signatures[0])
+        await self._send_buy(tx, sig, event["data"]["mint"])
+        return sig
 
-        opts = TxOpts(skip_preflight=True, max_retries=2)
-        resp = await client.send_transaction(tx, opts=opts)
-        # resp.value es signature en algunos casos; en otros resp["result"]
-        # simplifiquemos:
-        try:
-            sig = resp.value  # solana-py 0.30+
-        except AttributeError:
-            sig = resp["result"]
+    async def _send_buy(
+        self,
+        tx: Union[VersionedTransaction, Transaction],
+        sig: str,
+        mint: str,
+    ) -> str:
+        with LATENCY.timer("tx_send"):
+            await self._get_sender().send(
+                bytes(tx),
+                sig,
+                context={"kind": "BUY", "mint": mint},
+                last_valid_block_height=self._last_valid_height(tx),
+            )
         logger.info(f"Pump.fun BUY enviado, signature={sig}")
-        return str(sig)
+        return sig
 
+    # ------------- API síncrona (TradingEngine) -------------
 
-# Helper para firmar con solders.Keypair en Transaction de solana-py
-def solana_keypair_from_solders(kp: Keypair):
-    """
-    Convierte una solders.Keypair a un objeto compatible con solana-py Transaction.sign.
-    Truco: solana-py usa su propia Keypair, pero acepta objetos con .public_key() y .secret_key().
-    """
-    from solana.keypair import Keypair as SPyKeypair
+    def _ensure_runtime(self) -> ExecutorRuntime:
+        if not self._runtime.running:
+            self._runtime.start()
+        return self._runtime
+
+    def buy_on_mint(self, event: Dict[str, Any], size_sol: float) -> Dict[str, Any]:
+        """
+        Compra el mint del evento. Sólo espera a que la TX esté construida y
+        firmada (sin RPC con sizing optimista + blockhash en caché); el envío
+        sigue en el runtime y su resultado llega por on_tx_result, así el
+        engine puede lanzar varias compras sin esperar confirmaciones.
+
+        - MODE=real:       {"signature", "amount_tokens", "entry_price_sol"}
+        - MODE=simulation: simula contra Helius en background y devuelve {}
+                           (el engine usa el precio de Flintr)
+        """
+        runtime = self._ensure_runtime()
+        mint = event["data"]["mint"]
+
+        if self._config.mode != "real":
+            future = runtime.submit(self.simulate_buy_from_event(event))
+            future.add_done_callback(
+                lambda f: self._log_simulation(mint, f)
+            )
+            return {}
+
+        build_started = time.perf_counter()
+        tx, token_amount = runtime.run(
+            self._build_buy_tx(event, size_sol),
+            timeout_sec=self._config.executor_build_timeout_sec,
+        )
+        LATENCY.record("tx_build", time.perf_counter() - build_started)
+        sig = str(tx.signatures[0])
+
+        future = runtime.submit(self._send_buy(tx, sig, mint))
+        future.add_done_callback(
+            lambda f: self._report_send_error(f, "BUY", mint, sig)
+        )
+
+        # tokens de la instrucción (con margen), no la cotización sin margen:
+        # las ventas posteriores no pueden pedir más de lo que hay en la wallet
+        amount_tokens = token_amount / (10 ** PUMP_TOKEN_DECIMALS)
+        return {
+            "signature": sig,
+            "amount_tokens": amount_tokens,
+            "entry_price_sol": size_sol / amount_tokens if amount_tokens > 0 else None,
+        }
+
+    def sell_on_curve(
+        self,
+        mint: str,
+        amount_tokens: float,
+        urgency: str = "stop",
+    ) -> Dict[str, Any]:
+        """Versión síncrona de send_sell (espera a que algún RPC acepte la TX)."""
+        return self._ensure_runtime().run(
+            self.send_sell(mint, amount_tokens, urgency=urgency)
+        )
+
+    def submit_sell_on_curve(
+        self,
+        mint: str,
+        amount_tokens: float,
+        on_sent: Callable[[Optional[Dict[str, Any]], Optional[BaseException]], None],
+        urgency: str = "stop",
+    ) -> None:
+        """
+        Como sell_on_curve pero sin bloquear al caller: la TX se construye y
+        envía en el runtime y `on_sent(result, exc)` se llama fuera del loop
+        cuando algún RPC la aceptó (o falló el envío). Si aterriza o no llega
+        después por on_tx_result.
+        """
+        runtime = self._ensure_runtime()
+        future = runtime.submit(self.send_sell(mint, amount_tokens, urgency=urgency))
+
+        def _done(f: "concurrent.futures.Future[Dict[str, Any]]") -> None:
+            result, exc = _future_outcome(f)
+            sig = self._sender.pending_signature("SELL", mint) if self._sender else None
+            if exc is not None and sig is not None:
+                # envío cancelado (timeout) con la TX ya en vuelo: no es un
+                # fallo, el estado final llega por on_tx_result
+                result, exc = {"signature": sig}, None
+            runtime.call_sync(on_sent, result, exc)
+
+        future.add_done_callback(_done)
+
+    def _report_send_error(
+        self,
+        future: "concurrent.futures.Future[Any]",
+        kind: str,
+        mint: str,
+        sig: str,
+    ) -> None:
+        # Ningún RPC aceptó la TX (o timeout): para el engine es un fallo final
+        if future.cancelled():
+            exc: Optional[BaseException] = concurrent.futures.CancelledError()
+        else:
+            exc = future.exception()
+        if exc is None:
+            return
+        if self._sender is not None and self._sender.is_pending(sig):
+            # cancelado por timeout pero la TX sigue en seguimiento: el confirm
+            # loop entrega el único estado final (LANDED / FAILED / EXPIRED / REJECTED)
+            logger.warning("Pump.fun %s %s sin ack a tiempo; sigue en seguimiento", kind, sig)
+            return
+        logger.warning("Pump.fun %s %s no enviado: %r", kind, sig, exc)
+        self._on_tx_result(
+            {
+                "kind": kind,
+                "mint": mint,
+                "signature": sig,
+                "status": "REJECTED",
+                "land_ms": None,
+                "slot": None,
+                "err": repr(exc),
+                "first_endpoint": None,
+            }
+        )
+
+    @staticmethod
+    def _log_simulation(mint: str, future: "concurrent.futures.Future[Any]") -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.warning("Simulación de BUY %s falló: %r", mint, exc)
+            return
+        result = future.result()
+        # respuesta solders (.value.err) o dict JSON-RPC
+        if isinstance(result, dict):
+            value = (result.get("result") or result).get("value") or {}
+            err = value.get("err")
+        else:
+            err = getattr(getattr(result, "value", None), "err", None)
+        logger.info("Simulación de BUY %s: err=%s", mint, err)
 
-    secret = bytes(kp)
-    return SPyKeypair.from_secret_key(secret)
@@ -0,0 +1,115 @@
+# strategy_host.py
+"""
+Varias estrategias (un TradingEngine por BotConfig / wallet) en un proceso.
+
+Todas comparten:
+  - un único FlintrClient: cada frame se parsea una vez y se despacha a los
+    handlers de todos los engines (la carga upstream es 1 stream). Cada
+    handler corre en su propio hilo (_HandlerWorker): el build síncrono de
+    una compra o la venta de una graduation de un engine no retrasan al
+    lector de Flintr ni a las demás estrategias
+  - un único feed de precios: open_mints() une los mints abiertos de todos
+    los engines y cada mint se consulta una sola vez por ciclo, aunque lo
+    tengan varias estrategias
+
+Cada engine mantiene sus posiciones, stats, executors y config aislados.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from flintr_client import FlintrClient
+    from trading_engine import TradingEngine
+
+logger = logging.getLogger(__name__)
+
+
+def as_engine_list(engines: Union["TradingEngine", "StrategyHost", Sequence["TradingEngine"]]) -> List["TradingEngine"]:
+    """Acepta un engine, una lista de engines o un StrategyHost."""
+    if isinstance(engines, StrategyHost):
+        return list(engines.engines.values())
+    if isinstance(engines, (list, tuple)):
+        return list(engines)
+    return [engines]  # type: ignore[list-item]
+
+
+def open_mints(engines: Sequence["TradingEngine"]) -> Dict[str, List["TradingEngine"]]:
+    """mint OPEN → engines que lo tienen abierto (deduplicado entre estrategias)."""
+    by_mint: Dict[str, List["TradingEngine"]] = {}
+    for engine in engines:
+        for p in engine.get_positions_snapshot():
+            if p.get("status") == "OPEN" and p.get("mint"):
+                by_mint.setdefault(p["mint"], []).append(engine)
+    return by_mint
+
+
+class _HandlerWorker:
+    """
+    Callback de Flintr que encola el evento y lo procesa en un hilo propio,
+    en orden de llegada. El hilo de Flintr sólo hace el put.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], None], name: str) -> None:
+        self.handler = handler
+        self.name = name
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        self._queue.put(event)
+
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            try:
+                self.handler(event)
+            except Exception as exc:
+                logger.warning("[StrategyHost] Error en %s: %r", self.name, exc)
+
+
+class StrategyHost:
+    def __init__(self, engines: Dict[str, "TradingEngine"]) -> None:
+        if not engines:
+            raise ValueError("StrategyHost necesita al menos un engine")
+        self.engines = dict(engines)
+        self.workers: List[_HandlerWorker] = []
+
+    @property
+    def primary(self) -> "TradingEngine":
+        return next(iter(self.engines.values()))
+
+    def __iter__(self) -> Iterator[Tuple[str, "TradingEngine"]]:
+        return iter(self.engines.items())
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def attach(self, flintr: "FlintrClient", platform: str = "pump.fun") -> None:
+        """
+        Registra los handlers de cada engine en el mismo FlintrClient, cada
+        uno detrás de su propio _HandlerWorker (mints y graduations aparte:
+        una venta lenta tampoco frena los snipes del mismo engine).
+        """
+        for name, engine in self.engines.items():
+            for event_type, handler in (
+                ("mint", engine.handle_flintr_mint),
+                ("graduation", engine.handle_flintr_graduation),
+            ):
+                worker = _HandlerWorker(handler, f"{name}-{event_type}")
+                self.workers.append(worker)
+                flintr.register(platform, event_type, worker)
+
+    def open_mints(self) -> Dict[str, List["TradingEngine"]]:
+        return open_mints(list(self.engines.values()))
+
+    def get_stats_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: engine.get_stats_snapshot() for name, engine in self.engines.items()}
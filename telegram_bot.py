@@ -1,25 +1,426 @@
 # telegram_bot.py
+import asyncio
+import dataclasses
 import logging
-from typing import Any
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
-from telegram import Update
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest, RetryAfter, TelegramError
 from telegram.ext import (
     Application,
+    CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
 )
+from telegram.helpers import escape_markdown
 
-from config import BotConfig
+from config import HOT_RELOAD_FIELDS, BotConfig, apply_overrides
+from perf_metrics import LATENCY, format_profile, sample_profile
 from trading_engine import TradingEngine
 
 
 logger = logging.getLogger(__name__)
 
+# Límite de Telegram para el texto de un mensaje
+MAX_MESSAGE_CHARS = 4096
+
+# /perf: duración máxima del muestreo
+PERF_MAX_SEC = 60.0
+
+# symbol / name vienen de metadata del token (no confiable): se recortan
+# antes de formatear para que ninguna fila se acerque al límite
+MAX_SYMBOL_CHARS = 32
+MAX_NAME_CHARS = 64
+
+
+def format_event(kind: str, data: Dict[str, Any]) -> str:
+    """Una línea por evento del engine (con [estrategia] si hay varias)."""
+    line = _format_event_line(kind, data)
+    engine = data.get("engine")
+    return f"[{engine}] {line}" if engine else line
+
+
+def _format_event_line(kind: str, data: Dict[str, Any]) -> str:
+    symbol = data.get("symbol") or str(data.get("mint", ""))[:6]
+    if kind == "OPEN":
+        return (
+            f"🟢 OPEN {symbol} — {data.get('size_sol', 0.0):.4f} SOL "
+            f"@ {data.get('entry_price_sol', 0.0):.10f}"
+        )
+    if kind == "CLOSE":
+        pnl = data.get("pnl_percent", 0.0)
+        icon = "✅" if pnl >= 0 else "🔻"
+        return (
+            f"{icon} CLOSE {symbol} — {data.get('reason')} "
+            f"{pnl:+.2f}% ({data.get('pnl_sol', 0.0):+.4f} SOL)"
+        )
+    if kind == "GRADUATION":
+        return f"🎓 GRADUATION {symbol}"
+    if kind == "BUY_FAILED":
+        return f"❌ BUY {symbol} {data.get('status')}: {data.get('err')}"
+    if kind == "SELL_FAILED":
+        return f"⚠️ SELL {symbol} {data.get('status')}: {data.get('err')} (reintentando)"
+    return f"{kind} {symbol}"
+
+
+class TokenBucket:
+    """Token bucket async: `rate` mensajes/seg con ráfagas de hasta `capacity`."""
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def penalize(self, seconds: float) -> None:
+        """Tras un RetryAfter de Telegram: vaciar el bucket `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class NotificationOutbox:
+    """
+    Outbox de notificaciones de trading hacia el chat de Telegram.
+
+    - push() es thread-safe y O(1): el engine lo llama desde el hilo de Flintr
+      o desde el loop del monitor sin esperar a la red.
+    - run() agrupa lo que llega durante `coalesce_sec` en un único digest.
+    - un TokenBucket respeta el rate limit por chat de Telegram.
+    - con más de `max_pending` eventos en cola se descartan los nuevos y el
+      siguiente digest incluye un resumen de lo descartado.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: Callable[[], Optional[int]],
+        *,
+        coalesce_sec: float = 2.0,
+        per_min: int = 20,
+        burst: int = 3,
+        max_pending: int = 500,
+    ) -> None:
+        self.bot = bot
+        # chat destino leído en cada envío (la config puede cambiar de versión)
+        self.chat_id = chat_id
+        self.coalesce_sec = coalesce_sec
+        self.max_pending = max(1, max_pending)
+        self.bucket = TokenBucket(per_min / 60.0, burst)
+
+        self._lock = threading.Lock()
+        self._queue: Deque[str] = deque()
+        self._dropped: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # estadísticas
+        self.pushed: int = 0
+        self.sent_messages: int = 0
+        self.dropped_total: int = 0
+        self.send_errors: int = 0
+
+    @classmethod
+    def from_config(
+        cls, bot: Bot, config: BotConfig, chat_id: Callable[[], Optional[int]]
+    ) -> "NotificationOutbox":
+        return cls(
+            bot,
+            chat_id,
+            coalesce_sec=config.telegram_notify_coalesce_sec,
+            per_min=config.telegram_notify_per_min,
+            burst=config.telegram_notify_burst,
+            max_pending=config.telegram_notify_max_pending,
+        )
+
+    # ------------- productor (cualquier hilo) -------------
+
+    def push_event(self, kind: str, data: Dict[str, Any]) -> None:
+        """Firma de TradingEngine.on_event."""
+        self.push(format_event(kind, data), kind)
+
+    def push(self, text: str, kind: str = "MSG") -> None:
+        with self._lock:
+            if len(self._queue) >= self.max_pending:
+                self._dropped[kind] += 1
+                self.dropped_total += 1
+                return
+            self._queue.append(text)
+            self.pushed += 1
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # loop cerrado
+
+    # ------------- consumidor (loop de Telegram) -------------
+
+    def _drain(self) -> Tuple[List[str], Counter]:
+        with self._lock:
+            lines = list(self._queue)
+            self._queue.clear()
+            dropped, self._dropped = self._dropped, Counter()
+        return lines, dropped
+
+    @staticmethod
+    def build_digests(lines: List[str], dropped: Counter) -> List[str]:
+        """Agrupa líneas en mensajes de <= MAX_MESSAGE_CHARS."""
+        if dropped:
+            detail = ", ".join(f"{k}={v}" for k, v in dropped.most_common())
+            lines = lines + [f"⚠️ {sum(dropped.values())} eventos descartados ({detail})"]
+        if len(lines) == 1:
+            return [lines[0][:MAX_MESSAGE_CHARS]]
+
+        messages: List[str] = []
+        current = [f"📬 {len(lines)} eventos"]
+        size = len(current[0])
+        for line in lines:
+            line = line[:MAX_MESSAGE_CHARS - 64]
+            if size + 1 + len(line) > MAX_MESSAGE_CHARS:
+                messages.append("\n".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            messages.append("\n".join(current))
+        return messages
+
+    async def _send(self, text: str) -> None:
+        chat_id = self.chat_id()
+        if chat_id is None:
+            return  # sin dueño todavía (/start lo fija)
+        for _ in range(2):
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                self.sent_messages += 1
+                return
+            except RetryAfter as exc:
+                delay = exc.retry_after
+                delay = delay.total_seconds() if hasattr(delay, "total_seconds") else float(delay)
+                logger.warning("Telegram rate limit: reintento en %.1fs", delay)
+                self.bucket.penalize(delay)
+            except TelegramError as exc:
+                self.send_errors += 1
+                logger.warning("Error enviando notificación: %r", exc)
+                return
+        self.send_errors += 1
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        with self._lock:
+            if self._queue:
+                self._wakeup.set()  # eventos previos al arranque del loop
+        while True:
+            await self._wakeup.wait()
+            # ventana de coalescing: lo que llegue mientras tanto va al mismo digest
+            await asyncio.sleep(self.coalesce_sec)
+            self._wakeup.clear()
+            lines, dropped = self._drain()
+            if not lines and not dropped:
+                continue
+            for text in self.build_digests(lines, dropped):
+                await self._send(text)
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._queue)
+        return {
+            "pending": pending,
+            "pushed": self.pushed,
+            "sent_messages": self.sent_messages,
+            "dropped": self.dropped_total,
+            "send_errors": self.send_errors,
+        }
+
+
+class PositionsRenderer:
+    """
+    /positions paginado con caché.
+
+    - Si engine.snapshot_version() no cambió, las páginas se sirven de caché.
+    - Si cambió, sólo se re-formatean las filas cuyos valores visibles
+      cambiaron (caché por mint).
+    - Cada página respeta `page_size` filas y el límite de 4096 caracteres.
+    Abiertas primero (más recientes arriba), luego el historial cerrado.
+    """
+
+    def __init__(self, engine: TradingEngine, page_size: int = 8, title: str = "Posiciones") -> None:
+        self.engine = engine
+        self.page_size = max(1, page_size)
+        self.title = title
+        self._version: Optional[int] = None
+        self._rows: Dict[str, Tuple[tuple, str]] = {}
+        self._pages: List[List[str]] = []
+        self._header_counts: Tuple[int, int] = (0, 0)
+
+        # estadísticas
+        self.rows_rendered: int = 0
+        self.cache_hits: int = 0
+
+    @staticmethod
+    def _row_key(p: Dict[str, Any]) -> tuple:
+        # sólo lo que se ve: mismo key => mismo texto
+        return (
+            p["symbol"],
+            p["name"],
+            p["status"],
+            f"{p['entry_price']:.10f}",
+            f"{p['last_price']:.10f}",
+            f"{p['pnl_percent']:.2f}",
+            f"{p['size_sol']:.4f}",
+        )
+
+    @staticmethod
+    def _format_row(p: Dict[str, Any]) -> str:
+        # Markdown legacy: dentro de `...` no hay escape posible para la
+        # comilla invertida; fuera, escape_markdown cubre _ * ` [
+        symbol = str(p["symbol"])[:MAX_SYMBOL_CHARS].replace("`", "'")
+        name = escape_markdown(str(p["name"])[:MAX_NAME_CHARS], version=1)
+        return (
+            f"• `{symbol}` ({name})\n"
+            f"  Mint: `{p['mint']}`\n"
+            f"  Estado: `{p['status']}`\n"
+            f"  Entrada: `{p['entry_price']:.10f} SOL`\n"
+            f"  Último: `{p['last_price']:.10f} SOL`\n"
+            f"  PnL: `{p['pnl_percent']:.2f}%` sobre precio entrada\n"
+            f"  Size: `{p['size_sol']:.4f} SOL`\n"
+        )
+
+    def _refresh(self) -> None:
+        version = self.engine.snapshot_version()
+        if version == self._version:
+            self.cache_hits += 1
+            return
+
+        snapshot = self.engine.get_positions_snapshot()
+        live = [p for p in snapshot if p["status"] != "CLOSED"]
+        closed = [p for p in snapshot if p["status"] == "CLOSED"]
+        live.sort(key=lambda p: p.get("opened_at") or 0.0, reverse=True)
+        closed.sort(key=lambda p: p.get("closed_at") or 0.0, reverse=True)
+
+        texts: List[str] = []
+        for p in live + closed:
+            key = self._row_key(p)
+            cached = self._rows.get(p["mint"])
+            if cached is None or cached[0] != key:
+                cached = (key, self._format_row(p))
+                self._rows[p["mint"]] = cached
+                self.rows_rendered += 1
+            texts.append(cached[1])
+
+        # páginas: page_size filas y dentro del límite de Telegram
+        budget = MAX_MESSAGE_CHARS - 128
+        pages: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for text in texts:
+            if current and (len(current) >= self.page_size or size + len(text) > budget):
+                pages.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += len(text) + 1
+        if current:
+            pages.append(current)
+
+        self._pages = pages
+        self._header_counts = (len(live), len(closed))
+        self._version = version
+
+    def page_count(self) -> int:
+        self._refresh()
+        return max(1, len(self._pages))
+
+    def render(self, page: int = 0) -> Tuple[str, int, int]:
+        """(texto Markdown, página efectiva, nº de páginas)."""
+        self._refresh()
+        if not self._pages:
+            return "No hay posiciones abiertas.", 0, 1
+
+        total = len(self._pages)
+        page = min(max(page, 0), total - 1)
+        n_live, n_closed = self._header_counts
+        lines = [
+            f"🏹 *{self.title}* — {n_live} abiertas, {n_closed} cerradas "
+            f"(pág. {page + 1}/{total})",
+            "",
+        ]
+        lines.extend(self._pages[page])
+        return "\n".join(lines), page, total
+
+    def keyboard(self, page: int, total: int) -> Optional[InlineKeyboardMarkup]:
+        if total <= 1:
+            return None
+        prefix = f"pos:{self.engine.name}:"
+        return InlineKeyboardMarkup(
+            [[
+                InlineKeyboardButton("◀", callback_data=f"{prefix}{max(page - 1, 0)}"),
+                InlineKeyboardButton(f"{page + 1}/{total}", callback_data=f"{prefix}{page}"),
+                InlineKeyboardButton("▶", callback_data=f"{prefix}{min(page + 1, total - 1)}"),
+            ]]
+        )
+
 
 class TelegramController:
-    def __init__(self, config: BotConfig, engine: TradingEngine) -> None:
-        self.config = config
+    """
+    Con varias estrategias (StrategyHost) los comandos aceptan el nombre
+    del engine como primer argumento (/positions swing 2, /set scalp …);
+    sin nombre actúan sobre el primero. /status, /activate y /deactivate
+    sin nombre cubren todos.
+    """
+
+    def __init__(
+        self,
+        config: BotConfig,
+        engine: TradingEngine,
+        engines: Optional[Dict[str, TradingEngine]] = None,
+    ) -> None:
         self.engine = engine
+        self.engines: Dict[str, TradingEngine] = engines or {engine.name: engine}
+        multi = len(self.engines) > 1
+        self.renderers: Dict[str, PositionsRenderer] = {
+            name: PositionsRenderer(
+                e,
+                config.positions_page_size,
+                title=f"Posiciones [{name}]" if multi else "Posiciones",
+            )
+            for name, e in self.engines.items()
+        }
+        # dashboard fijado (/live): tarea que edita el mensaje en intervalos
+        self._live_task: Optional[asyncio.Task] = None
+        # un solo /perf a la vez
+        self._perf_running = False
+
+    @property
+    def config(self) -> BotConfig:
+        # siempre la versión vigente (recarga en caliente)
+        return self.engine.config
+
+    def _pick(self, args: Optional[List[str]]) -> Tuple[str, TradingEngine, List[str]]:
+        """(nombre, engine, args restantes): el primer arg puede nombrar la estrategia."""
+        args = list(args or [])
+        if args and args[0] in self.engines:
+            name = args.pop(0)
+            return name, self.engines[name], args
+        return self.engine.name, self.engine, args
 
     # --------- handlers ---------
 
@@ -33,28 +434,49 @@ class TelegramController:
             f"Activo: `{self.engine.is_active()}`\n\n"
             "Comandos:\n"
             "• /status – estado del bot\n"
-            "• /positions – posiciones abiertas\n"
+            "• /positions [página] – posiciones (paginado)\n"
+            "• /live – dashboard fijado que se actualiza solo (on/off)\n"
+            "• /latency [reset] – p50/p95/p99 del camino crítico\n"
+            "• /perf <seg> – profiler por muestreo del proceso\n"
+            "• /config – parámetros recargables y versión\n"
+            "• /set clave=valor … [open] – recargar en caliente\n"
             "• /stats – rendimiento\n"
             "• /activate – activar entradas nuevas\n"
             "• /deactivate – pausar entradas\n"
             "• /mode – mostrar modo (SIM/REAL)\n"
         )
+        if len(self.engines) > 1:
+            txt += (
+                f"\nEstrategias: `{', '.join(self.engines)}` "
+                "(nombre como primer argumento, p.ej. `/positions <nombre>`)\n"
+            )
         await update.message.reply_text(txt, parse_mode="Markdown")
 
     async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not await self._is_authorized(update):
             return
 
-        stats = self.engine.get_stats_snapshot()
-        txt = (
-            f"📊 *Status Bot*\n\n"
-            f"Modo: `{stats['mode']}`\n"
-            f"Activo: `{stats['active']}`\n"
-            f"Posiciones abiertas: `{stats['num_positions']}`\n"
-            f"Trades totales: `{stats['total_trades']}`\n"
-            f"Win rate: `{stats['win_rate']:.1f}%`\n"
-            f"P&L realizado: `{stats['total_realized_pnl_sol']:.4f} SOL`\n"
-        )
+        multi = len(self.engines) > 1
+        blocks = []
+        for name, engine in self.engines.items():
+            stats = engine.get_stats_snapshot()
+            filters = stats.get("filters") or {}
+            rejections = filters.get("rejections") or {}
+            rejected_txt = (
+                ", ".join(f"{k}={v}" for k, v in rejections.items()) or "-"
+            )
+            blocks.append(
+                (f"*[{name}]*\n" if multi else "")
+                + f"Modo: `{stats['mode']}`\n"
+                f"Activo: `{stats['active']}`\n"
+                f"Posiciones abiertas: `{stats['num_positions']}`\n"
+                f"Trades totales: `{stats['total_trades']}`\n"
+                f"Win rate: `{stats['win_rate']:.1f}%`\n"
+                f"P&L realizado: `{stats['total_realized_pnl_sol']:.4f} SOL`\n"
+                f"Filtros: `{filters.get('passed', 0)}/{filters.get('checked', 0)}` pasan "
+                f"(rechazos: `{rejected_txt}`)\n"
+            )
+        txt = "📊 *Status Bot*\n\n" + "\n".join(blocks)
         await update.message.reply_text(txt, parse_mode="Markdown")
 
     async def positions(
@@ -63,24 +485,126 @@ class TelegramController:
         if not await self._is_authorized(update):
             return
 
-        positions = self.engine.get_positions_snapshot()
-        if not positions:
-            await update.message.reply_text("No hay posiciones abiertas.")
+        name, _, args = self._pick(context.args)
+        try:
+            page = int(args[0]) - 1 if args else 0
+        except ValueError:
+            page = 0
+
+        renderer = self.renderers[name]
+        text, page, total = renderer.render(page)
+        await update.message.reply_text(
+            text,
+            parse_mode="Markdown",
+            reply_markup=renderer.keyboard(page, total),
+        )
+
+    async def positions_page(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Botones ◀ ▶ de /positions: edita el mismo mensaje."""
+        query = update.callback_query
+        if query is None:
+            return
+        await query.answer()
+        if not await self._is_authorized(update):
             return
 
-        lines = ["🏹 *Posiciones abiertas:*", ""]
-        for p in positions:
-            lines.append(
-                f"• `{p['symbol']}` ({p['name']})\n"
-                f"  Mint: `{p['mint']}`\n"
-                f"  Estado: `{p['status']}`\n"
-                f"  Entrada: `{p['entry_price']:.10f} SOL`\n"
-                f"  Último: `{p['last_price']:.10f} SOL`\n"
-                f"  PnL: `{p['pnl_percent']:.2f}%` sobre precio entrada\n"
-                f"  Size: `{p['size_sol']:.4f} SOL`\n"
+        # pos:<estrategia>:<página>
+        _, name, page_txt = (query.data or "").split(":", 2)
+        renderer = self.renderers.get(name) or self.renderers[self.engine.name]
+        try:
+            page = int(page_txt)
+        except ValueError:
+            page = 0
+
+        text, page, total = renderer.render(page)
+        try:
+            await query.edit_message_text(
+                text,
+                parse_mode="Markdown",
+                reply_markup=renderer.keyboard(page, total),
             )
+        except BadRequest as exc:
+            # "message is not modified": misma página sin cambios
+            if "not modified" not in str(exc).lower():
+                logger.warning("Error editando /positions: %r", exc)
+
+    async def live(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if not await self._is_authorized(update):
+            return
+
+        if self._live_task is not None and not self._live_task.done():
+            self._live_task.cancel()
+            self._live_task = None
+            await update.message.reply_text("⏹ Dashboard en vivo detenido.")
+            return
+
+        if self.config.positions_live_sec <= 0:
+            await update.message.reply_text("Dashboard en vivo desactivado (POSITIONS_LIVE_SEC=0).")
+            return
+
+        name, _, _ = self._pick(context.args)
+        renderer = self.renderers[name]
+        text, _, _ = renderer.render(0)
+        message = await update.message.reply_text(text, parse_mode="Markdown")
+        try:
+            await message.pin(disable_notification=True)
+        except TelegramError as exc:
+            logger.warning("No se pudo fijar el dashboard: %r", exc)
+
+        self._live_task = asyncio.get_running_loop().create_task(
+            self._live_loop(message, self.config.positions_live_sec, renderer)
+        )
 
-        await update.message.reply_text("\n".join(lines), parse_mode="Markdown")
+    async def _live_loop(
+        self, message: Any, interval_sec: float, renderer: PositionsRenderer
+    ) -> None:
+        """Edita el mensaje fijado sólo cuando cambia la versión del snapshot."""
+        engine = renderer.engine
+        last_version = engine.snapshot_version()
+        last_text: Optional[str] = None
+        try:
+            while True:
+                await asyncio.sleep(interval_sec)
+                version = engine.snapshot_version()
+                if version == last_version:
+                    continue
+                last_version = version
+                text, _, _ = renderer.render(0)
+                if text == last_text:
+                    continue
+                try:
+                    await message.edit_text(text, parse_mode="Markdown")
+                    last_text = text
+                except RetryAfter as exc:
+                    delay = exc.retry_after
+                    await asyncio.sleep(
+                        delay.total_seconds() if hasattr(delay, "total_seconds") else float(delay)
+                    )
+                except BadRequest as exc:
+                    error = str(exc).lower()
+                    if "not modified" in error:
+                        continue
+                    if "can't parse entities" in error:
+                        # Markdown roto (p.ej. metadata rara): se sigue en texto plano
+                        logger.warning("Dashboard sin formato por Markdown inválido: %r", exc)
+                        try:
+                            await message.edit_text(text)
+                            last_text = text
+                        except RetryAfter:
+                            pass
+                        except BadRequest as plain_exc:
+                            logger.warning("Dashboard no actualizado: %r", plain_exc)
+                        continue
+                    # mensaje borrado / sin permisos: paramos el dashboard
+                    logger.warning("Dashboard en vivo detenido: %r", exc)
+                    return
+        finally:
+            try:
+                await message.unpin()
+            except TelegramError:
+                pass
 
     async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         await self.status(update, context)
@@ -88,23 +612,142 @@ class TelegramController:
     async def activate(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not await self._is_authorized(update):
             return
-        self.engine.set_active(True)
-        await update.message.reply_text("✅ Bot activado (aceptando nuevas entradas).")
+        targets = self._targets(context.args)
+        for engine in targets.values():
+            engine.set_active(True)
+        await update.message.reply_text(
+            f"✅ Bot activado (aceptando nuevas entradas){self._names_suffix(targets)}."
+        )
 
     async def deactivate(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
         if not await self._is_authorized(update):
             return
-        self.engine.set_active(False)
-        await update.message.reply_text("⏸ Bot pausado (no entra en nuevos tokens).")
+        targets = self._targets(context.args)
+        for engine in targets.values():
+            engine.set_active(False)
+        await update.message.reply_text(
+            f"⏸ Bot pausado (no entra en nuevos tokens){self._names_suffix(targets)}."
+        )
+
+    def _targets(self, args: Optional[List[str]]) -> Dict[str, TradingEngine]:
+        """Estrategia nombrada en args, o todas."""
+        if args and args[0] in self.engines:
+            return {args[0]: self.engines[args[0]]}
+        return self.engines
+
+    def _names_suffix(self, targets: Dict[str, TradingEngine]) -> str:
+        return f" [{', '.join(targets)}]" if len(self.engines) > 1 else ""
 
     async def mode(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not await self._is_authorized(update):
             return
-        await update.message.reply_text(
-            f"Modo actual: `{self.config.mode}`", parse_mode="Markdown"
+        if len(self.engines) == 1:
+            txt = f"Modo actual: `{self.config.mode}`"
+        else:
+            txt = "\n".join(
+                f"[{name}] modo: `{engine.config.mode}`" for name, engine in self.engines.items()
+            )
+        await update.message.reply_text(txt, parse_mode="Markdown")
+
+    async def latency(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if not await self._is_authorized(update):
+            return
+
+        if context.args and context.args[0].lower() == "reset":
+            LATENCY.reset()
+            await update.message.reply_text("🔄 Histogramas de latencia reiniciados.")
+            return
+
+        snapshot = LATENCY.snapshot()
+        if not snapshot:
+            await update.message.reply_text("Sin muestras de latencia todavía.")
+            return
+
+        width = max(len(name) for name in snapshot)
+        lines = [f"{'etapa'.ljust(width)}  {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+        for name, h in snapshot.items():
+            lines.append(
+                f"{name.ljust(width)}  {h['count']:>7} {h['p50_ms']:>8.2f} "
+                f"{h['p95_ms']:>8.2f} {h['p99_ms']:>8.2f} {h['max_ms']:>8.2f}"
+            )
+        txt = "⏱ *Latencias (ms)*\n```\n" + "\n".join(lines) + "\n```"
+        await update.message.reply_text(txt, parse_mode="Markdown")
+
+    async def perf(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if not await self._is_authorized(update):
+            return
+
+        try:
+            seconds = float(context.args[0]) if context.args else 5.0
+        except ValueError:
+            await update.message.reply_text("Uso: /perf <segundos>")
+            return
+        seconds = min(max(seconds, 0.5), PERF_MAX_SEC)
+
+        if self._perf_running:
+            await update.message.reply_text("Ya hay un /perf en curso.")
+            return
+
+        self._perf_running = True
+        try:
+            await update.message.reply_text(f"🔬 Muestreando {seconds:.1f}s…")
+            # el muestreo bloquea: fuera del loop de Telegram
+            result = await asyncio.to_thread(sample_profile, seconds)
+        finally:
+            self._perf_running = False
+
+        body = "\n".join(format_profile(result))[: MAX_MESSAGE_CHARS - 128]
+        txt = f"🔬 *Perf* ({result['samples']} muestras, {seconds:.1f}s)\n```\n{body}\n```"
+        await update.message.reply_text(txt, parse_mode="Markdown")
+
+    async def show_config(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if not await self._is_authorized(update):
+            return
+
+        engine_name, engine, _ = self._pick(context.args)
+        config = engine.config
+        lines = [f"{name} = {getattr(config, name)!r}" for name in HOT_RELOAD_FIELDS]
+        label = f" [{engine_name}]" if len(self.engines) > 1 else ""
+        txt = (
+            f"⚙️ *Config{label} v{engine.config_version}*\n```\n"
+            + "\n".join(lines)
+            + "\n```\nCambiar: `/set stop_loss_percent=25 [open]`"
         )
+        await update.message.reply_text(txt, parse_mode="Markdown")
+
+    async def set_config(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        /set clave=valor [clave=valor …] [open]
+        `open` aplica también SL / TS a las posiciones abiertas.
+        """
+        if not await self._is_authorized(update):
+            return
+
+        _, engine, args = self._pick(context.args)
+        apply_to_open = "open" in (a.lower() for a in args)
+        changes: Dict[str, str] = {}
+        for arg in args:
+            if "=" in arg:
+                key, value = arg.split("=", 1)
+                changes[key] = value
+
+        if not changes:
+            await update.message.reply_text("Uso: /set clave=valor [clave=valor …] [open]")
+            return
+
+        try:
+            config = apply_overrides(engine.config, changes)
+        except ValueError as exc:
+            await update.message.reply_text(f"❌ Cambios rechazados: {exc}")
+            return
+
+        updated = engine.apply_config(config, apply_to_open=apply_to_open)
+        txt = f"✅ Config v{engine.config_version} activa"
+        if apply_to_open:
+            txt += f" (SL/TS aplicados a {updated} posiciones desde el próximo tick)"
+        await update.message.reply_text(txt)
 
     # --------- auth ---------
 
@@ -112,7 +755,10 @@ class TelegramController:
         if self.config.telegram_chat_id is None:
             # primera vez: fijamos chat como dueño
             if update.effective_chat:
-                self.config.telegram_chat_id = update.effective_chat.id
+                for engine in self.engines.values():
+                    engine.apply_config(
+                        dataclasses.replace(engine.config, telegram_chat_id=update.effective_chat.id)
+                    )
                 return True
             return False
 
@@ -126,17 +772,52 @@ class TelegramController:
         return False
 
 
-async def build_application(config: BotConfig, engine: TradingEngine) -> Application:
+async def build_application(
+    config: BotConfig,
+    engine: TradingEngine,
+    engines: Optional[Dict[str, TradingEngine]] = None,
+) -> Application:
     app = Application.builder().token(config.telegram_bot_token).build()
 
-    ctrl = TelegramController(config, engine)
+    ctrl = TelegramController(config, engine, engines)
 
     app.add_handler(CommandHandler("start", ctrl.start))
     app.add_handler(CommandHandler("status", ctrl.status))
     app.add_handler(CommandHandler("positions", ctrl.positions))
+    app.add_handler(CallbackQueryHandler(ctrl.positions_page, pattern=r"^pos:[^:]+:\d+$"))
+    app.add_handler(CommandHandler("live", ctrl.live))
+    app.add_handler(CommandHandler("latency", ctrl.latency))
+    app.add_handler(CommandHandler("perf", ctrl.perf))
+    app.add_handler(CommandHandler("config", ctrl.show_config))
+    app.add_handler(CommandHandler("set", ctrl.set_config))
     app.add_handler(CommandHandler("stats", ctrl.stats))
     app.add_handler(CommandHandler("activate", ctrl.activate))
     app.add_handler(CommandHandler("deactivate", ctrl.deactivate))
     app.add_handler(CommandHandler("mode", ctrl.mode))
 
     return app
+
+
+def start_notifications(
+    app: Application,
+    config: BotConfig,
+    engine: TradingEngine,
+    engines: Optional[Dict[str, TradingEngine]] = None,
+) -> NotificationOutbox:
+    """
+    Conecta los eventos de los engines a un único outbox (un solo rate limit
+    para el chat) y lanza su tarea en el loop actual.
+    """
+    outbox = NotificationOutbox.from_config(
+        app.bot, config, lambda: engine.config.telegram_chat_id
+    )
+    engines = engines or {engine.name: engine}
+    for name, e in engines.items():
+        if len(engines) > 1:
+            e.on_event = lambda kind, data, name=name: outbox.push_event(
+                kind, {**data, "engine": name}
+            )
+        else:
+            e.on_event = outbox.push_event
+    asyncio.get_running_loop().create_task(outbox.run())
+    return outbox
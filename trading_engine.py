@@ -3,14 +3,36 @@ from __future__ import annotations
 
 import threading
 import time
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
 
 from config import BotConfig
+from mint_filters import MintFilterPipeline
+from mint_scoring import MintBatchScorer
 from models import Position, PositionStatus
-from pumpfun_executor import PumpFunExecutor  # si aún no tienes este archivo, puedes dejarlo sin usar
+from perf_metrics import LATENCY
 
 if TYPE_CHECKING:
+    # sólo tipos: los executors (solana-py, jup SDK) se importan en main según MODE
     from jupiter_executor import JupiterExecutor
+    from mint_info import MintInfoCache
+    from pumpfun_executor import PumpFunExecutor
+
+
+def _price_pnl(pos: Position) -> Tuple[float, float]:
+    """(último precio, % PnL) tal como se muestran en /positions."""
+    # Para PnL instantáneo usamos last_price si existe, si no entry.
+    last_price = pos.last_price_sol or pos.entry_price_sol
+    if pos.entry_price_sol > 0 and last_price > 0:
+        pnl_percent = (last_price - pos.entry_price_sol) / pos.entry_price_sol * 100.0
+    else:
+        pnl_percent = 0.0
+    return last_price, pnl_percent
+
+
+def _shown_price_pnl(pos: Position) -> Tuple[str, str]:
+    # mismo redondeo que PositionsRenderer (telegram_bot)
+    last_price, pnl_percent = _price_pnl(pos)
+    return f"{last_price:.10f}", f"{pnl_percent:.2f}"
 
 
 class TradingEngine:
@@ -27,16 +49,59 @@ class TradingEngine:
     def __init__(
         self,
         config: BotConfig,
-        executor: Optional[PumpFunExecutor] = None,
+        executor: "Optional[PumpFunExecutor]" = None,
         jupiter_executor: "Optional[JupiterExecutor]" = None,
+        mint_filters: Optional[MintFilterPipeline] = None,
+        clock: Callable[[], float] = time.time,
+        mint_info: "Optional[MintInfoCache]" = None,
+        name: str = "main",
     ) -> None:
         self.config = config
+        # nombre de la estrategia (varios engines en un proceso: StrategyHost)
+        self.name = name
         self.executor = executor
         self.jupiter_executor = jupiter_executor
+        # decimals / supply / token program, precargados al abrir posición
+        self.mint_info = mint_info
         self._lock = threading.Lock()
 
+        # reloj inyectable (el backtester usa un reloj simulado)
+        self._clock = clock
+
+        # resultados de TX on-chain (LANDED / FAILED / EXPIRED) del executor
+        if executor is not None:
+            executor.on_tx_result = self.handle_tx_result
+
+        # screening barato antes del lock / executor
+        self.mint_filters = (
+            mint_filters
+            if mint_filters is not None
+            else MintFilterPipeline.from_config(config)
+        )
+
+        # scoring micro-batch opcional (SCORING_WINDOW_MS > 0)
+        self.mint_scorer: Optional[MintBatchScorer] = None
+        if config.scoring_window_ms > 0:
+            self.mint_scorer = MintBatchScorer(
+                window_sec=config.scoring_window_ms / 1000.0,
+                on_selected=self._enter_selected_mints,
+                free_slots=self.get_free_slots,
+                min_score=config.scoring_min_score,
+            )
+
         # mint -> Position
         self._positions: Dict[str, Position] = {}
+        # nº de posiciones OPEN (las cerradas no ocupan slot)
+        self._open_count: int = 0
+        # compras en curso (slot reservado) -> resultado de TX llegado antes
+        # de registrar la posición
+        self._pending_buys: Dict[str, Optional[Dict[str, Any]]] = {}
+        # salidas (SL / TS) ya marcadas CLOSING esperando flush_exits()
+        self._exit_queue: List[Tuple[Position, str]] = []
+        # sube con cada cambio visible en get_positions_snapshot (caché de /positions)
+        self._snapshot_version: int = 0
+        # versión de BotConfig vigente (1 = la de arranque)
+        self.config_version: int = 1
 
         # estadísticas globales
         self._total_realized_pnl_sol: float = 0.0
@@ -47,6 +112,11 @@ class TradingEngine:
         # bandera para aceptar nuevas posiciones
         self.active: bool = True
 
+        # eventos de trading (OPEN / CLOSE / GRADUATION / BUY_FAILED / SELL_FAILED)
+        # hacia fuera, p.ej. el outbox de Telegram. Debe ser barato y no bloquear:
+        # se llama con el lock tomado.
+        self.on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
     # -------------------------------------------------------------------------
     # Hooks desde Flintr
     # -------------------------------------------------------------------------
@@ -56,12 +126,44 @@ class TradingEngine:
         Llamado por FlintrClient cuando llega un MINT de pump.fun.
         Aquí decidimos si entrar y abrimos posición.
         """
+        started = time.perf_counter()
+        try:
+            self._handle_flintr_mint(event)
+        finally:
+            LATENCY.record("flintr_to_decision", time.perf_counter() - started)
+
+    def _handle_flintr_mint(self, event: Dict[str, Any]) -> None:
         data = event.get("data", {})
         mint = data.get("mint")
 
         if not mint:
             return
 
+        # Filtros pre-trade: antes de tomar el lock y de cualquier RPC
+        rejected_by = self.mint_filters.check(event)
+        if rejected_by is not None:
+            print(f"[Engine] Mint {mint} rechazado por filtro '{rejected_by}'.")
+            return
+
+        # Con scoring activo, el mint espera al cierre de la ventana del batch
+        if self.mint_scorer is not None:
+            self.mint_scorer.submit(event)
+            return
+
+        self._enter_from_event(event)
+
+    def _enter_selected_mints(self, events: List[Dict[str, Any]]) -> None:
+        """Callback del MintBatchScorer: entra en los mints mejor puntuados."""
+        for event in events:
+            self._enter_from_event(event)
+
+    def _enter_from_event(self, event: Dict[str, Any]) -> None:
+        """
+        Abre posición para un MINT que ya pasó filtros (y scoring, si aplica).
+        """
+        data = event.get("data", {})
+        mint = data.get("mint")
+
         meta = data.get("metaData") or {}
         token_data = data.get("tokenData") or {}
 
@@ -74,34 +176,49 @@ class TradingEngine:
         except (TypeError, ValueError):
             entry_price = 0.0
 
+        # Reserva del slot bajo el lock; la compra (build + envío) va fuera de
+        # él, así varias compras y los ticks de precio no se esperan entre sí
         with self._lock:
             if not self.active:
                 print(f"[Engine] Ignorando {symbol} (bot desactivado)")
                 return
 
-            if mint in self._positions:
+            if mint in self._positions or mint in self._pending_buys:
                 print(f"[Engine] Ya existe posición para mint {mint}, ignorando.")
                 return
 
-            if len(self._positions) >= self.config.max_active_trades:
+            if self._free_slots_locked() <= 0:
                 print("[Engine] Max active trades alcanzado, ignorando nuevo mint.")
                 return
 
+            self._pending_buys[mint] = None
             size_sol = self.config.invest_amount_sol
 
-            # Intentamos usar el executor de Pump.fun (DRY_RUN o real)
-            amount_tokens = 0.0
-            if self.executor is not None:
-                try:
-                    result = self.executor.buy_on_mint(event, size_sol)
-                    entry_price_from_exec = result.get("entry_price_sol")
-                    amount_from_exec = result.get("amount_tokens")
-                    if isinstance(entry_price_from_exec, (int, float)):
-                        entry_price = float(entry_price_from_exec)
-                    if isinstance(amount_from_exec, (int, float)):
-                        amount_tokens = float(amount_from_exec)
-                except Exception as exc:
-                    print("[Engine] Error en PumpFunExecutor.buy_on_mint:", repr(exc))
+        # Intentamos usar el executor de Pump.fun (DRY_RUN o real)
+        amount_tokens = 0.0
+        buy_signature: Optional[str] = None
+        buy_failed = False
+        if self.executor is not None:
+            try:
+                result = self.executor.buy_on_mint(event, size_sol)
+                entry_price_from_exec = result.get("entry_price_sol")
+                amount_from_exec = result.get("amount_tokens")
+                if isinstance(entry_price_from_exec, (int, float)):
+                    entry_price = float(entry_price_from_exec)
+                if isinstance(amount_from_exec, (int, float)):
+                    amount_tokens = float(amount_from_exec)
+                if result.get("signature"):
+                    buy_signature = str(result["signature"])
+            except Exception as exc:
+                print("[Engine] Error en PumpFunExecutor.buy_on_mint:", repr(exc))
+                # sin TX enviada no hay posición real que reflejar
+                buy_failed = self.config.mode == "real"
+
+        with self._lock:
+            # resultado de la TX que llegó antes de registrar la posición
+            early_result = self._pending_buys.pop(mint, None)
+            if buy_failed:
+                return
 
             # SI MODE=simulation → DRY_RUN (paper trading)
             # SI MODE=real → el executor hace compra real,
@@ -113,29 +230,104 @@ class TradingEngine:
                 entry_price_sol=entry_price,
                 size_sol=size_sol,
                 amount_tokens=amount_tokens if amount_tokens > 0 else None,
+                buy_signature=buy_signature,
             )
+            if early_result is not None:
+                self._apply_buy_result_locked(early_result)
+
+    def handle_tx_result(self, result: Dict[str, Any]) -> None:
+        """
+        Resultado final de una TX enviada por el executor (TxFanoutSender).
+        Si la compra no aterrizó, la posición espejo no existe on-chain:
+        se cierra sin contarla en las estadísticas. Las ventas en la curva
+        se resuelven en _apply_sell_result.
+        """
+        if result.get("kind") == "SELL":
+            self._apply_sell_result(result)
+            return
+
+        if result.get("kind") != "BUY":
+            return
+
+        with self._lock:
+            mint = result.get("mint")
+            if mint in self._pending_buys:
+                # la compra aún se está registrando: se aplica al crear la posición
+                self._pending_buys[mint] = result
+                return
+            self._apply_buy_result_locked(result)
+
+    def _apply_buy_result_locked(self, result: Dict[str, Any]) -> None:
+        mint = result.get("mint")
+        status = result.get("status")
+
+        pos = self._positions.get(mint) if mint else None
+        if pos is None:
+            return
+
+        signature = str(result["signature"]) if result.get("signature") else None
+        if pos.buy_signature and signature and signature != pos.buy_signature:
+            # resultado de otra TX (no la de esta posición)
+            return
+        pos.buy_status = status
+        if signature:
+            pos.buy_signature = signature
+
+        if status == "LANDED":
+            print(
+                f"[Engine] ✅ BUY {pos.symbol} confirmado en "
+                f"{result.get('land_ms') or 0:.0f} ms "
+                f"(primero: {result.get('first_endpoint')})"
+            )
+            if pos.status == PositionStatus.CLOSED and (pos.close_reason or "").startswith("BUY "):
+                # se dio por fallida (envío cancelado / timeout) pero aterrizó:
+                # los tokens están en la wallet, la posición vuelve a OPEN
+                print(f"[Engine] ⚠️ BUY {pos.symbol} aterrizó tras darse por fallida; reabierta.")
+                pos.status = PositionStatus.OPEN
+                pos.closed_at = None
+                pos.close_reason = None
+                self._open_count += 1
+                self._snapshot_version += 1
+                self._track_exit(pos)
+                self._emit(
+                    "OPEN",
+                    mint=mint,
+                    symbol=pos.symbol,
+                    size_sol=pos.size_sol,
+                    entry_price_sol=pos.entry_price_sol,
+                )
+            return
+
+        print(f"[Engine] ❌ BUY {pos.symbol} {status}: {result.get('err')}")
+        self._emit(
+            "BUY_FAILED",
+            mint=mint,
+            symbol=pos.symbol,
+            status=status,
+            err=result.get("err"),
+        )
+        if pos.status == PositionStatus.OPEN:
+            pos.status = PositionStatus.CLOSED
+            pos.closed_at = self._clock()
+            pos.close_reason = f"BUY {status}"
+            self._snapshot_version += 1
+            self._open_count -= 1
+            self._untrack_exit(pos)
 
     def handle_flintr_graduation(self, event: Dict[str, Any]) -> None:
         """
         Llamado por FlintrClient cuando llega una GRADUATION de pump.fun.
 
         - SIMULATION: cerramos la posición simulada al precio que tengamos.
-        - REAL + JupiterExecutor: intentamos vender vía Jupiter Ultra API y luego
-          cerramos la posición en nuestras estadísticas internas.
+        - REAL + JupiterExecutor: se vende vía exit_positions (sell_many): la
+          posición queda CLOSING durante la venta, sólo se cierra si Jupiter
+          devuelve Success y, si no, vuelve a OPEN con la salida aún precalentada.
         """
         data = event.get("data") or {}
         mint = data.get("mint")
         if not mint:
             return
 
-        token_data = data.get("tokenData") or {}
-        decimals_raw = token_data.get("decimals")
-
-        try:
-            decimals = int(decimals_raw) if decimals_raw is not None else 6
-        except (TypeError, ValueError):
-            decimals = 6
-
         with self._lock:
             pos = self._positions.get(mint)
             if not pos or pos.status != PositionStatus.OPEN:
@@ -143,9 +335,9 @@ class TradingEngine:
                 return
 
             symbol = pos.symbol
-            amount_tokens = pos.amount_tokens
 
         print(f"[Engine] 🎓 Graduation detectada para {symbol} ({mint})")
+        self._emit("GRADUATION", mint=mint, symbol=symbol)
 
         # Si estamos en modo simulación o no hay JupiterExecutor → sólo cerramos simulando
         if self.config.mode != "real" or self.jupiter_executor is None:
@@ -154,27 +346,14 @@ class TradingEngine:
             return
 
         # Modo REAL + JupiterExecutor → vender token -> SOL
-        try:
-            result = self.jupiter_executor.sell_to_sol(
-                mint=mint,
-                amount_tokens=amount_tokens,
-                decimals=decimals,
-            )
-
-            status = result.get("status", "UNKNOWN")
-            signature = str(result.get("signature", ""))
+        self.exit_positions("GRADUATION", [mint])
 
-            print(
-                f"[Engine] Jupiter sell ejecutado para {symbol} ({mint}) "
-                f"status={status}, sig={signature}"
-            )
-
-            # Cierre espejo en nuestras estadísticas internas
-            with self._lock:
-                self._close_position_simulated(pos, reason="GRADUATION (REAL SELL)")
+    def get_free_slots(self) -> int:
+        with self._lock:
+            return self._free_slots_locked()
 
-        except Exception as exc:
-            print("[Engine] Error al vender en Jupiter en graduation:", repr(exc))
+    def _free_slots_locked(self) -> int:
+        return self.config.max_active_trades - self._open_count - len(self._pending_buys)
 
     # -------------------------------------------------------------------------
     # Apertura de posiciones (DRY_RUN)
@@ -188,6 +367,7 @@ class TradingEngine:
         entry_price_sol: float,
         size_sol: float,
         amount_tokens: Optional[float] = None,
+        buy_signature: Optional[str] = None,
     ) -> None:
         """
         Crea una posición simulada. Si no tenemos precio todavía, lo fijaremos
@@ -207,29 +387,90 @@ class TradingEngine:
             entry_price_sol=entry_price_sol,
             size_sol=size_sol,
             amount_tokens=amount_tokens,
+            opened_at=self._clock(),
             trailing_stop_percent=self.config.trailing_stop_percent,
             stop_loss_percent=self.config.stop_loss_percent,
             max_price_sol=entry_price_sol if has_price else 0.0,
             last_price_sol=entry_price_sol if has_price else 0.0,
+            buy_signature=buy_signature,
         )
 
         self._positions[mint] = pos
+        self._open_count += 1
+        self._snapshot_version += 1
+        if self.mint_info is not None:
+            self.mint_info.prefetch([mint])
+        self._track_exit(pos)
 
         print(
             f"[Engine] (SIM) Nueva posición {pos.symbol} mint={mint} "
             f"size={size_sol} SOL, entry_price={entry_price_sol}, "
             f"tokens≈{amount_tokens}"
         )
+        self._emit(
+            "OPEN",
+            mint=mint,
+            symbol=pos.symbol,
+            size_sol=size_sol,
+            entry_price_sol=entry_price_sol,
+        )
+
+    def _track_exit(self, pos: Position) -> None:
+        """En MODE=real, Jupiter mantiene precalentada la orden de salida."""
+        if self.config.mode != "real" or self.jupiter_executor is None:
+            return
+        if pos.amount_tokens > 0:
+            try:
+                self.jupiter_executor.track_exit(
+                    pos.mint, pos.amount_tokens, self._token_decimals(pos.mint)
+                )
+            except Exception as exc:
+                print("[Engine] Error registrando salida en Jupiter:", repr(exc))
+
+    def _token_decimals(self, mint: str, fallback: int = 6) -> int:
+        """
+        Decimals desde la caché de mint info (sin RPC); si no está, fallback
+        y se vuelve a pedir el mint para la próxima salida.
+        """
+        if self.mint_info is not None:
+            info = self.mint_info.get(mint)
+            if info is not None:
+                return info.decimals
+            self.mint_info.prefetch([mint])
+        return fallback
+
+    def _untrack_exit(self, pos: Position) -> None:
+        if self.config.mode == "real" and self.jupiter_executor is not None:
+            self.jupiter_executor.untrack_exit(pos.mint)
 
     # -------------------------------------------------------------------------
     # Actualización de precios + SL / Trailing
     # -------------------------------------------------------------------------
 
-    def update_price(self, mint: str, price_sol: float) -> Optional[Position]:
+    def update_price(
+        self,
+        mint: str,
+        price_sol: float,
+        defer_exit: bool = False,
+    ) -> Optional[Position]:
         """
         Llamado por el monitor de precios (DexScreener/Jupiter/Helius).
         Actualiza last_price y evalúa Stop Loss / Trailing Stop.
+
+        Con `defer_exit=True` la salida que se dispare queda encolada (CLOSING)
+        hasta flush_exits(): el monitor actualiza todo el ciclo y luego vende
+        de una vez todo lo que saltó.
         """
+        started = time.perf_counter()
+        try:
+            pos = self._update_price(mint, price_sol)
+        finally:
+            LATENCY.record("update_price", time.perf_counter() - started)
+        if not defer_exit:
+            self.flush_exits()
+        return pos
+
+    def _update_price(self, mint: str, price_sol: float) -> Optional[Position]:
         with self._lock:
             pos = self._positions.get(mint)
             if not pos or pos.status != PositionStatus.OPEN:
@@ -241,14 +482,19 @@ class TradingEngine:
                 pos.entry_price_sol = price_sol
                 pos.max_price_sol = price_sol
                 pos.last_price_sol = price_sol
+                self._snapshot_version += 1
                 print(
                     f"[Engine] Fijando precio de entrada para {pos.symbol}: "
                     f"{price_sol:.10f} SOL (DRY_RUN)"
                 )
                 return pos
 
-            # Actualizar último precio
+            # Actualizar último precio; /positions sólo se invalida si cambia
+            # lo que muestra (precio y PnL redondeados)
+            shown = _shown_price_pnl(pos)
             pos.last_price_sol = price_sol
+            if _shown_price_pnl(pos) != shown:
+                self._snapshot_version += 1
 
             # Actualizar máximo histórico
             if price_sol > pos.max_price_sol:
@@ -274,17 +520,18 @@ class TradingEngine:
             else:
                 drawdown_percent = 0.0
 
+            exit_reason: Optional[str] = None
+
             # ----------------- STOP LOSS -----------------
             if pos.stop_loss_percent > 0 and pnl_percent <= -pos.stop_loss_percent:
                 print(
                     f"[SL] Stop Loss activado para {pos.symbol}: "
                     f"{pnl_percent:.2f}%"
                 )
-                self._close_position_simulated(pos, reason="STOP LOSS")
-                return pos
+                exit_reason = "STOP LOSS"
 
             # ----------------- TRAILING STOP -----------------
-            if (
+            elif (
                 pos.trailing_stop_percent > 0
                 and drawdown_percent <= -pos.trailing_stop_percent
             ):
@@ -292,11 +539,203 @@ class TradingEngine:
                     f"[TS] Trailing Stop activado para {pos.symbol}: "
                     f"drawdown {drawdown_percent:.2f}% desde máximo."
                 )
-                self._close_position_simulated(pos, reason="TRAILING STOP")
+                exit_reason = "TRAILING STOP"
+
+            if exit_reason is None:
+                return pos
+
+            if not self._sells_on_chain() and not self._sells_via_jupiter():
+                self._close_position_simulated(pos, reason=exit_reason)
                 return pos
 
+            # REAL: marcamos CLOSING y se vende en flush_exits, fuera del lock
+            pos.status = PositionStatus.CLOSING
+            pos.exit_reason = exit_reason
+            self._snapshot_version += 1
+            self._exit_queue.append((pos, exit_reason))
             return pos
 
+    def flush_exits(self) -> int:
+        """
+        Lanza a la vez todas las salidas encoladas por update_price.
+
+        - Con executor de curva: un submit por posición; los envíos corren en
+          paralelo en el runtime, así N salidas tardan lo que tarda una.
+        - Sólo Jupiter (MODE=real sin executor de curva): un solo sell_many por
+          motivo, en un hilo para no bloquear al monitor.
+
+        Devuelve cuántas salidas lanzó.
+        """
+        with self._lock:
+            queued = [
+                (pos, reason) for pos, reason in self._exit_queue
+                if pos.status == PositionStatus.CLOSING
+            ]
+            self._exit_queue = []
+        if not queued:
+            return 0
+
+        if self._sells_on_chain():
+            for pos, reason in queued:
+                self._exit_on_curve(pos, reason)
+            return len(queued)
+
+        by_reason: Dict[str, List[Position]] = {}
+        for pos, reason in queued:
+            by_reason.setdefault(reason, []).append(pos)
+        for reason, targets in by_reason.items():
+            threading.Thread(
+                target=self._sell_via_jupiter,
+                args=(targets, reason),
+                name="exit-batch",
+                daemon=True,
+            ).start()
+        return len(queued)
+
+    # -------------------------------------------------------------------------
+    # Salidas reales en la bonding curve (SL / TS antes de graduation)
+    # -------------------------------------------------------------------------
+
+    def _sells_on_chain(self) -> bool:
+        if self.executor is None:
+            return False
+        # el mercado simulado (market_sim) también llena las ventas en la curva
+        return self.config.mode == "real" or getattr(self.executor, "simulated", False)
+
+    def _sells_via_jupiter(self) -> bool:
+        return self.config.mode == "real" and self.jupiter_executor is not None
+
+    def _exit_on_curve(self, pos: Position, reason: str) -> None:
+        """
+        Vende directamente en Pump.fun (sin agregador), sin bloquear al caller:
+        la posición queda CLOSING hasta que la TX aterriza (handle_tx_result).
+        Si el envío falla o la TX no aterriza, vuelve a OPEN y el siguiente
+        tick reintenta la salida.
+        """
+        try:
+            if getattr(self.executor, "simulated", False):
+                # mercado simulado: fill síncrono en proceso y definitivo
+                result = self.executor.sell_on_curve(
+                    pos.mint,
+                    pos.amount_tokens,
+                    urgency="stop",
+                )
+                with self._lock:
+                    # el P&L refleja slippage y fees del fill
+                    fill_price = result.get("exit_price_sol")
+                    if isinstance(fill_price, (int, float)) and fill_price > 0:
+                        pos.last_price_sol = float(fill_price)
+                    self._close_position_simulated(pos, reason=f"{reason} (SIM SELL)")
+                return
+
+            self.executor.submit_sell_on_curve(
+                pos.mint,
+                pos.amount_tokens,
+                lambda result, exc: self._on_curve_sell_sent(pos, reason, result, exc),
+                urgency="stop",
+            )
+        except Exception as exc:
+            self._on_curve_sell_failed(pos, reason, exc)
+
+    def _on_curve_sell_sent(
+        self,
+        pos: Position,
+        reason: str,
+        result: Optional[Dict[str, Any]],
+        exc: Optional[BaseException],
+    ) -> None:
+        """Callback del executor: la TX de venta se envió (o falló el envío)."""
+        if exc is not None or result is None:
+            self._on_curve_sell_failed(pos, reason, exc)
+            return
+
+        print(
+            f"[Engine] Pump.fun sell enviado para {pos.symbol} ({pos.mint}) "
+            f"sig={result.get('signature', '')}, "
+            f"esperado≈{result.get('expected_sol_out', 0.0):.6f} SOL"
+        )
+        with self._lock:
+            if pos.status == PositionStatus.CLOSING and result.get("signature"):
+                pos.sell_signature = str(result["signature"])
+
+    def _on_curve_sell_failed(
+        self,
+        pos: Position,
+        reason: str,
+        exc: Optional[BaseException],
+    ) -> None:
+        from pumpfun_executor import CurveCompleteError
+
+        print(f"[Engine] Error vendiendo {pos.symbol} en la curva:", repr(exc))
+        with self._lock:
+            if pos.status != PositionStatus.CLOSING:
+                return
+
+            if not isinstance(exc, CurveCompleteError):
+                pos.status = PositionStatus.OPEN
+                pos.exit_reason = None
+                self._snapshot_version += 1
+                return
+
+            # Graduó sin que llegara la graduation de Flintr: la curva ya no
+            # acepta ventas, así que se sale por Jupiter (o cierre SIM)
+            if self.config.mode != "real" or self.jupiter_executor is None:
+                self._close_position_simulated(pos, reason=f"{reason} (GRADUATED, SIM)")
+                return
+
+        # sigue CLOSING; sell_many bloquea, así que fuera del callback del executor
+        threading.Thread(
+            target=self._sell_via_jupiter,
+            args=([pos], f"{reason} (GRADUATED)"),
+            name=f"exit-{pos.mint[:8]}",
+            daemon=True,
+        ).start()
+
+    def _apply_sell_result(self, result: Dict[str, Any]) -> None:
+        """
+        Resultado final de una venta en la curva: sólo con LANDED se cierra la
+        posición y se contabiliza el P&L. FAILED / EXPIRED / REJECTED la
+        devuelven a OPEN para que el siguiente tick reintente (los tokens
+        siguen en la wallet).
+        """
+        mint = result.get("mint")
+        status = result.get("status")
+
+        with self._lock:
+            pos = self._positions.get(mint) if mint else None
+            if pos is None or pos.status != PositionStatus.CLOSING:
+                print(f"[Engine] SELL {mint} {status} sin posición CLOSING; ignorado.")
+                return
+            signature = result.get("signature")
+            if pos.sell_signature and signature and str(signature) != pos.sell_signature:
+                # resultado de un intento anterior: manda el de la venta en curso
+                return
+
+            if status == "LANDED":
+                print(
+                    f"[Engine] ✅ SELL {pos.symbol} confirmado en "
+                    f"{result.get('land_ms') or 0:.0f} ms"
+                )
+                reason = pos.exit_reason or "SELL"
+                self._close_position_simulated(pos, reason=f"{reason} (REAL SELL)")
+                return
+
+            print(
+                f"[Engine] ⚠️ SELL {pos.symbol} {status}: {result.get('err')}; "
+                "vuelve a OPEN para reintentar."
+            )
+            pos.status = PositionStatus.OPEN
+            pos.exit_reason = None
+            pos.sell_signature = None
+            self._snapshot_version += 1
+            self._emit(
+                "SELL_FAILED",
+                mint=mint,
+                symbol=pos.symbol,
+                status=status,
+                err=result.get("err"),
+            )
+
     # -------------------------------------------------------------------------
     # Cierre de posiciones (DRY_RUN)
     # -------------------------------------------------------------------------
@@ -306,11 +745,15 @@ class TradingEngine:
         Cierra la posición y calcula P&L simulado en SOL.
         (En modo REAL esto será el espejo de las operaciones on-chain.)
         """
-        if pos.status != PositionStatus.OPEN:
+        if pos.status not in (PositionStatus.OPEN, PositionStatus.CLOSING):
             return
 
         pos.status = PositionStatus.CLOSED
-        pos.closed_at = time.time()
+        self._open_count -= 1
+        self._snapshot_version += 1
+        pos.closed_at = self._clock()
+        pos.close_reason = reason
+        self._untrack_exit(pos)
 
         exit_price = pos.last_price_sol or pos.entry_price_sol
         entry = pos.entry_price_sol
@@ -332,6 +775,22 @@ class TradingEngine:
             f"    P&L:     {pos.realized_pnl_percent:.2f}% "
             f"({pos.realized_pnl_sol:.6f} SOL)"
         )
+        self._emit(
+            "CLOSE",
+            mint=pos.mint,
+            symbol=pos.symbol,
+            reason=reason,
+            pnl_percent=pos.realized_pnl_percent,
+            pnl_sol=pos.realized_pnl_sol,
+        )
+
+    def _emit(self, kind: str, **data: Any) -> None:
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(kind, data)
+        except Exception as exc:
+            print(f"[Engine] Error notificando evento {kind}:", repr(exc))
 
     def _register_closed_position(self, pos: Position) -> None:
         self._total_trades += 1
@@ -345,6 +804,10 @@ class TradingEngine:
     # Snapshots para Telegram / monitoreo
     # -------------------------------------------------------------------------
 
+    def snapshot_version(self) -> int:
+        """Versión de las posiciones: si no cambia, el snapshot anterior sigue valiendo."""
+        return self._snapshot_version
+
     def get_positions_snapshot(self) -> List[Dict[str, Any]]:
         """
         Devuelve una lista de dicts para mostrar en Telegram.
@@ -354,17 +817,7 @@ class TradingEngine:
         with self._lock:
             out: List[Dict[str, Any]] = []
             for pos in self._positions.values():
-                # Para PnL instantáneo usamos last_price si existe, si no entry.
-                last_price = pos.last_price_sol or pos.entry_price_sol
-                if pos.entry_price_sol > 0 and last_price > 0:
-                    pnl_percent = (
-                        (last_price - pos.entry_price_sol)
-                        / pos.entry_price_sol
-                        * 100.0
-                    )
-                else:
-                    pnl_percent = 0.0
-
+                last_price, pnl_percent = _price_pnl(pos)
                 out.append(
                     {
                         "mint": pos.mint,
@@ -375,10 +828,39 @@ class TradingEngine:
                         "last_price": last_price,
                         "pnl_percent": pnl_percent,
                         "size_sol": pos.size_sol,
+                        "opened_at": pos.opened_at,
+                        "closed_at": pos.closed_at,
                     }
                 )
             return out
 
+    def get_trades_snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Devuelve los trades cerrados (resultado por trade) en orden de cierre.
+        """
+        with self._lock:
+            closed = [
+                p for p in self._positions.values()
+                if p.status == PositionStatus.CLOSED
+            ]
+            closed.sort(key=lambda p: p.closed_at or 0.0)
+            return [
+                {
+                    "mint": p.mint,
+                    "symbol": p.symbol,
+                    "opened_at": p.opened_at,
+                    "closed_at": p.closed_at,
+                    "entry_price": p.entry_price_sol,
+                    "exit_price": p.last_price_sol or p.entry_price_sol,
+                    "max_price": p.max_price_sol,
+                    "size_sol": p.size_sol,
+                    "pnl_percent": p.realized_pnl_percent,
+                    "pnl_sol": p.realized_pnl_sol,
+                    "reason": p.close_reason or "",
+                }
+                for p in closed
+            ]
+
     def get_stats_snapshot(self) -> Dict[str, Any]:
         with self._lock:
             win_rate = (
@@ -387,6 +869,7 @@ class TradingEngine:
                 else 0.0
             )
             return {
+                "name": self.name,
                 "mode": self.config.mode,
                 "active": self.active,
                 "num_positions": len(self._positions),
@@ -395,12 +878,188 @@ class TradingEngine:
                 "wins": self._wins,
                 "losses": self._losses,
                 "win_rate": win_rate,
+                "filters": self.mint_filters.get_stats_snapshot(),
+                "scoring": (
+                    self.mint_scorer.get_stats_snapshot()
+                    if self.mint_scorer is not None
+                    else None
+                ),
             }
 
     # -------------------------------------------------------------------------
     # Control desde Telegram
     # -------------------------------------------------------------------------
 
+    def close_all_positions(self, reason: str) -> int:
+        """
+        Cierra todas las posiciones OPEN. Devuelve cuántas cerró.
+        En MODE=real con Jupiter se venden todas a la vez (exit_positions);
+        con el mercado simulado, cada una se vende en su curva.
+        """
+        if self.config.mode == "real" and self.jupiter_executor is not None:
+            return self.exit_positions(reason)
+
+        if getattr(self.executor, "simulated", False):
+            # mercado simulado: se vende en la curva (slippage + fees), no a spot
+            with self._lock:
+                targets = [
+                    p for p in self._positions.values()
+                    if p.status == PositionStatus.OPEN
+                ]
+                for pos in targets:
+                    pos.status = PositionStatus.CLOSING
+                    pos.exit_reason = reason
+                self._snapshot_version += 1
+            for pos in targets:
+                self._exit_on_curve(pos, reason)
+            return sum(1 for p in targets if p.status == PositionStatus.CLOSED)
+
+        with self._lock:
+            open_positions = [
+                p for p in self._positions.values()
+                if p.status == PositionStatus.OPEN
+            ]
+            for pos in open_positions:
+                self._close_position_simulated(pos, reason=reason)
+            return len(open_positions)
+
+    def exit_positions(self, reason: str, mints: Optional[List[str]] = None) -> int:
+        """
+        Vende vía Jupiter varias posiciones OPEN en un solo lote (sell_many):
+        se marcan CLOSING, se venden en paralelo fuera del lock y los
+        resultados se aplican en una sola pasada con el lock. Las que fallan
+        vuelven a OPEN. Devuelve cuántas cerró.
+        """
+        with self._lock:
+            targets = [
+                p for p in self._positions.values()
+                if p.status == PositionStatus.OPEN
+                and (mints is None or p.mint in mints)
+            ]
+            for pos in targets:
+                pos.status = PositionStatus.CLOSING
+                pos.exit_reason = reason
+            self._snapshot_version += 1
+
+        return self._sell_via_jupiter(targets, reason)
+
+    def _sell_via_jupiter(self, targets: List[Position], reason: str) -> int:
+        """sell_many de posiciones ya marcadas CLOSING (bloquea: fuera del lock)."""
+        if not targets:
+            return 0
+
+        try:
+            results = self.jupiter_executor.sell_many(
+                [(p.mint, p.amount_tokens, self._token_decimals(p.mint)) for p in targets]
+            )
+        except Exception as exc:
+            print("[Engine] Error en JupiterExecutor.sell_many:", repr(exc))
+            results = {}
+
+        closed = 0
+        with self._lock:
+            for pos in targets:
+                outcome = results.get(pos.mint)
+                if outcome is not None and outcome["ok"]:
+                    self._close_position_simulated(pos, reason=f"{reason} (REAL SELL)")
+                    closed += 1
+                elif pos.status == PositionStatus.CLOSING:
+                    error = outcome["error"] if outcome is not None else "sin resultado"
+                    print(f"[Engine] ⚠️ Venta de {pos.symbol} falló ({error}); sigue OPEN.")
+                    pos.status = PositionStatus.OPEN
+                    pos.exit_reason = None
+                    self._snapshot_version += 1
+        return closed
+
+    def reconcile_balances(self, balances: Dict[str, int]) -> Dict[str, int]:
+        """
+        Corrige amount_tokens de las posiciones OPEN con los balances reales
+        de la wallet (mint -> unidades base, de WalletReconciler).
+        Una pasada por las posiciones con lookup O(1) en el índice.
+        """
+        checked = corrected = missing = 0
+        with self._lock:
+            for pos in self._positions.values():
+                if pos.status != PositionStatus.OPEN:
+                    continue
+                checked += 1
+                raw = balances.get(pos.mint, 0)
+
+                if raw <= 0:
+                    # sin tokens: normal si la compra aún no confirmó
+                    if pos.buy_status == "LANDED":
+                        missing += 1
+                        print(f"[Engine] ⚠️ {pos.symbol}: la wallet no tiene tokens de {pos.mint}.")
+                    continue
+
+                real = raw / (10 ** self._token_decimals(pos.mint))
+                if abs(real - pos.amount_tokens) <= real * 1e-6:
+                    continue
+
+                print(
+                    f"[Engine] 🔄 {pos.symbol}: amount_tokens "
+                    f"{pos.amount_tokens:.6f} → {real:.6f} (wallet)"
+                )
+                pos.amount_tokens = real
+                corrected += 1
+                # la orden de salida precalentada debe tener el tamaño real
+                self._track_exit(pos)
+
+        return {"checked": checked, "corrected": corrected, "missing": missing}
+
+    def apply_config(self, config: BotConfig, apply_to_open: bool = False) -> int:
+        """
+        Publica una nueva versión (inmutable) de BotConfig. Las entradas nuevas
+        la usan en cuanto se publica; con apply_to_open, las posiciones
+        abiertas adoptan el SL / TS nuevos y se evalúan con ellos en el
+        siguiente tick. Devuelve cuántas posiciones se actualizaron.
+        """
+        while True:
+            with self._lock:
+                old, old_version = self.config, self.config_version
+            filters_changed = any(
+                getattr(old, f) != getattr(config, f)
+                for f in (
+                    "filter_require_metadata",
+                    "filter_creator_blacklist",
+                    "filter_min_latest_price",
+                    "filter_symbol_blocklist",
+                    "filter_name_blocklist",
+                )
+            )
+            # construida fuera del lock; se publica junto con la config
+            mint_filters = MintFilterPipeline.from_config(config) if filters_changed else None
+
+            updated = 0
+            with self._lock:
+                if self.config_version != old_version:
+                    # otra recarga publicó entretanto: comparar contra la vigente
+                    continue
+                self.config = config
+                self.config_version += 1
+                version = self.config_version
+                if mint_filters is not None:
+                    self.mint_filters = mint_filters
+                if self.mint_scorer is not None:
+                    self.mint_scorer.min_score = config.scoring_min_score
+
+                if apply_to_open:
+                    for pos in self._positions.values():
+                        if pos.status == PositionStatus.CLOSED:
+                            continue
+                        pos.stop_loss_percent = config.stop_loss_percent
+                        pos.trailing_stop_percent = config.trailing_stop_percent
+                        updated += 1
+                break
+
+        print(
+            f"[Engine] ⚙️ Config v{version}: "
+            f"SL={config.stop_loss_percent}% TS={config.trailing_stop_percent}% "
+            f"size={config.invest_amount_sol} SOL max={config.max_active_trades}"
+            + (f" (aplicado a {updated} posiciones)" if apply_to_open else "")
+        )
+        return updated
+
     def set_active(self, value: bool) -> None:
         with self._lock:
             self.active = value
@@ -0,0 +1,369 @@
+# tx_sender.py
+"""
+Envío de TX en abanico a varios RPC + seguimiento de confirmación.
+
+- `send()` manda la MISMA TX firmada a todos los endpoints a la vez
+  (JSON-RPC sendTransaction en base64, cliente httpx con pool persistente)
+  y registra qué endpoint respondió primero y con qué latencia.
+- Un task en background consulta `getSignatureStatuses` en lotes para todas
+  las firmas pendientes y, cuando una aterriza / falla / expira, entrega el
+  resultado a `on_result` (el engine).
+- Expiración: una TX sin confirmar expira cuando `getBlockHeight` supera el
+  last_valid_block_height de su blockhash (ya no puede aterrizar). Sólo las
+  TX enviadas sin ese dato usan `confirm_timeout_sec` de reloj.
+
+Como sólo habla JSON-RPC por HTTP, se puede probar contra servidores RPC
+mock locales (benchmarks.py tx_sender).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+TxResultCallback = Callable[[Dict[str, Any]], None]
+
+# Límite de firmas por llamada a getSignatureStatuses
+MAX_SIGNATURES_PER_STATUS_CALL = 256
+
+_LANDED_STATUSES = ("confirmed", "finalized")
+
+
+@dataclass
+class EndpointStats:
+    url: str
+    sends: int = 0
+    errors: int = 0
+    first_acks: int = 0
+    total_ack_ms: float = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        ok = self.sends - self.errors
+        return {
+            "url": self.url,
+            "sends": self.sends,
+            "errors": self.errors,
+            "first_acks": self.first_acks,
+            "avg_ack_ms": (self.total_ack_ms / ok) if ok > 0 else 0.0,
+        }
+
+
+@dataclass
+class PendingTx:
+    signature: str
+    sent_at: float
+    context: Dict[str, Any] = field(default_factory=dict)
+    first_endpoint: Optional[str] = None
+    last_valid_block_height: Optional[int] = None
+
+
+def _consume_task_exception(task: "asyncio.Future[Any]") -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+class TxFanoutSender:
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        *,
+        on_result: Optional[TxResultCallback] = None,
+        poll_interval_sec: float = 0.4,
+        confirm_timeout_sec: float = 60.0,
+        request_timeout_sec: float = 5.0,
+        max_retries: int = 2,
+    ) -> None:
+        urls = [u for u in dict.fromkeys(endpoints) if u]
+        if not urls:
+            raise ValueError("TxFanoutSender requiere al menos un endpoint RPC")
+
+        self.endpoints: List[str] = urls
+        self.on_result = on_result
+        self.poll_interval_sec = poll_interval_sec
+        self.confirm_timeout_sec = confirm_timeout_sec
+        self.request_timeout_sec = request_timeout_sec
+        self.max_retries = max_retries
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._pending: Dict[str, PendingTx] = {}
+        self._confirm_task: Optional[asyncio.Task] = None
+        self._next_id = 0
+
+        self._stats: Dict[str, EndpointStats] = {u: EndpointStats(u) for u in urls}
+        self.landed: int = 0
+        self.failed: int = 0
+        self.expired: int = 0
+        self._total_land_ms: float = 0.0
+
+    # ------------- helpers -------------
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.request_timeout_sec,
+                limits=httpx.Limits(max_keepalive_connections=len(self.endpoints) * 4),
+            )
+        return self._http
+
+    async def _rpc(self, url: str, method: str, params: List[Any]) -> Any:
+        self._next_id += 1
+        payload = {"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params}
+        resp = await self._get_http().post(url, json=payload)
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("error"):
+            raise RuntimeError(f"{method} error: {body['error']}")
+        return body.get("result")
+
+    # ------------- envío -------------
+
+    async def send(
+        self,
+        raw_tx: bytes,
+        signature: str,
+        context: Optional[Dict[str, Any]] = None,
+        *,
+        last_valid_block_height: Optional[int] = None,
+    ) -> str:
+        """
+        Manda la TX a todos los endpoints y la registra como pendiente.
+        Devuelve la firma si al menos un endpoint la aceptó.
+        `last_valid_block_height` (el de su blockhash) decide la expiración.
+        """
+        encoded = base64.b64encode(raw_tx).decode("ascii")
+        params = [
+            encoded,
+            {
+                "encoding": "base64",
+                "skipPreflight": True,
+                "maxRetries": self.max_retries,
+            },
+        ]
+
+        pending = PendingTx(
+            signature=signature,
+            sent_at=time.monotonic(),
+            context=dict(context or {}),
+            last_valid_block_height=last_valid_block_height,
+        )
+        self._pending[signature] = pending
+        self._ensure_confirm_loop()
+
+        # Devolvemos en cuanto un endpoint acepta; el resto sigue en background
+        tasks = [
+            asyncio.ensure_future(self._send_one(url, params, pending))
+            for url in self.endpoints
+        ]
+        for task in tasks:
+            # los errores ya quedan en EndpointStats; evitar warnings de asyncio
+            task.add_done_callback(_consume_task_exception)
+        errors: List[str] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    await next_done
+                    return signature
+                except Exception as exc:
+                    errors.append(repr(exc))
+        except asyncio.CancelledError:
+            # El caller se rindió (timeout del runtime) pero algún RPC puede
+            # haber aceptado ya la TX: sigue pendiente y el confirm loop
+            # entrega el único estado final. Si todos la rechazan, REJECTED.
+            asyncio.ensure_future(self._settle_abandoned(pending, tasks))
+            raise
+
+        self._pending.pop(signature, None)
+        raise RuntimeError(f"Ningún RPC aceptó la TX {signature}: {errors}")
+
+    async def _settle_abandoned(self, pending: PendingTx, tasks: List["asyncio.Future[bool]"]) -> None:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        if any(r is True for r in results):
+            return
+        if self._pending.get(pending.signature) is pending:
+            self._resolve(pending, "REJECTED", None, time.monotonic())
+
+    def is_pending(self, signature: str) -> bool:
+        """La TX sigue en seguimiento: su estado final llegará por on_result."""
+        return signature in self._pending
+
+    def pending_signature(self, kind: str, mint: str) -> Optional[str]:
+        """Firma pendiente más reciente con ese kind / mint (o None)."""
+        for pending in reversed(list(self._pending.values())):
+            if pending.context.get("kind") == kind and pending.context.get("mint") == mint:
+                return pending.signature
+        return None
+
+    async def _send_one(self, url: str, params: List[Any], pending: PendingTx) -> bool:
+        stats = self._stats[url]
+        stats.sends += 1
+        started = time.monotonic()
+        try:
+            await self._rpc(url, "sendTransaction", params)
+        except Exception as exc:
+            stats.errors += 1
+            logger.debug("[TxSender] %s rechazó %s: %r", url, pending.signature, exc)
+            raise
+
+        stats.total_ack_ms += (time.monotonic() - started) * 1000.0
+        if pending.first_endpoint is None:
+            pending.first_endpoint = url
+            stats.first_acks += 1
+        return True
+
+    # ------------- confirmación -------------
+
+    def _ensure_confirm_loop(self) -> None:
+        if self._confirm_task is None or self._confirm_task.done():
+            self._confirm_task = asyncio.get_running_loop().create_task(self._confirm_loop())
+
+    async def _confirm_loop(self) -> None:
+        while self._pending:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.debug("[TxSender] Error consultando estados: %r", exc)
+            await asyncio.sleep(self.poll_interval_sec)
+
+    async def poll_once(self) -> None:
+        """Una ronda de getSignatureStatuses para todas las firmas pendientes."""
+        signatures = list(self._pending.keys())
+        now = time.monotonic()
+
+        # Una sola consulta de altura por ronda, sólo si alguna TX la necesita
+        block_height: Optional[int] = None
+        if any(p.last_valid_block_height is not None for p in self._pending.values()):
+            try:
+                block_height = await self._get_block_height()
+            except Exception as exc:
+                # sin altura no se puede expirar: se reintenta en la siguiente ronda
+                logger.debug("[TxSender] Error consultando getBlockHeight: %r", exc)
+
+        for i in range(0, len(signatures), MAX_SIGNATURES_PER_STATUS_CALL):
+            batch = signatures[i:i + MAX_SIGNATURES_PER_STATUS_CALL]
+            statuses = await self._get_statuses(batch)
+
+            for sig, status in zip(batch, statuses):
+                pending = self._pending.get(sig)
+                if pending is None:
+                    continue
+
+                if status is not None and status.get("err") is not None:
+                    self._resolve(pending, "FAILED", status, now)
+                elif status is not None and status.get("confirmationStatus") in _LANDED_STATUSES:
+                    self._resolve(pending, "LANDED", status, now)
+                elif status is None and self._is_expired(pending, block_height, now):
+                    self._resolve(pending, "EXPIRED", status, now)
+
+    def _is_expired(
+        self,
+        pending: PendingTx,
+        block_height: Optional[int],
+        now: float,
+    ) -> bool:
+        if pending.last_valid_block_height is None:
+            return now - pending.sent_at > self.confirm_timeout_sec
+        return block_height is not None and block_height > pending.last_valid_block_height
+
+    async def _get_block_height(self) -> int:
+        last_exc: Optional[Exception] = None
+        for url in self.endpoints:
+            try:
+                result = await self._rpc(url, "getBlockHeight", [{"commitment": "confirmed"}])
+                return int(result)
+            except Exception as exc:
+                last_exc = exc
+        raise RuntimeError(f"getBlockHeight falló en todos los RPC: {last_exc!r}")
+
+    async def _get_statuses(self, signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+        # El primer endpoint que responda sirve; los demás son fallback
+        last_exc: Optional[Exception] = None
+        for url in self.endpoints:
+            try:
+                result = await self._rpc(
+                    url,
+                    "getSignatureStatuses",
+                    [signatures, {"searchTransactionHistory": False}],
+                )
+                value = (result or {}).get("value") or []
+                return list(value) + [None] * (len(signatures) - len(value))
+            except Exception as exc:
+                last_exc = exc
+        raise RuntimeError(f"getSignatureStatuses falló en todos los RPC: {last_exc!r}")
+
+    def _resolve(
+        self,
+        pending: PendingTx,
+        status: str,
+        rpc_status: Optional[Dict[str, Any]],
+        now: float,
+    ) -> None:
+        self._pending.pop(pending.signature, None)
+        land_ms = (now - pending.sent_at) * 1000.0
+
+        if status == "LANDED":
+            self.landed += 1
+            self._total_land_ms += land_ms
+        elif status in ("FAILED", "REJECTED"):
+            self.failed += 1
+        else:
+            self.expired += 1
+
+        result: Dict[str, Any] = dict(pending.context)
+        result.update(
+            {
+                "signature": pending.signature,
+                "status": status,
+                "land_ms": land_ms if status == "LANDED" else None,
+                "slot": (rpc_status or {}).get("slot"),
+                "err": (rpc_status or {}).get("err"),
+                "first_endpoint": pending.first_endpoint,
+            }
+        )
+
+        logger.info(
+            "[TxSender] %s %s (%.0f ms, primero=%s)",
+            pending.signature,
+            status,
+            land_ms,
+            pending.first_endpoint,
+        )
+
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as exc:
+                logger.warning("[TxSender] Error en on_result: %r", exc)
+
+    # ------------- ciclo de vida / stats -------------
+
+    async def close(self) -> None:
+        task, self._confirm_task = self._confirm_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "landed": self.landed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "avg_land_ms": (self._total_land_ms / self.landed) if self.landed else 0.0,
+            "endpoints": [s.snapshot() for s in self._stats.values()],
+        }
@@ -0,0 +1,148 @@
+# wallet_reconciler.py
+"""
+Reconciliación periódica de balances de la wallet contra las posiciones.
+
+`amount_tokens` de cada Position es una estimación espejo (size / precio o
+lo que reportó el executor) y puede desviarse de lo que la wallet tiene de
+verdad (fills parciales, fees, redondeos). Cada WALLET_RECONCILE_SEC:
+
+  1. `getTokenAccountsByOwner` trae TODAS las token accounts de la wallet
+     (una llamada por token program, SPL Token y Token-2022, en paralelo)
+  2. se agregan en un índice mint -> balance (unidades base)
+  3. TradingEngine.reconcile_balances recorre las posiciones OPEN una vez
+     con lookups O(1) en ese índice y corrige amount_tokens
+
+Así las ventas salen con la cantidad real y no fallan por pedir de más.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import base58
+import httpx
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from config import BotConfig
+from pump_tx_builder import TOKEN_PROGRAM
+
+logger = logging.getLogger(__name__)
+
+TOKEN_2022_PROGRAM = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+TOKEN_PROGRAM_IDS = (str(TOKEN_PROGRAM), TOKEN_2022_PROGRAM)
+
+# Layout de token account: mint (32) | owner (32) | amount (u64) | ...
+_TOKEN_ACCOUNT_MIN_LEN = 72
+
+
+def parse_token_account(data: bytes) -> tuple[str, int]:
+    """(mint, amount en unidades base) de una token account."""
+    if len(data) < _TOKEN_ACCOUNT_MIN_LEN:
+        raise ValueError(f"Token account demasiado corta: {len(data)} bytes")
+    mint = str(Pubkey.from_bytes(data[0:32]))
+    amount = int.from_bytes(data[64:72], "little")
+    return mint, amount
+
+
+class WalletReconciler:
+    def __init__(
+        self,
+        rpc_url: str,
+        owner: str,
+        *,
+        token_programs: Sequence[str] = TOKEN_PROGRAM_IDS,
+    ) -> None:
+        self.rpc_url = rpc_url
+        self.owner = owner
+        self.token_programs = tuple(token_programs)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._next_id = 0
+
+        self.runs: int = 0
+        self.errors: int = 0
+        self.corrected: int = 0
+
+    @classmethod
+    def from_config(cls, config: BotConfig) -> "WalletReconciler":
+        if not config.helius_rpc_url or not config.wallet_private_key:
+            raise RuntimeError("HELIUS_RPC_URL y WALLET_PRIVATE_KEY requeridos para reconciliar.")
+        owner = Keypair.from_bytes(base58.b58decode(config.wallet_private_key)).pubkey()
+        return cls(config.helius_rpc_url, str(owner))
+
+    async def _token_accounts(self, program_id: str) -> List[Dict[str, Any]]:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10.0)
+        self._next_id += 1
+        payload = {
+            "jsonrpc": "2.0",
+            "id": self._next_id,
+            "method": "getTokenAccountsByOwner",
+            "params": [
+                self.owner,
+                {"programId": program_id},
+                {"encoding": "base64"},
+            ],
+        }
+        resp = await self._http.post(self.rpc_url, json=payload)
+        resp.raise_for_status()
+        body = resp.json()
+        if body.get("error"):
+            raise RuntimeError(f"getTokenAccountsByOwner error: {body['error']}")
+        return (body.get("result") or {}).get("value") or []
+
+    async def fetch_balances(self) -> Dict[str, int]:
+        """Índice mint -> balance total (unidades base) de la wallet."""
+        per_program = await asyncio.gather(
+            *(self._token_accounts(p) for p in self.token_programs)
+        )
+        balances: Dict[str, int] = {}
+        for accounts in per_program:
+            for item in accounts:
+                try:
+                    data = base64.b64decode(item["account"]["data"][0])
+                    mint, amount = parse_token_account(data)
+                except (KeyError, IndexError, TypeError, ValueError) as exc:
+                    logger.debug("[Reconciler] Token account inválida: %r", exc)
+                    continue
+                # puede haber varias token accounts del mismo mint
+                balances[mint] = balances.get(mint, 0) + amount
+        return balances
+
+    async def reconcile(self, engine: Any) -> Dict[str, int]:
+        balances = await self.fetch_balances()
+        result = engine.reconcile_balances(balances)
+        self.runs += 1
+        self.corrected += result.get("corrected", 0)
+        return result
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def get_stats_snapshot(self) -> Dict[str, Any]:
+        return {"runs": self.runs, "errors": self.errors, "corrected": self.corrected}
+
+
+async def wallet_reconcile_loop(
+    engine: Any,
+    reconciler: WalletReconciler,
+    interval_sec: float = 10.0,
+) -> None:
+    logger.info("[Reconciler] Reconciliando balances cada %.1fs", interval_sec)
+    try:
+        while True:
+            try:
+                await reconciler.reconcile(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                reconciler.errors += 1
+                logger.warning("[Reconciler] Error reconciliando: %r", exc)
+            await asyncio.sleep(interval_sec)
+    finally:
+        await reconciler.close()